@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para preparar bancos existentes para desfazer cozimentos:
+coluna shopping_list.source_history_id e índices de ligação com o histórico
+"""
+
+from app import create_app
+from models import db
+import sqlite3
+import os
+
+def add_cook_reversal_columns():
+    """Adiciona source_history_id em shopping_list e os índices usados ao desfazer cozimentos"""
+    app = create_app()
+    
+    with app.app_context():
+        # Verificar banco de dados em uso
+        db_path = str(db.engine.url).replace('sqlite:///', '')
+        abs_db_path = os.path.abspath(db_path)
+        
+        print("="*60)
+        print("Preparando o banco para desfazer cozimentos")
+        print("="*60)
+        print(f"📁 Banco de dados: {abs_db_path}")
+        
+        # Conectar diretamente ao SQLite
+        conn = sqlite3.connect(abs_db_path)
+        cursor = conn.cursor()
+        
+        try:
+            # Verificar se a coluna já existe
+            cursor.execute("PRAGMA table_info(shopping_list)")
+            columns = [col[1] for col in cursor.fetchall()]
+            
+            if 'source_history_id' in columns:
+                print("✅ Coluna 'source_history_id' já existe!")
+            else:
+                print("➕ Adicionando coluna 'source_history_id'...")
+                cursor.execute("ALTER TABLE shopping_list ADD COLUMN source_history_id INTEGER")
+                print("✅ Coluna 'source_history_id' adicionada com sucesso!")
+            
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS ix_shopping_list_source_history_id
+                ON shopping_list (source_history_id)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS ix_stock_movements_reason_reference
+                ON stock_movements (reason, reference_id)
+            """)
+            conn.commit()
+            print("✅ Índices criados!")
+        except Exception as e:
+            print(f"❌ Erro: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+        
+        print("="*60)
+
+if __name__ == '__main__':
+    add_cook_reversal_columns()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para criar os índices de validade (expiry_date) em bancos já existentes
+"""
+
+from app import create_app
+from models import db
+import sqlite3
+import os
+
+INDEXES = [
+    ('ix_ingredients_expiry_date', 'ingredients', 'expiry_date'),
+    ('ix_frozen_meals_expiry_date', 'frozen_meals', 'expiry_date'),
+]
+
+def add_expiry_indexes():
+    """Cria índices em ingredients.expiry_date e frozen_meals.expiry_date"""
+    app = create_app()
+    
+    with app.app_context():
+        # Verificar banco de dados em uso
+        db_path = str(db.engine.url).replace('sqlite:///', '')
+        abs_db_path = os.path.abspath(db_path)
+        
+        print("="*60)
+        print("Criando índices de validade")
+        print("="*60)
+        print(f"📁 Banco de dados: {abs_db_path}")
+        
+        # Conectar diretamente ao SQLite
+        conn = sqlite3.connect(abs_db_path)
+        cursor = conn.cursor()
+        
+        try:
+            for index_name, table, column in INDEXES:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({column})")
+                print(f"✅ Índice '{index_name}' em {table}({column})")
+            conn.commit()
+        except Exception as e:
+            print(f"❌ Erro: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+        
+        print("="*60)
+
+if __name__ == '__main__':
+    add_expiry_indexes()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para ligar refeições congeladas ao cozimento que as gerou:
+coluna frozen_meals.source_history_id e seu índice
+"""
+
+from app import create_app
+from models import db
+import sqlite3
+import os
+
+def add_frozen_meal_history_link():
+    """Adiciona source_history_id em frozen_meals (cozinhar e congelar)"""
+    app = create_app()
+    
+    with app.app_context():
+        # Verificar banco de dados em uso
+        db_path = str(db.engine.url).replace('sqlite:///', '')
+        abs_db_path = os.path.abspath(db_path)
+        
+        print("="*60)
+        print("Ligando refeições congeladas ao histórico")
+        print("="*60)
+        print(f"📁 Banco de dados: {abs_db_path}")
+        
+        # Conectar diretamente ao SQLite
+        conn = sqlite3.connect(abs_db_path)
+        cursor = conn.cursor()
+        
+        try:
+            # Verificar se a coluna já existe
+            cursor.execute("PRAGMA table_info(frozen_meals)")
+            columns = [col[1] for col in cursor.fetchall()]
+            
+            if 'source_history_id' in columns:
+                print("✅ Coluna 'source_history_id' já existe!")
+            else:
+                print("➕ Adicionando coluna 'source_history_id'...")
+                cursor.execute("ALTER TABLE frozen_meals ADD COLUMN source_history_id INTEGER")
+                print("✅ Coluna 'source_history_id' adicionada com sucesso!")
+            
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS ix_frozen_meals_source_history_id
+                ON frozen_meals (source_history_id)
+            """)
+            conn.commit()
+            print("✅ Índice criado!")
+        except Exception as e:
+            print(f"❌ Erro: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+        
+        print("="*60)
+
+if __name__ == '__main__':
+    add_frozen_meal_history_link()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para criar os índices do histórico (cooked_at e recipe_id, cooked_at) em bancos já existentes
+"""
+
+from app import create_app
+from models import db
+import sqlite3
+import os
+
+INDEXES = [
+    ('ix_cooking_history_cooked_at', 'cooking_history', 'cooked_at'),
+    ('ix_cooking_history_recipe_cooked_at', 'cooking_history', 'recipe_id, cooked_at'),
+]
+
+def add_history_indexes():
+    """Cria índices para ordenar e paginar o histórico por data"""
+    app = create_app()
+    
+    with app.app_context():
+        # Verificar banco de dados em uso
+        db_path = str(db.engine.url).replace('sqlite:///', '')
+        abs_db_path = os.path.abspath(db_path)
+        
+        print("="*60)
+        print("Criando índices do histórico")
+        print("="*60)
+        print(f"📁 Banco de dados: {abs_db_path}")
+        
+        # Conectar diretamente ao SQLite
+        conn = sqlite3.connect(abs_db_path)
+        cursor = conn.cursor()
+        
+        try:
+            for index_name, table, columns in INDEXES:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+                print(f"✅ Índice '{index_name}' em {table}({columns})")
+            conn.commit()
+        except Exception as e:
+            print(f"❌ Erro: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+        
+        print("="*60)
+
+if __name__ == '__main__':
+    add_history_indexes()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para criar o índice único parcial de itens pendentes na lista de compras
+"""
+
+from app import create_app
+from models import db
+import sqlite3
+import os
+
+def add_pending_shopping_index():
+    """Remove pendentes duplicados e cria o índice em shopping_list(ingredient_id) WHERE purchased = 0"""
+    app = create_app()
+    
+    with app.app_context():
+        # Verificar banco de dados em uso
+        db_path = str(db.engine.url).replace('sqlite:///', '')
+        abs_db_path = os.path.abspath(db_path)
+        
+        print("="*60)
+        print("Criando índice único de itens pendentes da lista de compras")
+        print("="*60)
+        print(f"📁 Banco de dados: {abs_db_path}")
+        
+        # Conectar diretamente ao SQLite
+        conn = sqlite3.connect(abs_db_path)
+        cursor = conn.cursor()
+        
+        try:
+            # Manter apenas o item pendente mais antigo de cada ingrediente
+            cursor.execute("""
+                DELETE FROM shopping_list
+                WHERE purchased = 0
+                  AND id NOT IN (
+                      SELECT MIN(id) FROM shopping_list
+                      WHERE purchased = 0
+                      GROUP BY ingredient_id
+                  )
+            """)
+            if cursor.rowcount:
+                print(f"🧹 {cursor.rowcount} itens pendentes duplicados removidos")
+            
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_shopping_list_pending_ingredient
+                ON shopping_list (ingredient_id) WHERE purchased = 0
+            """)
+            conn.commit()
+            print("✅ Índice 'uq_shopping_list_pending_ingredient' criado!")
+        except Exception as e:
+            print(f"❌ Erro: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+        
+        print("="*60)
+
+if __name__ == '__main__':
+    add_pending_shopping_index()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para adicionar os contadores de uso (times_cooked, total_servings_made,
+last_cooked_at, popularity) à tabela recipes e preenchê-los a partir do histórico
+"""
+
+from app import create_app
+from models import db
+from services.history_rollup import rebuild_recipe_counters
+import sqlite3
+import os
+
+COLUMNS = [
+    ('times_cooked', 'INTEGER NOT NULL DEFAULT 0'),
+    ('total_servings_made', 'INTEGER NOT NULL DEFAULT 0'),
+    ('last_cooked_at', 'DATETIME'),
+    ('popularity', 'FLOAT NOT NULL DEFAULT 0'),
+]
+
+INDEXES = [
+    ('ix_recipes_times_cooked', 'times_cooked'),
+    ('ix_recipes_last_cooked_at', 'last_cooked_at'),
+    ('ix_recipes_popularity', 'popularity'),
+]
+
+def add_recipe_usage_columns():
+    """Adiciona as colunas e índices e recalcula os contadores"""
+    app = create_app()
+    
+    with app.app_context():
+        # Verificar banco de dados em uso
+        db_path = str(db.engine.url).replace('sqlite:///', '')
+        abs_db_path = os.path.abspath(db_path)
+        
+        print("="*60)
+        print("Adicionando contadores de uso à tabela recipes")
+        print("="*60)
+        print(f"📁 Banco de dados: {abs_db_path}")
+        
+        # Conectar diretamente ao SQLite
+        conn = sqlite3.connect(abs_db_path)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("PRAGMA table_info(recipes)")
+            existing = [col[1] for col in cursor.fetchall()]
+            
+            for column, definition in COLUMNS:
+                if column in existing:
+                    print(f"✅ Coluna '{column}' já existe!")
+                else:
+                    cursor.execute(f"ALTER TABLE recipes ADD COLUMN {column} {definition}")
+                    print(f"➕ Coluna '{column}' adicionada")
+            
+            for index_name, column in INDEXES:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON recipes ({column})")
+                print(f"✅ Índice '{index_name}' em recipes({column})")
+            conn.commit()
+        except Exception as e:
+            print(f"❌ Erro: {e}")
+            conn.rollback()
+            return
+        finally:
+            conn.close()
+        
+        rebuild_recipe_counters()
+        db.session.commit()
+        print("✅ Contadores recalculados a partir do histórico")
+        print("="*60)
+
+if __name__ == '__main__':
+    add_recipe_usage_columns()
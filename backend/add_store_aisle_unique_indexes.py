@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para tornar únicos os índices de store_aisles em bancos existentes:
+uma regra por categoria e por ingrediente em cada layout
+"""
+
+from app import create_app
+from models import db
+import sqlite3
+import os
+
+INDEXES = [
+    ('ix_store_aisles_layout_category', 'layout_id, category'),
+    ('ix_store_aisles_layout_ingredient', 'layout_id, ingredient_id'),
+]
+
+def add_store_aisle_unique_indexes():
+    """Recria os índices de store_aisles como UNIQUE (falha se já houver regras duplicadas)"""
+    app = create_app()
+    
+    with app.app_context():
+        # Verificar banco de dados em uso
+        db_path = str(db.engine.url).replace('sqlite:///', '')
+        abs_db_path = os.path.abspath(db_path)
+        
+        print("="*60)
+        print("Tornando únicas as regras dos corredores")
+        print("="*60)
+        print(f"📁 Banco de dados: {abs_db_path}")
+        
+        # Conectar diretamente ao SQLite
+        conn = sqlite3.connect(abs_db_path)
+        cursor = conn.cursor()
+        
+        try:
+            for name, columns in INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
+                cursor.execute(f"CREATE UNIQUE INDEX {name} ON store_aisles ({columns})")
+                print(f"✅ Índice '{name}' recriado como UNIQUE!")
+            conn.commit()
+        except sqlite3.IntegrityError as e:
+            print(f"❌ Há categorias ou ingredientes em mais de um corredor do mesmo layout: {e}")
+            print("   Corrija os layouts pela API e rode o script de novo.")
+            conn.rollback()
+        except Exception as e:
+            print(f"❌ Erro: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+        
+        print("="*60)
+
+if __name__ == '__main__':
+    add_store_aisle_unique_indexes()
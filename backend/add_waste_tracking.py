@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para preparar bancos existentes para o controle de desperdício:
+tabela waste_records e coluna frozen_meals.discarded_portions
+"""
+
+from app import create_app
+from models import db
+import sqlite3
+import os
+
+def add_waste_tracking():
+    """Cria waste_records (com índices) e adiciona discarded_portions em frozen_meals"""
+    app = create_app()
+    
+    with app.app_context():
+        # Verificar banco de dados em uso
+        db_path = str(db.engine.url).replace('sqlite:///', '')
+        abs_db_path = os.path.abspath(db_path)
+        
+        print("="*60)
+        print("Preparando o banco para o controle de desperdício")
+        print("="*60)
+        print(f"📁 Banco de dados: {abs_db_path}")
+        
+        # Tabelas novas (waste_records) são criadas pelo SQLAlchemy
+        db.create_all()
+        print("✅ Tabela 'waste_records' pronta!")
+        
+        # Conectar diretamente ao SQLite
+        conn = sqlite3.connect(abs_db_path)
+        cursor = conn.cursor()
+        
+        try:
+            # Verificar se a coluna já existe
+            cursor.execute("PRAGMA table_info(frozen_meals)")
+            columns = [col[1] for col in cursor.fetchall()]
+            
+            if 'discarded_portions' in columns:
+                print("✅ Coluna 'discarded_portions' já existe!")
+            else:
+                print("➕ Adicionando coluna 'discarded_portions'...")
+                cursor.execute("ALTER TABLE frozen_meals ADD COLUMN discarded_portions INTEGER DEFAULT 0")
+                print("✅ Coluna 'discarded_portions' adicionada com sucesso!")
+            
+            conn.commit()
+        except Exception as e:
+            print(f"❌ Erro: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+        
+        print("="*60)
+
+if __name__ == '__main__':
+    add_waste_tracking()
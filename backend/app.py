@@ -6,7 +6,7 @@ import logging
 from logging.handlers import RotatingFileHandler
 from datetime import datetime
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     
     # Configurações
@@ -19,6 +19,15 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['JSON_AS_ASCII'] = False  # Para suportar caracteres UTF-8
+    app.config['EXPIRY_WINDOW_DAYS'] = int(os.environ.get('EXPIRY_WINDOW_DAYS', 7))  # Janela de "vencendo em breve"
+    app.config['REORDER_LEAD_TIME_DAYS'] = int(os.environ.get('REORDER_LEAD_TIME_DAYS', 2))  # Prazo até a compra chegar
+    app.config['SHOPPING_RETENTION_DAYS'] = int(os.environ.get('SHOPPING_RETENTION_DAYS', 30))  # Itens comprados na lista
+    app.config['HISTORY_RETENTION_DAYS'] = int(os.environ.get('HISTORY_RETENTION_DAYS', 730))  # Histórico nas tabelas quentes
+    app.config['ANALYTICS_ENGINE'] = os.environ.get('ANALYTICS_ENGINE', 'sqlite')  # sqlite ou duckdb (opcional)
+    
+    # Testes passam o banco temporário aqui, antes de a engine ser criada
+    if test_config:
+        app.config.update(test_config)
     
     # Configurar logging
     logs_dir = os.path.join(basedir, 'logs')
@@ -27,7 +36,10 @@ def create_app():
     
     log_file = os.path.join(logs_dir, 'app.log')
     
-    if not app.debug:
+    if app.testing:
+        # Em testes, sem arquivo de log
+        pass
+    elif not app.debug:
         # Em produção, apenas arquivo
         file_handler = RotatingFileHandler(log_file, maxBytes=10240000, backupCount=10, encoding='utf-8')
         file_handler.setFormatter(logging.Formatter(
@@ -75,21 +87,45 @@ def create_app():
         app.logger.info('=' * 60)
     
     # Inicializar extensões
-    CORS(app)
+    CORS(app, expose_headers=['X-Next-Cursor', 'ETag'])
     db.init_app(app)
     
+    # Invalidação automática dos caches em memória a cada commit
+    from services.cache import init_cache_invalidation
+    init_cache_invalidation()
+    
+    # Reposição: ingredientes que diminuíram são anotados no flush para apply_reorders()
+    from services.reorder import init_reorder_tracking
+    init_reorder_tracking()
+    
+    # Rollups do histórico atualizados a cada registro criado ou apagado
+    from services.history_rollup import init_history_rollups
+    init_history_rollups()
+    
     # Registrar blueprints
     from routes.ingredients import ingredients_bp
     from routes.recipes import recipes_bp
     from routes.shopping import shopping_bp
     from routes.history import history_bp
     from routes.frozen_meals import frozen_meals_bp
+    from routes.expiry import expiry_bp
+    from routes.forecast import forecast_bp
+    from routes.meal_plan import meal_plan_bp
+    from routes.store_layouts import store_layouts_bp
+    from routes.maintenance import maintenance_bp
+    from routes.analytics import analytics_bp
     
     app.register_blueprint(ingredients_bp, url_prefix='/api')
     app.register_blueprint(recipes_bp, url_prefix='/api')
     app.register_blueprint(shopping_bp, url_prefix='/api')
     app.register_blueprint(history_bp, url_prefix='/api')
     app.register_blueprint(frozen_meals_bp, url_prefix='/api')
+    app.register_blueprint(expiry_bp, url_prefix='/api')
+    app.register_blueprint(forecast_bp, url_prefix='/api')
+    app.register_blueprint(meal_plan_bp, url_prefix='/api')
+    app.register_blueprint(store_layouts_bp, url_prefix='/api')
+    app.register_blueprint(maintenance_bp, url_prefix='/api')
+    app.register_blueprint(analytics_bp, url_prefix='/api')
     
     # Criar tabelas
     with app.app_context():
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Job em lote: arquiva itens comprados e histórico antigo (rodar periodicamente, ex.: cron)
+"""
+
+import sys
+from app import create_app
+from models import db
+from services.retention import run_retention
+
+def run_archive(shopping_days=None, history_days=None):
+    """Move os dados antigos para as tabelas de arquivo e imprime o resumo"""
+    app = create_app()
+    
+    with app.app_context():
+        print("="*60)
+        print("Arquivando dados antigos")
+        print("="*60)
+        
+        result = run_retention(shopping_days, history_days)
+        db.session.commit()
+        
+        print(f"   Itens comprados arquivados: {result['shopping_items_archived']}")
+        print(f"   Registros de histórico arquivados: {result['history_archived']}")
+        print("="*60)
+        return result
+
+if __name__ == '__main__':
+    shopping = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    history = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    run_archive(shopping, history)
@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Migração: cria a tabela history_rollups e preenche a partir do histórico existente
+(ativo e arquivado). Pode ser rodada de novo para recalcular os rollups.
+"""
+
+from app import create_app
+from models import db, HistoryRollup
+from services.history_rollup import rebuild_rollups
+
+def build_rollups():
+    """Recria os rollups do histórico"""
+    app = create_app()
+    
+    with app.app_context():
+        HistoryRollup.__table__.create(db.engine, checkfirst=True)
+        rebuild_rollups()
+        db.session.commit()
+        print(f"✅ Rollups recalculados: {HistoryRollup.query.count()} linhas")
+
+if __name__ == '__main__':
+    build_rollups()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Job em lote: calcula a taxa de consumo de todos os ingredientes e a data prevista de término
+"""
+
+import sys
+from app import create_app
+from services.forecast import depletion_forecast, DEFAULT_LOOKBACK_DAYS, DEFAULT_SPAN_DAYS
+
+def run_forecast(lookback_days=DEFAULT_LOOKBACK_DAYS, span_days=DEFAULT_SPAN_DAYS):
+    """Calcula e imprime a previsão de término dos ingredientes"""
+    app = create_app()
+    
+    with app.app_context():
+        print("="*60)
+        print(f"Previsão de consumo (últimos {lookback_days} dias, suavização {span_days} dias)")
+        print("="*60)
+        
+        forecast = depletion_forecast(lookback_days, span_days)
+        
+        if not forecast:
+            print("Nenhum consumo registrado no histórico.")
+        
+        for item in forecast:
+            runs_out = item['runs_out_on'] or '—'
+            print(f"   {item['ingredient_name']:<30} {item['daily_rate']:>10.2f} {item['unit']}/dia   acaba em: {runs_out}")
+        
+        print("="*60)
+        return forecast
+
+if __name__ == '__main__':
+    lookback = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LOOKBACK_DAYS
+    run_forecast(lookback)
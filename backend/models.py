@@ -3,18 +3,32 @@ from datetime import datetime, timedelta
 
 db = SQLAlchemy()
 
+# Popularidade com decaimento exponencial: cada cozimento vale 1 hoje e metade
+# a cada POPULARITY_HALF_LIFE_DAYS. Guardamos o valor relativo a uma época fixa
+# (peso de cada cozimento = 2 ** (dias desde a época / meia-vida)), então a ordem
+# entre receitas não muda com o tempo e pode ser lida pelo índice.
+POPULARITY_HALF_LIFE_DAYS = 90
+POPULARITY_EPOCH = datetime(2020, 1, 1)
+
+
+def popularity_weight(moment):
+    """Peso de um cozimento em `moment`, na escala da época"""
+    days = (moment - POPULARITY_EPOCH).total_seconds() / 86400
+    return 2 ** (days / POPULARITY_HALF_LIFE_DAYS)
+
 class Ingredient(db.Model):
     __tablename__ = 'ingredients'
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
-    quantity = db.Column(db.Float, nullable=False, default=0)
+    # active_history: o valor anterior fica no histórico do flush (services.reorder)
+    quantity = db.column_property(db.Column(db.Float, nullable=False, default=0), active_history=True)
     unit = db.Column(db.String(20), nullable=False)  # g, kg, ml, L, unidades, etc.
     category = db.Column(db.String(50))  # Vegetais, Frutas, Laticínios, etc.
     location = db.Column(db.String(50))  # Geladeira, Freezer, Despensa
     emoji = db.Column(db.String(10))  # Emoji do ingrediente
     vegan = db.Column(db.Boolean, default=False)  # Se o ingrediente é vegano
-    expiry_date = db.Column(db.Date, nullable=True)
+    expiry_date = db.Column(db.Date, nullable=True, index=True)
     minimum_quantity = db.Column(db.Float, default=0)  # Para lista de compras
     unlimited = db.Column(db.Boolean, default=False)  # Se o ingrediente é ilimitado (água, sal, etc.)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -23,6 +37,8 @@ class Ingredient(db.Model):
     # Relacionamentos
     recipe_ingredients = db.relationship('RecipeIngredient', back_populates='ingredient')
     shopping_list_items = db.relationship('ShoppingList', back_populates='ingredient')
+    packs = db.relationship('IngredientPack', back_populates='ingredient', cascade='all, delete-orphan')
+    price_history = db.relationship('PriceRecord', back_populates='ingredient', cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -52,6 +68,11 @@ class Recipe(db.Model):
     prep_time = db.Column(db.Integer)  # Minutos
     cook_time = db.Column(db.Integer)  # Minutos
     emoji = db.Column(db.String(10), default='🍽️')  # Emoji representativo da receita
+    # Contadores de uso, mantidos a cada registro do histórico (services/history_rollup.py)
+    times_cooked = db.Column(db.Integer, nullable=False, default=0, index=True)
+    total_servings_made = db.Column(db.Integer, nullable=False, default=0)
+    last_cooked_at = db.Column(db.DateTime, nullable=True, index=True)
+    popularity = db.Column(db.Float, nullable=False, default=0, index=True)  # Soma dos pesos (escala da época)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -59,6 +80,7 @@ class Recipe(db.Model):
     recipe_ingredients = db.relationship('RecipeIngredient', back_populates='recipe', cascade='all, delete-orphan')
     cooking_history = db.relationship('CookingHistory', back_populates='recipe', cascade='all, delete-orphan')
     frozen_meals = db.relationship('FrozenMeal', back_populates='recipe', cascade='all, delete-orphan')
+    meal_plan_entries = db.relationship('MealPlanEntry', back_populates='recipe', cascade='all, delete-orphan')
     
     def to_dict(self, include_ingredients=False):
         result = {
@@ -69,6 +91,10 @@ class Recipe(db.Model):
             'prep_time': self.prep_time,
             'cook_time': self.cook_time,
             'emoji': self.emoji or '🍽️',
+            'times_cooked': self.times_cooked or 0,
+            'total_servings_made': self.total_servings_made or 0,
+            'last_cooked_at': self.last_cooked_at.isoformat() if self.last_cooked_at else None,
+            'popularity_score': self.popularity_score(),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -89,6 +115,11 @@ class Recipe(db.Model):
         result['is_vegan'] = is_vegan
         
         return result
+    
+    def popularity_score(self, now=None):
+        """Popularidade atual: cozimentos ponderados pela idade (meia-vida POPULARITY_HALF_LIFE_DAYS)"""
+        score = (self.popularity or 0) / popularity_weight(now or datetime.utcnow())
+        return round(max(score, 0.0), 4)
 
 
 class RecipeIngredient(db.Model):
@@ -119,6 +150,10 @@ class RecipeIngredient(db.Model):
 
 class CookingHistory(db.Model):
     __tablename__ = 'cooking_history'
+    __table_args__ = (
+        db.Index('ix_cooking_history_cooked_at', 'cooked_at'),
+        db.Index('ix_cooking_history_recipe_cooked_at', 'recipe_id', 'cooked_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
@@ -140,8 +175,28 @@ class CookingHistory(db.Model):
         }
 
 
+class HistoryRollup(db.Model):
+    """Contagens pré-agregadas do histórico (ver services/history_rollup.py)"""
+    __tablename__ = 'history_rollups'
+    
+    period = db.Column(db.String(5), primary_key=True)  # day, week ou total
+    period_start = db.Column(db.Date, primary_key=True)  # Dia, segunda-feira da semana ou 1970-01-01 (total)
+    recipe_id = db.Column(db.Integer, primary_key=True)
+    cook_count = db.Column(db.Integer, nullable=False, default=0)
+    servings_made = db.Column(db.Integer, nullable=False, default=0)
+
+
 class ShoppingList(db.Model):
     __tablename__ = 'shopping_list'
+    __table_args__ = (
+        # No máximo um item pendente (não comprado) por ingrediente
+        db.Index(
+            'uq_shopping_list_pending_ingredient',
+            'ingredient_id',
+            unique=True,
+            sqlite_where=db.text('purchased = 0')
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False)
@@ -149,6 +204,7 @@ class ShoppingList(db.Model):
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
     purchased = db.Column(db.Boolean, default=False)
     purchased_at = db.Column(db.DateTime, nullable=True)
+    source_history_id = db.Column(db.Integer, nullable=True, index=True)  # Cozimento que gerou o item (reposição automática)
     
     # Relacionamento
     ingredient = db.relationship('Ingredient', back_populates='shopping_list_items')
@@ -162,7 +218,254 @@ class ShoppingList(db.Model):
             'quantity_needed': self.quantity_needed,
             'added_at': self.added_at.isoformat(),
             'purchased': self.purchased,
-            'purchased_at': self.purchased_at.isoformat() if self.purchased_at else None
+            'purchased_at': self.purchased_at.isoformat() if self.purchased_at else None,
+            'source_history_id': self.source_history_id
+        }
+
+
+class ShoppingListArchive(db.Model):
+    """Itens comprados retirados da lista (ver services/retention.py)"""
+    __tablename__ = 'shopping_list_archive'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    original_id = db.Column(db.Integer, nullable=False)  # id em shopping_list
+    ingredient_id = db.Column(db.Integer, nullable=False, index=True)  # Sem FK: o ingrediente pode ser apagado
+    quantity_needed = db.Column(db.Float, nullable=False)
+    added_at = db.Column(db.DateTime)
+    purchased_at = db.Column(db.DateTime, index=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.original_id,
+            'ingredient_id': self.ingredient_id,
+            'quantity_needed': self.quantity_needed,
+            'added_at': self.added_at.isoformat() if self.added_at else None,
+            'purchased': True,
+            'purchased_at': self.purchased_at.isoformat() if self.purchased_at else None,
+            'archived_at': self.archived_at.isoformat()
+        }
+
+
+class CookingHistoryArchive(db.Model):
+    """Histórico antigo retirado de cooking_history (ver services/retention.py)"""
+    __tablename__ = 'cooking_history_archive'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    original_id = db.Column(db.Integer, nullable=False)  # id em cooking_history
+    recipe_id = db.Column(db.Integer, nullable=False)  # Sem FK: a receita pode ser apagada
+    recipe_name = db.Column(db.String(200))  # Nome no momento do arquivamento
+    servings_made = db.Column(db.Integer, nullable=False)
+    cooked_at = db.Column(db.DateTime, index=True)
+    notes = db.Column(db.Text, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.original_id,
+            'recipe_id': self.recipe_id,
+            'recipe_name': self.recipe_name,
+            'servings_made': self.servings_made,
+            'cooked_at': self.cooked_at.isoformat() if self.cooked_at else None,
+            'notes': self.notes,
+            'archived_at': self.archived_at.isoformat()
+        }
+
+
+class IngredientPack(db.Model):
+    __tablename__ = 'ingredient_packs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False, index=True)
+    size = db.Column(db.Float, nullable=False)  # Quantidade por embalagem, na unidade do ingrediente
+    price = db.Column(db.Float, nullable=True)  # Preço da embalagem (opcional)
+    label = db.Column(db.String(50), nullable=True)  # Ex.: "Pacote 1kg"
+    
+    # Relacionamento
+    ingredient = db.relationship('Ingredient', back_populates='packs')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'ingredient_id': self.ingredient_id,
+            'size': self.size,
+            'price': self.price,
+            'label': self.label
+        }
+
+
+class StoreLayout(db.Model):
+    __tablename__ = 'store_layouts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    is_default = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relacionamentos
+    aisles = db.relationship('StoreAisle', back_populates='layout', cascade='all, delete-orphan',
+                             order_by='StoreAisle.position')
+    
+    def to_dict(self):
+        # Agrupar as regras por corredor
+        aisles = {}
+        for rule in self.aisles:
+            aisle = aisles.setdefault((rule.position, rule.name), {
+                'name': rule.name,
+                'position': rule.position,
+                'categories': [],
+                'ingredient_ids': []
+            })
+            if rule.ingredient_id is not None:
+                aisle['ingredient_ids'].append(rule.ingredient_id)
+            elif rule.category:
+                aisle['categories'].append(rule.category)
+        
+        return {
+            'id': self.id,
+            'name': self.name,
+            'is_default': self.is_default,
+            'aisles': [aisles[key] for key in sorted(aisles)],
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class StoreAisle(db.Model):
+    __tablename__ = 'store_aisles'
+    __table_args__ = (
+        # Uma regra por categoria/ingrediente em cada layout (NULLs não conflitam)
+        db.Index('ix_store_aisles_layout_category', 'layout_id', 'category', unique=True),
+        db.Index('ix_store_aisles_layout_ingredient', 'layout_id', 'ingredient_id', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    layout_id = db.Column(db.Integer, db.ForeignKey('store_layouts.id'), nullable=False)
+    name = db.Column(db.String(50), nullable=False)  # Nome do corredor
+    position = db.Column(db.Integer, nullable=False)  # Ordem no percurso da loja
+    category = db.Column(db.String(50), nullable=True)  # Categoria de ingrediente deste corredor
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=True)  # Exceção por ingrediente
+    
+    # Relacionamento
+    layout = db.relationship('StoreLayout', back_populates='aisles')
+
+
+class MealPlanEntry(db.Model):
+    __tablename__ = 'meal_plan'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
+    planned_date = db.Column(db.Date, nullable=False, index=True)
+    servings = db.Column(db.Integer, nullable=False, default=1)
+    notes = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relacionamento
+    recipe = db.relationship('Recipe', back_populates='meal_plan_entries')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'recipe_id': self.recipe_id,
+            'recipe_name': self.recipe.name if self.recipe else None,
+            'recipe_emoji': self.recipe.emoji if self.recipe else '🍽️',
+            'planned_date': self.planned_date.isoformat(),
+            'servings': self.servings,
+            'notes': self.notes,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class StockMovement(db.Model):
+    __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('ix_stock_movements_reason_reference', 'reason', 'reference_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False, index=True)
+    quantity_change = db.Column(db.Float, nullable=False)  # Positivo entra no estoque, negativo sai
+    reason = db.Column(db.String(20), nullable=False)  # purchase, cook, cook_undo, waste
+    reference_id = db.Column(db.Integer, nullable=True)  # Item da lista de compras, registro do histórico ou do desperdício
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relacionamento
+    ingredient = db.relationship('Ingredient')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'ingredient_id': self.ingredient_id,
+            'ingredient_name': self.ingredient.name if self.ingredient else None,
+            'quantity_change': self.quantity_change,
+            'reason': self.reason,
+            'reference_id': self.reference_id,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class PriceRecord(db.Model):
+    __tablename__ = 'price_history'
+    __table_args__ = (
+        db.Index('ix_price_history_ingredient_recorded', 'ingredient_id', 'recorded_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False)
+    price_per_unit = db.Column(db.Float, nullable=False)  # Na unidade do ingrediente
+    quantity = db.Column(db.Float, nullable=True)  # Quantidade comprada
+    shopping_item_id = db.Column(db.Integer, nullable=True)  # Item da lista de compras de origem
+    recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relacionamento
+    ingredient = db.relationship('Ingredient', back_populates='price_history')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'ingredient_id': self.ingredient_id,
+            'price_per_unit': self.price_per_unit,
+            'quantity': self.quantity,
+            'shopping_item_id': self.shopping_item_id,
+            'recorded_at': self.recorded_at.isoformat()
+        }
+
+
+class WasteRecord(db.Model):
+    """Descarte de estoque: ingrediente ou refeição congelada jogados fora"""
+    __tablename__ = 'waste_records'
+    __table_args__ = (
+        db.Index('ix_waste_records_ingredient_discarded', 'ingredient_id', 'discarded_at'),
+        db.Index('ix_waste_records_category_discarded', 'category', 'discarded_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=True)
+    frozen_meal_id = db.Column(db.Integer, db.ForeignKey('frozen_meals.id'), nullable=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=True)  # Receita da refeição congelada
+    item_name = db.Column(db.String(100), nullable=False)  # Nome no momento do descarte
+    category = db.Column(db.String(50), nullable=True)
+    quantity = db.Column(db.Float, nullable=False)
+    unit = db.Column(db.String(20), nullable=True)
+    reason = db.Column(db.String(20), nullable=False)  # expired, spoiled, leftover, other
+    cost = db.Column(db.Float, nullable=True)  # Custo estimado (None se não houver preço)
+    notes = db.Column(db.Text, nullable=True)
+    discarded_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': 'frozen_meal' if self.frozen_meal_id else 'ingredient',
+            'ingredient_id': self.ingredient_id,
+            'frozen_meal_id': self.frozen_meal_id,
+            'recipe_id': self.recipe_id,
+            'item_name': self.item_name,
+            'category': self.category,
+            'quantity': self.quantity,
+            'unit': self.unit,
+            'reason': self.reason,
+            'cost': self.cost,
+            'notes': self.notes,
+            'discarded_at': self.discarded_at.isoformat()
         }
 
 
@@ -173,12 +476,14 @@ class FrozenMeal(db.Model):
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
     portions = db.Column(db.Integer, nullable=False)  # Quantidade de porções congeladas
     frozen_at = db.Column(db.DateTime, default=datetime.utcnow)  # Data de congelamento
-    expiry_date = db.Column(db.Date, nullable=True)  # Data de validade (padrão: 3 meses)
+    expiry_date = db.Column(db.Date, nullable=True, index=True)  # Data de validade (padrão: 3 meses)
     consumed_at = db.Column(db.DateTime, nullable=True)  # Quando foi consumido
     consumed_portions = db.Column(db.Integer, default=0)  # Porções já consumidas
+    discarded_portions = db.Column(db.Integer, default=0)  # Porções descartadas como desperdício
     measure = db.Column(db.String(20), nullable=True)  # Medida (g, kg, ml, L, potes, etc)
     notes = db.Column(db.Text, nullable=True)  # Notas sobre o congelamento/preparação
-    status = db.Column(db.String(20), default='frozen')  # frozen, thawed, consumed
+    status = db.Column(db.String(20), default='frozen')  # frozen, thawed, consumed, discarded
+    source_history_id = db.Column(db.Integer, db.ForeignKey('cooking_history.id'), nullable=True, index=True)  # Cozimento que gerou a refeição
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relacionamento
@@ -206,12 +511,16 @@ class FrozenMeal(db.Model):
             else:
                 self.expiry_date = (datetime.utcnow() + timedelta(days=90)).date()
     
+    def remaining_portions(self):
+        """Porções ainda no freezer (nem consumidas nem descartadas)"""
+        return self.portions - (self.consumed_portions or 0) - (self.discarded_portions or 0)
+    
     def to_dict(self):
         from datetime import date
         today = date.today()
         
         # Calcular porções restantes
-        remaining_portions = self.portions - self.consumed_portions
+        remaining_portions = self.remaining_portions()
         
         # Verificar se está vencido
         is_expired = False
@@ -229,12 +538,14 @@ class FrozenMeal(db.Model):
             'portions': self.portions,
             'remaining_portions': remaining_portions,
             'consumed_portions': self.consumed_portions,
+            'discarded_portions': self.discarded_portions or 0,
             'frozen_at': self.frozen_at.isoformat() if self.frozen_at else None,
             'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None,
             'consumed_at': self.consumed_at.isoformat() if self.consumed_at else None,
             'measure': self.measure,
             'notes': self.notes,
             'status': self.status,
+            'source_history_id': self.source_history_id,
             'is_expired': is_expired,
             'days_until_expiry': days_until_expiry,
             'is_available': remaining_portions > 0 and self.status == 'frozen' and not is_expired
@@ -0,0 +1,63 @@
+from flask import Blueprint, request, jsonify
+from services.consumption import consumption_by_period
+from services.duckdb_analytics import analytics_engine, is_available
+from services.waste import waste_report
+from datetime import date
+
+analytics_bp = Blueprint('analytics', __name__)
+
+@analytics_bp.route('/analytics/consumption', methods=['GET'])
+def get_consumption():
+    """Consumo de ingredientes por período, derivado do histórico
+    
+    ?period=day|week|month|year (padrão month), start/end (YYYY-MM-DD),
+    ingredient_id e category opcionais.
+    """
+    try:
+        period = request.args.get('period', 'month')
+        ingredient_id = request.args.get('ingredient_id', type=int)
+        category = request.args.get('category')
+        try:
+            start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+            end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+        except ValueError:
+            return jsonify({'error': 'Datas devem estar no formato YYYY-MM-DD'}), 400
+        
+        return jsonify(consumption_by_period(period, start, end, ingredient_id, category)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@analytics_bp.route('/analytics/waste', methods=['GET'])
+def get_waste_report():
+    """Desperdício (quantidade e custo) por ingrediente, categoria ou mês
+    
+    ?group_by=ingredient|category|month (padrão ingredient), start/end (YYYY-MM-DD).
+    """
+    try:
+        group_by = request.args.get('group_by', 'ingredient')
+        try:
+            start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+            end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+        except ValueError:
+            return jsonify({'error': 'Datas devem estar no formato YYYY-MM-DD'}), 400
+        
+        return jsonify(waste_report(group_by, start, end)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@analytics_bp.route('/analytics/engine', methods=['GET'])
+def get_analytics_engine():
+    """Motor em uso nas análises (sqlite ou duckdb) e se o DuckDB está disponível"""
+    try:
+        return jsonify({
+            'engine': analytics_engine(),
+            'duckdb_available': is_available()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
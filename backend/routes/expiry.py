@@ -0,0 +1,21 @@
+from flask import Blueprint, request, jsonify
+from services.expiry import expiring_items, get_window_days
+
+expiry_bp = Blueprint('expiry', __name__)
+
+@expiry_bp.route('/expiring', methods=['GET'])
+def get_expiring_items():
+    """Obter tudo que vence nos próximos N dias (ingredientes e refeições congeladas)"""
+    try:
+        days = request.args.get('days', type=int)
+        if days is not None and days < 0:
+            return jsonify({'error': 'days deve ser maior ou igual a zero'}), 400
+        
+        items = expiring_items(days)
+        return jsonify({
+            'days': get_window_days(days),
+            'total': len(items),
+            'items': items
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
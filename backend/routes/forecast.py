@@ -0,0 +1,18 @@
+from flask import Blueprint, request, jsonify
+from services.forecast import depletion_forecast, DEFAULT_LOOKBACK_DAYS, DEFAULT_SPAN_DAYS
+
+forecast_bp = Blueprint('forecast', __name__)
+
+@forecast_bp.route('/forecast/depletion', methods=['GET'])
+def get_depletion_forecast():
+    """Obter taxa diária de consumo e data prevista de término por ingrediente"""
+    try:
+        lookback_days = request.args.get('lookback_days', DEFAULT_LOOKBACK_DAYS, type=int)
+        span_days = request.args.get('span_days', DEFAULT_SPAN_DAYS, type=int)
+        
+        if lookback_days <= 0 or span_days <= 0:
+            return jsonify({'error': 'lookback_days e span_days devem ser maiores que zero'}), 400
+        
+        return jsonify(depletion_forecast(lookback_days, span_days)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
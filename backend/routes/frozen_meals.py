@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import db, FrozenMeal, Recipe
+from services.expiry import expiring_frozen_meals
+from services.waste import discard_frozen_meal
 from datetime import datetime, date, timedelta
 
 frozen_meals_bp = Blueprint('frozen_meals', __name__)
@@ -160,7 +162,7 @@ def consume_frozen_meal(id):
         if portions_to_consume <= 0:
             return jsonify({'error': 'Quantidade de porções deve ser maior que zero'}), 400
         
-        remaining = meal.portions - meal.consumed_portions
+        remaining = meal.remaining_portions()
         
         if portions_to_consume > remaining:
             return jsonify({
@@ -172,7 +174,7 @@ def consume_frozen_meal(id):
         meal.consumed_portions += portions_to_consume
         
         # Se consumiu todas as porções, marcar como consumido
-        if meal.consumed_portions >= meal.portions:
+        if meal.remaining_portions() <= 0:
             meal.status = 'consumed'
             meal.consumed_at = datetime.utcnow()
         
@@ -187,6 +189,36 @@ def consume_frozen_meal(id):
         return jsonify({'error': str(e)}), 500
 
 
+@frozen_meals_bp.route('/frozen-meals/<int:id>/discard', methods=['POST'])
+def discard_frozen_meal_portions(id):
+    """Descartar porções de uma refeição congelada como desperdício
+    
+    Body opcional: {portions (padrão: todas as restantes), reason, notes}
+    """
+    try:
+        meal = FrozenMeal.query.get_or_404(id)
+        data = request.get_json(silent=True) or {}
+        
+        record = discard_frozen_meal(
+            meal,
+            portions=data.get('portions'),
+            reason=data.get('reason', 'expired'),
+            notes=data.get('notes')
+        )
+        db.session.commit()
+        
+        return jsonify({
+            'waste': record.to_dict(),
+            'meal': meal.to_dict()
+        }), 201
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @frozen_meals_bp.route('/frozen-meals/<int:id>', methods=['DELETE'])
 def delete_frozen_meal(id):
     """Deletar refeição congelada"""
@@ -209,7 +241,7 @@ def get_frozen_meals_stats():
         total_meals = len(all_meals)
         total_portions = sum(meal.portions for meal in all_meals)
         total_consumed = sum(meal.consumed_portions for meal in all_meals)
-        total_remaining = total_portions - total_consumed
+        total_remaining = sum(meal.remaining_portions() for meal in all_meals)
         
         frozen_count = len([m for m in all_meals if m.status == 'frozen'])
         consumed_count = len([m for m in all_meals if m.status == 'consumed'])
@@ -218,12 +250,9 @@ def get_frozen_meals_stats():
         today = date.today()
         expired_count = len([m for m in all_meals if m.expiry_date and m.expiry_date < today and m.status == 'frozen'])
         
-        # Próximos a vencer (próximos 7 dias)
-        week_from_now = today + timedelta(days=7)
-        expiring_soon = [
-            m.to_dict() for m in all_meals 
-            if m.expiry_date and m.expiry_date <= week_from_now and m.expiry_date >= today and m.status == 'frozen'
-        ]
+        # Próximos a vencer (janela configurável, padrão 7 dias)
+        days = request.args.get('days', type=int)
+        expiring_soon = [m.to_dict() for m in expiring_frozen_meals(days, today)]
         
         return jsonify({
             'total_meals': total_meals,
@@ -1,9 +1,74 @@
-from flask import Blueprint, request, jsonify
-from models import db, CookingHistory, Recipe
-from datetime import datetime, timedelta
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from models import db, CookingHistory, CookingHistoryArchive, Recipe
+from services.history_rollup import range_totals, top_recipes, total_cooks, trending_recipes
+from services.history_export import history_export_select, HISTORY_COLUMNS, CONSUMPTION_COLUMNS
+from services.export import stream_batches, csv_stream, nested_ndjson_stream
+from services.cooking import detach_history, reverse_cooks
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import contains_eager
+from datetime import date, datetime, timedelta
+import base64
 
 history_bp = Blueprint('history', __name__)
 
+
+def _history_query():
+    """Histórico com o nome da receita no mesmo SELECT (sem lazy load por linha)"""
+    return CookingHistory.query.join(CookingHistory.recipe).options(
+        contains_eager(CookingHistory.recipe).load_only(Recipe.name)
+    )
+
+
+def _encode_cursor(history):
+    raw = f'{history.cooked_at.isoformat()}|{history.id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    try:
+        cooked_at, history_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(cooked_at), int(history_id)
+    except Exception:
+        raise ValueError('cursor inválido')
+
+
+def _paginated_response(query):
+    """Ordenar por (cooked_at, id) desc e paginar por cursor (?limit=N&cursor=...).
+    
+    A página seguinte começa depois do último registro da anterior (keyset),
+    então o custo por página não depende de quantas páginas vieram antes.
+    O cursor da próxima página vai no header X-Next-Cursor.
+    """
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    
+    if cursor:
+        cooked_at, history_id = _decode_cursor(cursor)
+        query = query.filter(
+            CookingHistory.cooked_at <= cooked_at,
+            or_(
+                CookingHistory.cooked_at < cooked_at,
+                and_(CookingHistory.cooked_at == cooked_at, CookingHistory.id < history_id)
+            )
+        )
+    
+    query = query.order_by(CookingHistory.cooked_at.desc(), CookingHistory.id.desc())
+    
+    next_cursor = None
+    if limit:
+        history = query.limit(limit + 1).all()
+        if len(history) > limit:
+            history = history[:limit]
+            next_cursor = _encode_cursor(history[-1])
+    else:
+        history = query.all()
+    
+    response = jsonify([h.to_dict() for h in history])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
+
 @history_bp.route('/history', methods=['GET'])
 def get_history():
     """Obter histórico de receitas feitas com filtros opcionais"""
@@ -11,24 +76,52 @@ def get_history():
         # Filtros opcionais
         recipe_id = request.args.get('recipe_id', type=int)
         days = request.args.get('days', type=int)  # Últimos X dias
-        limit = request.args.get('limit', type=int)
         
-        query = CookingHistory.query
+        query = _history_query()
         
         if recipe_id:
-            query = query.filter_by(recipe_id=recipe_id)
+            query = query.filter(CookingHistory.recipe_id == recipe_id)
         
         if days:
             since_date = datetime.utcnow() - timedelta(days=days)
             query = query.filter(CookingHistory.cooked_at >= since_date)
         
-        query = query.order_by(CookingHistory.cooked_at.desc())
+        return _paginated_response(query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@history_bp.route('/history/export', methods=['GET'])
+def export_history():
+    """Exportar todo o histórico com o consumo de ingredientes, em streaming
+    
+    ?format=ndjson (um registro por linha, consumo aninhado) ou csv (uma linha
+    por registro e ingrediente); filtros opcionais start, end (YYYY-MM-DD) e recipe_id.
+    """
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        recipe_id = request.args.get('recipe_id', type=int)
+        try:
+            start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+            end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+        except ValueError:
+            return jsonify({'error': 'Datas devem estar no formato YYYY-MM-DD'}), 400
         
-        if limit:
-            query = query.limit(limit)
+        if export_format not in ('ndjson', 'csv'):
+            return jsonify({'error': 'format deve ser ndjson ou csv'}), 400
         
-        history = query.all()
-        return jsonify([h.to_dict() for h in history]), 200
+        batches = stream_batches(history_export_select(start, end, recipe_id))
+        if export_format == 'csv':
+            header = ['history_id'] + HISTORY_COLUMNS[1:] + CONSUMPTION_COLUMNS
+            response = Response(stream_with_context(csv_stream(header, batches)), mimetype='text/csv; charset=utf-8')
+            response.headers['Content-Disposition'] = 'attachment; filename=historico.csv'
+        else:
+            body = nested_ndjson_stream(HISTORY_COLUMNS, CONSUMPTION_COLUMNS, 'consumption', batches)
+            response = Response(stream_with_context(body), mimetype='application/x-ndjson')
+            response.headers['Content-Disposition'] = 'attachment; filename=historico.ndjson'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -65,6 +158,7 @@ def delete_history(id):
     """Deletar registro do histórico"""
     try:
         history = CookingHistory.query.get_or_404(id)
+        detach_history([history.id])
         db.session.delete(history)
         db.session.commit()
         return jsonify({'message': 'Registro deletado com sucesso'}), 200
@@ -73,64 +167,106 @@ def delete_history(id):
         return jsonify({'error': str(e)}), 500
 
 
+@history_bp.route('/history/<int:id>/reverse', methods=['POST'])
+def reverse_history(id):
+    """Desfazer um cozimento: devolver o consumo ao estoque e remover o registro"""
+    try:
+        CookingHistory.query.get_or_404(id)
+        result = reverse_cooks([id])
+        
+        if not result['reversed_ids']:
+            return jsonify({
+                'error': 'Registro sem consumo gravado ou com refeição congelada já consumida/descartada; '
+                         'não é possível desfazer'
+            }), 409
+        
+        db.session.commit()
+        return jsonify(_reverse_response(result)), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@history_bp.route('/history/reverse', methods=['POST'])
+def reverse_history_bulk():
+    """Desfazer vários cozimentos de uma vez (tudo ou nada na mesma transação)
+    
+    Body: {"ids": [1, 2, 3]}
+    """
+    try:
+        data = request.get_json() or {}
+        ids = data.get('ids')
+        
+        if not ids or not isinstance(ids, list):
+            return jsonify({'error': 'ids é obrigatório'}), 400
+        
+        result = reverse_cooks(ids)
+        db.session.commit()
+        return jsonify(_reverse_response(result)), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _reverse_response(result):
+    return {
+        'message': f"{len(result['reversed_ids'])} cozimentos desfeitos",
+        'reversed_ids': result['reversed_ids'],
+        'skipped_ids': result['skipped_ids'],
+        'restored': {str(ingredient_id): quantity for ingredient_id, quantity in result['restored'].items()},
+        'shopping_items_removed': result['shopping_items_removed'],
+        'frozen_meals_removed': result['frozen_meals_removed']
+    }
+
+
 @history_bp.route('/history/stats', methods=['GET'])
 def get_stats():
-    """Obter estatísticas do histórico"""
+    """Obter estatísticas do histórico (lidas dos rollups, sem varrer cooking_history)"""
     try:
-        # Total de receitas feitas
-        total_cooked = CookingHistory.query.count()
-        
-        # Receitas mais feitas
-        from sqlalchemy import func
-        most_cooked = db.session.query(
-            Recipe.id,
-            Recipe.name,
-            func.count(CookingHistory.id).label('count')
-        ).join(
-            CookingHistory, Recipe.id == CookingHistory.recipe_id
-        ).group_by(
-            Recipe.id, Recipe.name
-        ).order_by(
-            func.count(CookingHistory.id).desc()
-        ).limit(10).all()
-        
-        most_cooked_list = [
-            {'recipe_id': r.id, 'recipe_name': r.name, 'times_cooked': r.count}
-            for r in most_cooked
-        ]
-        
-        # Última semana
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        cooked_this_week = CookingHistory.query.filter(
-            CookingHistory.cooked_at >= week_ago
-        ).count()
-        
-        # Último mês
-        month_ago = datetime.utcnow() - timedelta(days=30)
-        cooked_this_month = CookingHistory.query.filter(
-            CookingHistory.cooked_at >= month_ago
-        ).count()
+        today = datetime.utcnow().date()
         
+        # Janelas de 7 e 30 dias contando hoje (range_totals inclui as duas pontas)
         return jsonify({
-            'total_recipes_cooked': total_cooked,
-            'cooked_this_week': cooked_this_week,
-            'cooked_this_month': cooked_this_month,
-            'most_cooked_recipes': most_cooked_list
+            'total_recipes_cooked': total_cooks(),
+            'cooked_this_week': range_totals(today - timedelta(days=6), today)['cooks'],
+            'cooked_this_month': range_totals(today - timedelta(days=29), today)['cooks'],
+            'most_cooked_recipes': top_recipes(10),
+            'trending_recipes': trending_recipes(10)
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@history_bp.route('/history/stats/range', methods=['GET'])
+def get_range_stats():
+    """Cozimentos e porções num período (?start=YYYY-MM-DD&end=YYYY-MM-DD, inclusivo)"""
+    try:
+        try:
+            start = date.fromisoformat(request.args['start'])
+            end = date.fromisoformat(request.args['end'])
+        except (KeyError, ValueError):
+            return jsonify({'error': 'start e end são obrigatórios (YYYY-MM-DD)'}), 400
+        
+        if end < start:
+            return jsonify({'error': 'end deve ser igual ou posterior a start'}), 400
+        
+        result = range_totals(start, end)
+        result.update({'start': start.isoformat(), 'end': end.isoformat()})
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @history_bp.route('/history/recent', methods=['GET'])
 def get_recent_history():
     """Obter receitas feitas recentemente (últimos 7 dias)"""
     try:
         week_ago = datetime.utcnow() - timedelta(days=7)
-        history = CookingHistory.query.filter(
-            CookingHistory.cooked_at >= week_ago
-        ).order_by(CookingHistory.cooked_at.desc()).all()
+        query = _history_query().filter(CookingHistory.cooked_at >= week_ago)
         
-        return jsonify([h.to_dict() for h in history]), 200
+        return _paginated_response(query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -139,10 +275,29 @@ def get_recent_history():
 def get_recipe_history(recipe_id):
     """Obter histórico de uma receita específica"""
     try:
-        history = CookingHistory.query.filter_by(
-            recipe_id=recipe_id
-        ).order_by(CookingHistory.cooked_at.desc()).all()
+        query = _history_query().filter(CookingHistory.recipe_id == recipe_id)
+        
+        return _paginated_response(query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@history_bp.route('/history/archive', methods=['GET'])
+def get_archived_history():
+    """Obter histórico arquivado (mais antigo que a retenção)"""
+    try:
+        recipe_id = request.args.get('recipe_id', type=int)
+        limit = request.args.get('limit', 100, type=int)
+        
+        query = CookingHistoryArchive.query
+        if recipe_id:
+            query = query.filter_by(recipe_id=recipe_id)
         
+        history = query.order_by(
+            CookingHistoryArchive.cooked_at.desc(), CookingHistoryArchive.id.desc()
+        ).limit(limit).all()
         return jsonify([h.to_dict() for h in history]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,9 +1,17 @@
 from flask import Blueprint, request, jsonify
-from models import db, Ingredient, ShoppingList
-from datetime import datetime, date
+from models import db, Ingredient, IngredientPack, StockMovement, PriceRecord
+from services.expiry import expiring_ingredients
+from services.waste import discard_ingredient
+from services.reorder import apply_reorders
+from services.cache import cached, register_dependency
+from sqlalchemy import func, case, and_
+from datetime import datetime
 
 ingredients_bp = Blueprint('ingredients', __name__)
 
+FACETS_CACHE = 'ingredient_facets'
+register_dependency(FACETS_CACHE, Ingredient)
+
 @ingredients_bp.route('/ingredients', methods=['GET'])
 def get_ingredients():
     """Listar todos os ingredientes com filtros opcionais"""
@@ -100,23 +108,7 @@ def update_ingredient(id):
             ingredient.name = data['name']
         
         if 'quantity' in data:
-            old_quantity = ingredient.quantity
             ingredient.quantity = data['quantity']
-            
-            # Se quantidade zerou, adicionar à lista de compras
-            if old_quantity > 0 and ingredient.quantity <= 0:
-                # Verificar se já não está na lista
-                existing_shopping = ShoppingList.query.filter_by(
-                    ingredient_id=id,
-                    purchased=False
-                ).first()
-                
-                if not existing_shopping:
-                    shopping_item = ShoppingList(
-                        ingredient_id=id,
-                        quantity_needed=ingredient.minimum_quantity or 100  # Quantidade padrão
-                    )
-                    db.session.add(shopping_item)
         
         if 'unit' in data:
             ingredient.unit = data['unit']
@@ -139,6 +131,8 @@ def update_ingredient(id):
                 ingredient.expiry_date = None
         
         ingredient.updated_at = datetime.utcnow()
+        # Se a quantidade diminuiu até zero ou até o ponto de reposição, adicionar à lista de compras
+        apply_reorders()
         db.session.commit()
         
         return jsonify(ingredient.to_dict()), 200
@@ -181,34 +175,209 @@ def delete_ingredient(id):
         return jsonify({'error': str(e)}), 500
 
 
+@ingredients_bp.route('/ingredients/<int:id>/discard', methods=['POST'])
+def discard_ingredient_stock(id):
+    """Descartar estoque como desperdício
+    
+    Body opcional: {quantity (padrão: todo o estoque), reason (expired, spoiled, leftover, other), notes}
+    """
+    try:
+        ingredient = Ingredient.query.get_or_404(id)
+        data = request.get_json(silent=True) or {}
+        
+        record = discard_ingredient(
+            ingredient,
+            quantity=data.get('quantity'),
+            reason=data.get('reason', 'expired'),
+            notes=data.get('notes')
+        )
+        db.session.commit()
+        
+        return jsonify({
+            'waste': record.to_dict(),
+            'ingredient': ingredient.to_dict()
+        }), 201
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@ingredients_bp.route('/ingredients/<int:id>/movements', methods=['GET'])
+def get_ingredient_movements(id):
+    """Obter as movimentações de estoque de um ingrediente (mais recentes primeiro)"""
+    try:
+        Ingredient.query.get_or_404(id)
+        limit = request.args.get('limit', 50, type=int)
+        
+        movements = StockMovement.query.filter_by(
+            ingredient_id=id
+        ).order_by(StockMovement.created_at.desc(), StockMovement.id.desc()).limit(limit).all()
+        
+        return jsonify([m.to_dict() for m in movements]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 404
+
+
+@ingredients_bp.route('/ingredients/<int:id>/prices', methods=['GET'])
+def get_ingredient_prices(id):
+    """Obter o histórico de preços pagos por unidade (mais recentes primeiro)"""
+    try:
+        Ingredient.query.get_or_404(id)
+        limit = request.args.get('limit', 50, type=int)
+        
+        prices = PriceRecord.query.filter_by(
+            ingredient_id=id
+        ).order_by(PriceRecord.recorded_at.desc(), PriceRecord.id.desc()).limit(limit).all()
+        
+        return jsonify([p.to_dict() for p in prices]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 404
+
+
+@ingredients_bp.route('/ingredients/<int:id>/packs', methods=['GET'])
+def get_ingredient_packs(id):
+    """Listar embalagens vendidas de um ingrediente"""
+    try:
+        ingredient = Ingredient.query.get_or_404(id)
+        packs = sorted(ingredient.packs, key=lambda p: p.size)
+        return jsonify([pack.to_dict() for pack in packs]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 404
+
+
+def _is_number(value):
+    """Valor numérico informado no corpo (bool não conta)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@ingredients_bp.route('/ingredients/<int:id>/packs', methods=['POST'])
+def create_ingredient_pack(id):
+    """Cadastrar embalagem (tamanho na unidade do ingrediente e preço opcional)"""
+    try:
+        Ingredient.query.get_or_404(id)
+        data = request.get_json() or {}
+        
+        size = data.get('size')
+        price = data.get('price')
+        if not _is_number(size) or size <= 0:
+            return jsonify({'error': 'size deve ser um número maior que zero'}), 400
+        if price is not None and (not _is_number(price) or price < 0):
+            return jsonify({'error': 'price deve ser um número não negativo'}), 400
+        
+        pack = IngredientPack(
+            ingredient_id=id,
+            size=size,
+            price=price,
+            label=data.get('label')
+        )
+        db.session.add(pack)
+        db.session.commit()
+        
+        return jsonify(pack.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@ingredients_bp.route('/ingredients/packs/<int:pack_id>', methods=['DELETE'])
+def delete_ingredient_pack(pack_id):
+    """Remover embalagem"""
+    try:
+        pack = IngredientPack.query.get_or_404(pack_id)
+        db.session.delete(pack)
+        db.session.commit()
+        return jsonify({'message': 'Embalagem removida'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @ingredients_bp.route('/ingredients/expiring', methods=['GET'])
 def get_expiring_ingredients():
-    """Obter ingredientes próximos do vencimento (próximos 7 dias)"""
+    """Obter ingredientes próximos do vencimento (padrão: próximos 7 dias, ?days=N)"""
     try:
-        from datetime import timedelta
-        
-        today = date.today()
-        week_from_now = today + timedelta(days=7)
+        days = request.args.get('days', type=int)
+        if days is not None and days < 0:
+            return jsonify({'error': 'days deve ser maior ou igual a zero'}), 400
         
-        ingredients = Ingredient.query.filter(
-            Ingredient.expiry_date.isnot(None),
-            Ingredient.expiry_date <= week_from_now,
-            Ingredient.expiry_date >= today
-        ).all()
+        ingredients = expiring_ingredients(days)
         
         return jsonify([ing.to_dict() for ing in ingredients]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _compute_facets():
+    """Contagens por categoria, local, vegano, ilimitado e estoque baixo num único GROUP BY"""
+    low_stock = case(
+        (and_(Ingredient.minimum_quantity > 0, Ingredient.quantity <= Ingredient.minimum_quantity), 1),
+        else_=0
+    ).label('low_stock')
+    rows = db.session.query(
+        Ingredient.category,
+        Ingredient.location,
+        Ingredient.vegan,
+        Ingredient.unlimited,
+        low_stock,
+        func.count(Ingredient.id)
+    ).group_by(
+        Ingredient.category,
+        Ingredient.location,
+        Ingredient.vegan,
+        Ingredient.unlimited,
+        low_stock
+    ).all()
+    
+    categories = {}
+    locations = {}
+    totals = {'total': 0, 'vegan': 0, 'unlimited': 0, 'low_stock': 0}
+    
+    for category, location, vegan, unlimited, is_low, count in rows:
+        totals['total'] += count
+        if vegan:
+            totals['vegan'] += count
+        if unlimited:
+            totals['unlimited'] += count
+        if is_low:
+            totals['low_stock'] += count
+        
+        for facet, value in ((categories, category), (locations, location)):
+            if not value:
+                continue
+            entry = facet.setdefault(value, {'name': value, 'count': 0, 'low_stock': 0})
+            entry['count'] += count
+            if is_low:
+                entry['low_stock'] += count
+    
+    return {
+        'categories': sorted(categories.values(), key=lambda e: e['name']),
+        'locations': sorted(locations.values(), key=lambda e: e['name']),
+        **totals
+    }
+
+
+def get_facets():
+    """Facetas dos ingredientes (em cache até a próxima escrita em ingredients)"""
+    return cached(FACETS_CACHE, None, _compute_facets)
+
+
+@ingredients_bp.route('/ingredients/facets', methods=['GET'])
+def get_ingredient_facets():
+    """Obter categorias, locais e contagens (vegano, ilimitado, estoque baixo)"""
+    try:
+        return jsonify(get_facets()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @ingredients_bp.route('/ingredients/categories', methods=['GET'])
 def get_categories():
     """Obter lista de categorias únicas"""
     try:
-        categories = db.session.query(Ingredient.category).distinct().filter(
-            Ingredient.category.isnot(None)
-        ).all()
-        return jsonify([cat[0] for cat in categories if cat[0]]), 200
+        return jsonify([cat['name'] for cat in get_facets()['categories']]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -217,9 +386,6 @@ def get_categories():
 def get_locations():
     """Obter lista de locais únicos"""
     try:
-        locations = db.session.query(Ingredient.location).distinct().filter(
-            Ingredient.location.isnot(None)
-        ).all()
-        return jsonify([loc[0] for loc in locations if loc[0]]), 200
+        return jsonify([loc['name'] for loc in get_facets()['locations']]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
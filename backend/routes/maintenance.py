@@ -0,0 +1,29 @@
+from flask import Blueprint, request, jsonify
+from models import db
+from services.retention import run_retention
+
+maintenance_bp = Blueprint('maintenance', __name__)
+
+@maintenance_bp.route('/maintenance/retention', methods=['POST'])
+def apply_retention():
+    """Arquivar itens comprados e histórico antigo
+    
+    Body opcional: {"shopping_days": 30, "history_days": 730}
+    (padrões: SHOPPING_RETENTION_DAYS e HISTORY_RETENTION_DAYS)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        shopping_days = data.get('shopping_days')
+        history_days = data.get('history_days')
+        
+        for value in (shopping_days, history_days):
+            if value is not None and (not isinstance(value, int) or value < 0):
+                return jsonify({'error': 'Os dias devem ser inteiros não negativos'}), 400
+        
+        result = run_retention(shopping_days, history_days)
+        db.session.commit()
+        
+        return jsonify(result), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,198 @@
+from flask import Blueprint, request, jsonify
+from models import db, MealPlanEntry, Recipe
+from services.meal_plan import plan_requirements, generate_shopping_list
+from services.simulation import simulate_stock, MAX_HORIZON_DAYS
+from datetime import datetime, date, timedelta
+
+meal_plan_bp = Blueprint('meal_plan', __name__)
+
+
+def _parse_range():
+    """Período do plano via ?start=YYYY-MM-DD&end=YYYY-MM-DD (padrão: próximos 7 dias)"""
+    start = request.args.get('start')
+    end = request.args.get('end')
+    start = datetime.fromisoformat(start).date() if start else date.today()
+    end = datetime.fromisoformat(end).date() if end else start + timedelta(days=6)
+    return start, end
+
+
+def _valid_servings(value):
+    """Porções informadas no corpo: inteiro (não bool) maior que zero"""
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+@meal_plan_bp.route('/meal-plan', methods=['GET'])
+def get_meal_plan():
+    """Listar entradas do plano de refeições no período"""
+    try:
+        start, end = _parse_range()
+        entries = MealPlanEntry.query.filter(
+            MealPlanEntry.planned_date >= start,
+            MealPlanEntry.planned_date <= end
+        ).order_by(MealPlanEntry.planned_date, MealPlanEntry.id).all()
+        return jsonify([entry.to_dict() for entry in entries]), 200
+    except ValueError:
+        return jsonify({'error': 'Datas devem estar no formato YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@meal_plan_bp.route('/meal-plan', methods=['POST'])
+def create_meal_plan_entries():
+    """Adicionar uma ou várias entradas ao plano
+    
+    Body: {"recipe_id": 1, "planned_date": "2024-01-10", "servings": 2}
+    ou {"entries": [{...}, {...}]}
+    """
+    try:
+        data = request.get_json() or {}
+        entries_data = data.get('entries', [data]) if isinstance(data, dict) else None
+        if not isinstance(entries_data, list) or not all(isinstance(e, dict) for e in entries_data):
+            return jsonify({'error': 'entries deve ser uma lista de objetos'}), 400
+        
+        # Tipos antes de qualquer consulta
+        for entry_data in entries_data:
+            recipe_id = entry_data.get('recipe_id')
+            planned_date = entry_data.get('planned_date')
+            if not isinstance(recipe_id, int) or isinstance(recipe_id, bool) or not planned_date:
+                return jsonify({'error': 'recipe_id e planned_date são obrigatórios'}), 400
+            if not isinstance(planned_date, str):
+                return jsonify({'error': 'planned_date deve estar no formato YYYY-MM-DD'}), 400
+            if not _valid_servings(entry_data.get('servings', 1)):
+                return jsonify({'error': 'servings deve ser um número inteiro maior que zero'}), 400
+        
+        recipe_ids = {e['recipe_id'] for e in entries_data}
+        existing_ids = {r.id for r in Recipe.query.filter(Recipe.id.in_(recipe_ids))}
+        
+        entries = []
+        for entry_data in entries_data:
+            if entry_data['recipe_id'] not in existing_ids:
+                db.session.rollback()
+                return jsonify({'error': f"Receita {entry_data['recipe_id']} não encontrada"}), 404
+            
+            entry = MealPlanEntry(
+                recipe_id=entry_data['recipe_id'],
+                planned_date=datetime.fromisoformat(entry_data['planned_date']).date(),
+                servings=entry_data.get('servings', 1),
+                notes=entry_data.get('notes')
+            )
+            db.session.add(entry)
+            entries.append(entry)
+        
+        db.session.commit()
+        
+        return jsonify([entry.to_dict() for entry in entries]), 201
+    except ValueError:
+        db.session.rollback()
+        return jsonify({'error': 'planned_date deve estar no formato YYYY-MM-DD'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@meal_plan_bp.route('/meal-plan/<int:id>', methods=['PUT'])
+def update_meal_plan_entry(id):
+    """Atualizar entrada do plano"""
+    try:
+        entry = MealPlanEntry.query.get_or_404(id)
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Corpo deve ser um objeto JSON'}), 400
+        if 'servings' in data and not _valid_servings(data['servings']):
+            return jsonify({'error': 'servings deve ser um número inteiro maior que zero'}), 400
+        if 'planned_date' in data and not isinstance(data['planned_date'], str):
+            return jsonify({'error': 'planned_date deve estar no formato YYYY-MM-DD'}), 400
+        
+        if 'planned_date' in data:
+            entry.planned_date = datetime.fromisoformat(data['planned_date']).date()
+        if 'servings' in data:
+            entry.servings = data['servings']
+        if 'notes' in data:
+            entry.notes = data['notes']
+        
+        db.session.commit()
+        return jsonify(entry.to_dict()), 200
+    except ValueError:
+        db.session.rollback()
+        return jsonify({'error': 'planned_date deve estar no formato YYYY-MM-DD'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@meal_plan_bp.route('/meal-plan/<int:id>', methods=['DELETE'])
+def delete_meal_plan_entry(id):
+    """Remover entrada do plano"""
+    try:
+        entry = MealPlanEntry.query.get_or_404(id)
+        db.session.delete(entry)
+        db.session.commit()
+        return jsonify({'message': 'Entrada removida do plano'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@meal_plan_bp.route('/meal-plan/requirements', methods=['GET'])
+def get_meal_plan_requirements():
+    """Quanto de cada ingrediente o plano precisa, quanto há em estoque/na lista e quanto falta"""
+    try:
+        start, end = _parse_range()
+        return jsonify({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'ingredients': plan_requirements(start, end)
+        }), 200
+    except ValueError:
+        return jsonify({'error': 'Datas devem estar no formato YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@meal_plan_bp.route('/meal-plan/shopping-list', methods=['POST'])
+def generate_meal_plan_shopping_list():
+    """Gerar a lista de compras do plano: adiciona apenas o que falta"""
+    try:
+        start, end = _parse_range()
+        updated = generate_shopping_list(start, end)
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{len(updated)} ingredientes adicionados/atualizados na lista de compras',
+            'items': [
+                {'ingredient_id': ingredient_id, 'quantity_needed': quantity}
+                for ingredient_id, quantity in updated
+            ]
+        }), 200
+    except ValueError:
+        return jsonify({'error': 'Datas devem estar no formato YYYY-MM-DD'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@meal_plan_bp.route('/meal-plan/simulation', methods=['GET'])
+def simulate_meal_plan():
+    """Projetar o estoque dia a dia seguindo o plano: faltas e itens que vencem antes do uso"""
+    try:
+        start = request.args.get('start')
+        start = datetime.fromisoformat(start).date() if start else date.today()
+        days = request.args.get('days', 30, type=int)
+        include_purchases = request.args.get('include_purchases', 'true').lower() == 'true'
+        
+        if days <= 0 or days > MAX_HORIZON_DAYS:
+            return jsonify({'error': f'days deve estar entre 1 e {MAX_HORIZON_DAYS}'}), 400
+        
+        ingredients = simulate_stock(start, days, include_purchases)
+        
+        return jsonify({
+            'start': start.isoformat(),
+            'days': days,
+            'shortfalls': [i['ingredient_id'] for i in ingredients if i['runs_out_on']],
+            'expiring_before_use': [i['ingredient_id'] for i in ingredients if i['expires_before_use']],
+            'ingredients': ingredients
+        }), 200
+    except ValueError:
+        return jsonify({'error': 'start deve estar no formato YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
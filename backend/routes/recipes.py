@@ -1,14 +1,37 @@
 from flask import Blueprint, request, jsonify
-from models import db, Recipe, RecipeIngredient, Ingredient, CookingHistory, ShoppingList
-from datetime import datetime
+from models import db, Recipe, RecipeIngredient, Ingredient, CookingHistory, FrozenMeal
+from services.costs import recipe_costs
+from services.cooking import cook, detach_history, InsufficientIngredients
+from sqlalchemy import select
+from datetime import date, datetime
 
 recipes_bp = Blueprint('recipes', __name__)
 
+RECIPE_SORTS = {
+    'popular': (Recipe.times_cooked.desc(), Recipe.name),
+    'recent': (Recipe.last_cooked_at.desc(), Recipe.name),
+    'trending': (Recipe.popularity.desc(), Recipe.name),
+    'name': (Recipe.name,),
+}
+
+
 @recipes_bp.route('/recipes', methods=['GET'])
 def get_recipes():
-    """Listar todas as receitas"""
+    """Listar todas as receitas (?sort=popular|trending|recent|name, opcional)
+    
+    popular ordena pelo total de vezes feitas; trending pela popularidade com
+    decaimento (cozimentos recentes pesam mais).
+    """
     try:
-        recipes = Recipe.query.all()
+        sort = request.args.get('sort')
+        query = Recipe.query
+        
+        if sort:
+            if sort not in RECIPE_SORTS:
+                return jsonify({'error': f'sort deve ser um de: {", ".join(RECIPE_SORTS)}'}), 400
+            query = query.order_by(*RECIPE_SORTS[sort])
+        
+        recipes = query.all()
         return jsonify([recipe.to_dict(include_ingredients=True) for recipe in recipes]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -139,6 +162,8 @@ def delete_recipe(id):
     """Deletar receita"""
     try:
         recipe = Recipe.query.get_or_404(id)
+        # O histórico da receita é apagado em cascata
+        detach_history(select(CookingHistory.id).where(CookingHistory.recipe_id == recipe.id))
         db.session.delete(recipe)
         db.session.commit()
         return jsonify({'message': 'Receita deletada com sucesso'}), 200
@@ -197,6 +222,34 @@ def can_make_recipe(id):
         return jsonify({'error': str(e)}), 500
 
 
+@recipes_bp.route('/recipes/costs', methods=['GET'])
+def get_recipe_costs():
+    """Custo por porção de todas as receitas (?method=latest|average)"""
+    try:
+        method = request.args.get('method', 'latest')
+        costs = recipe_costs(method)
+        return jsonify(sorted(costs.values(), key=lambda c: c['recipe_id'])), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@recipes_bp.route('/recipes/<int:id>/cost', methods=['GET'])
+def get_recipe_cost(id):
+    """Custo total e por porção de uma receita (?method=latest|average)"""
+    try:
+        method = request.args.get('method', 'latest')
+        cost = recipe_costs(method).get(id)
+        if cost is None:
+            return jsonify({'error': 'Receita não encontrada'}), 404
+        return jsonify(cost), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @recipes_bp.route('/recipes/<int:id>/cook', methods=['POST'])
 def cook_recipe(id):
     """Fazer receita: deduzir ingredientes do estoque e criar histórico"""
@@ -205,75 +258,83 @@ def cook_recipe(id):
         data = request.get_json()
         servings = data.get('servings', recipe.servings)
         
-        # Verificar se pode fazer
-        can_make = True
-        missing_ingredients = []
+        history, ingredients_to_shopping = cook(recipe, servings, data.get('notes'))
+        db.session.commit()
         
-        for recipe_ing in recipe.recipe_ingredients:
-            ingredient = recipe_ing.ingredient
-            quantity_needed = (recipe_ing.quantity_needed / recipe.servings) * servings
-            
-            if ingredient.quantity < quantity_needed:
-                can_make = False
-                missing_ingredients.append({
-                    'ingredient_name': ingredient.name,
-                    'quantity_needed': quantity_needed,
-                    'quantity_available': ingredient.quantity,
-                    'missing': quantity_needed - ingredient.quantity,
-                    'unit': recipe_ing.unit
-                })
+        return jsonify({
+            'message': 'Receita feita com sucesso!',
+            'recipe_name': recipe.name,
+            'servings_made': servings,
+            'ingredients_added_to_shopping': ingredients_to_shopping,
+            'history_id': history.id
+        }), 200
+    except InsufficientIngredients as e:
+        db.session.rollback()
+        return jsonify({
+            'error': str(e),
+            'missing_ingredients': e.missing_ingredients
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@recipes_bp.route('/recipes/<int:id>/cook-and-freeze', methods=['POST'])
+def cook_and_freeze_recipe(id):
+    """Fazer receita e congelar parte das porções num único commit
+    
+    Body: {servings, freeze_portions, measure, expiry_date (YYYY-MM-DD), notes}.
+    A refeição congelada fica ligada ao registro do histórico.
+    """
+    try:
+        recipe = Recipe.query.get_or_404(id)
+        data = request.get_json() or {}
+        servings = data.get('servings', recipe.servings)
+        freeze_portions = data.get('freeze_portions')
         
-        if not can_make:
-            return jsonify({
-                'error': 'Ingredientes insuficientes',
-                'missing_ingredients': missing_ingredients
-            }), 400
+        for field, value in (('servings', servings), ('freeze_portions', freeze_portions)):
+            if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+                return jsonify({'error': f'{field} deve ser um número inteiro maior que zero'}), 400
+        if freeze_portions > servings:
+            return jsonify({'error': 'freeze_portions não pode ser maior que servings'}), 400
         
-        # Deduzir ingredientes do estoque
-        ingredients_to_shopping = []
+        expiry_date = None
+        if data.get('expiry_date'):
+            try:
+                expiry_date = date.fromisoformat(data['expiry_date'])
+            except ValueError:
+                return jsonify({'error': 'expiry_date deve estar no formato YYYY-MM-DD'}), 400
         
-        for recipe_ing in recipe.recipe_ingredients:
-            ingredient = recipe_ing.ingredient
-            quantity_needed = (recipe_ing.quantity_needed / recipe.servings) * servings
-            
-            # Deduzir quantidade
-            ingredient.quantity -= quantity_needed
-            
-            # Se chegou a zero ou abaixo do mínimo, adicionar à lista de compras
-            if ingredient.quantity <= 0 or ingredient.quantity <= ingredient.minimum_quantity:
-                # Verificar se já não está na lista de compras
-                existing = ShoppingList.query.filter_by(
-                    ingredient_id=ingredient.id,
-                    purchased=False
-                ).first()
-                
-                if not existing:
-                    shopping_item = ShoppingList(
-                        ingredient_id=ingredient.id,
-                        quantity_needed=ingredient.minimum_quantity if ingredient.minimum_quantity > 0 else 100
-                    )
-                    db.session.add(shopping_item)
-                    ingredients_to_shopping.append(ingredient.name)
-            
-            ingredient.updated_at = datetime.utcnow()
+        history, ingredients_to_shopping = cook(recipe, servings, data.get('notes'))
         
-        # Criar registro no histórico
-        history = CookingHistory(
+        measure = data.get('measure')
+        frozen_meal = FrozenMeal(
             recipe_id=recipe.id,
-            servings_made=servings,
-            notes=data.get('notes')
+            portions=freeze_portions,
+            measure=measure.strip() if isinstance(measure, str) and measure.strip() else None,
+            notes=data.get('notes'),
+            status='frozen',
+            frozen_at=history.cooked_at,
+            expiry_date=expiry_date,
+            source_history_id=history.id
         )
-        db.session.add(history)
-        
+        db.session.add(frozen_meal)
         db.session.commit()
         
         return jsonify({
-            'message': 'Receita feita com sucesso!',
+            'message': f'Receita feita e {freeze_portions} porção(ões) congelada(s)!',
             'recipe_name': recipe.name,
             'servings_made': servings,
             'ingredients_added_to_shopping': ingredients_to_shopping,
-            'history_id': history.id
-        }), 200
+            'history_id': history.id,
+            'frozen_meal': frozen_meal.to_dict()
+        }), 201
+    except InsufficientIngredients as e:
+        db.session.rollback()
+        return jsonify({
+            'error': str(e),
+            'missing_ingredients': e.missing_ingredients
+        }), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
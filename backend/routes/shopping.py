@@ -1,15 +1,42 @@
-from flask import Blueprint, request, jsonify
-from models import db, ShoppingList, Ingredient
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from models import db, ShoppingList, ShoppingListArchive, Ingredient
+from services.reorder import insert_low_stock_items, order_quantity, reorder_plan
+from services.purchases import purchase_items
+from services.packs import attach_pack_plans
+from services.retention import archive_purchased_items
+from services.shopping_stats import shopping_stats
+from services.store_layout import get_layout, aisle_ordered, group_by_aisle
+from services.cache import cached, register_dependency
+from services.export import stream_batches, csv_stream, compact_json_stream, text_stream
+from sqlalchemy import func, cast, select, String
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+import hashlib
 
 shopping_bp = Blueprint('shopping', __name__)
 
+EXPORT_ETAG_CACHE = 'shopping_export_etag'
+register_dependency(EXPORT_ETAG_CACHE, ShoppingList, Ingredient)
+
+EXPORT_FORMATS = {
+    'text': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json'
+}
+EXPORT_COLUMNS = ['id', 'name', 'quantity', 'unit', 'purchased']
+
 @shopping_bp.route('/shopping-list', methods=['GET'])
 def get_shopping_list():
-    """Listar todos os itens da lista de compras"""
+    """Listar todos os itens da lista de compras
+    
+    Com um layout de loja (?layout_id=N ou o layout padrão), os itens vêm na
+    ordem do percurso dos corredores; ?grouped=true agrupa por corredor.
+    """
     try:
         # Filtro opcional por status
         purchased = request.args.get('purchased')
+        layout_id = request.args.get('layout_id', type=int)
+        grouped = request.args.get('grouped', 'false').lower() == 'true'
         
         query = ShoppingList.query
         
@@ -17,8 +44,29 @@ def get_shopping_list():
             purchased_bool = purchased.lower() in ['true', '1', 'yes']
             query = query.filter_by(purchased=purchased_bool)
         
-        items = query.order_by(ShoppingList.added_at.desc()).all()
-        return jsonify([item.to_dict() for item in items]), 200
+        layout = get_layout(layout_id)
+        if layout_id is not None and layout is None:
+            return jsonify({'error': 'Layout não encontrado'}), 404
+        
+        if layout is None:
+            items = query.order_by(ShoppingList.added_at.desc()).all()
+            # Quantidade arredondada para embalagens inteiras (quando cadastradas)
+            return jsonify(attach_pack_plans([item.to_dict() for item in items])), 200
+        
+        items = []
+        for item, aisle, position in aisle_ordered(query, layout.id).all():
+            data = item.to_dict()
+            data['aisle'] = aisle
+            data['aisle_position'] = position
+            items.append(data)
+        items = attach_pack_plans(items)
+        
+        if grouped:
+            return jsonify({
+                'layout': {'id': layout.id, 'name': layout.name},
+                'aisles': group_by_aisle(items)
+            }), 200
+        return jsonify(items), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -28,7 +76,7 @@ def get_shopping_item(id):
     """Obter detalhes de um item da lista"""
     try:
         item = ShoppingList.query.get_or_404(id)
-        return jsonify(item.to_dict()), 200
+        return jsonify(attach_pack_plans([item.to_dict()])[0]), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 404
 
@@ -56,48 +104,130 @@ def add_to_shopping_list():
         if existing:
             return jsonify({'error': 'Ingrediente já está na lista de compras'}), 400
         
-        # Criar item
+        # Criar item (sem quantidade informada, usa a quantidade sugerida de reposição)
+        quantity_needed = data.get('quantity_needed')
+        if quantity_needed is None:
+            quantity_needed = order_quantity(ingredient)
         item = ShoppingList(
             ingredient_id=data['ingredient_id'],
-            quantity_needed=data.get('quantity_needed', ingredient.minimum_quantity or 100)
+            quantity_needed=quantity_needed
         )
         
         db.session.add(item)
         db.session.commit()
         
         return jsonify(item.to_dict()), 201
+    except IntegrityError:
+        # Outro pedido adicionou o mesmo ingrediente ao mesmo tempo (índice único parcial)
+        db.session.rollback()
+        return jsonify({'error': 'Ingrediente já está na lista de compras'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
+def _positive_number(value):
+    """Quantidade ou preço informado na compra: número (não bool) maior que zero"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+
+def _valid_id(value):
+    """Id de item informado no corpo: inteiro (não bool) maior que zero"""
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
 @shopping_bp.route('/shopping-list/<int:id>/purchase', methods=['POST'])
 def mark_as_purchased(id):
-    """Marcar item como comprado e opcionalmente adicionar ao estoque"""
+    """Marcar item como comprado e opcionalmente adicionar ao estoque
+    
+    Body: {"add_to_stock": true, "quantity_purchased": 2, "price_per_unit": 4.5}
+    
+    Item já comprado: apenas purchased_at é atualizado; o estoque não é
+    reposto de novo e nenhum preço é gravado (already_purchased=true).
+    """
     try:
         item = ShoppingList.query.get_or_404(id)
-        data = request.get_json() or {}
-        
-        # Marcar como comprado
-        item.purchased = True
-        item.purchased_at = datetime.utcnow()
+        data = request.get_json(silent=True) or {}
         
         # Se solicitado, adicionar quantidade ao estoque
         add_to_stock = data.get('add_to_stock', False)
-        quantity_purchased = data.get('quantity_purchased', item.quantity_needed)
+        quantity_purchased = data.get('quantity_purchased')
+        price_per_unit = data.get('price_per_unit')
+        
+        # Só valida a quantidade informada; sem ela, vale a quantidade do item (pode ser 0)
+        if quantity_purchased is not None and not _positive_number(quantity_purchased):
+            return jsonify({'error': 'quantity_purchased deve ser um número maior que zero'}), 400
+        if quantity_purchased is None:
+            quantity_purchased = item.quantity_needed
+        if price_per_unit is not None and not _positive_number(price_per_unit):
+            return jsonify({'error': 'price_per_unit deve ser um número maior que zero'}), 400
         
-        if add_to_stock:
-            ingredient = item.ingredient
-            ingredient.quantity += quantity_purchased
-            ingredient.updated_at = datetime.utcnow()
+        already_purchased = item.purchased
+        added = {}
+        if not already_purchased:
+            added = purchase_items({id: quantity_purchased}, add_to_stock, prices={id: price_per_unit})
+        else:
+            # Item já comprado: apenas atualizar a data (sem repor o estoque de novo)
+            item.purchased_at = datetime.utcnow()
         
         db.session.commit()
         
         return jsonify({
             'message': 'Item marcado como comprado',
             'item': item.to_dict(),
+            'already_purchased': already_purchased,
+            'added_to_stock': add_to_stock,
+            'quantity_added': added.get(id, 0)
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@shopping_bp.route('/shopping-list/purchase', methods=['POST'])
+def bulk_purchase():
+    """Marcar vários itens como comprados de uma vez (checkout) e opcionalmente repor o estoque
+    
+    Body: {"items": [{"id": 1, "quantity_purchased": 2.5, "price_per_unit": 4.5}, {"id": 2}] ou [1, 2],
+           "add_to_stock": true}
+    """
+    try:
+        data = request.get_json() or {}
+        items = data.get('items')
+        
+        if not items or not isinstance(items, list):
+            return jsonify({'error': 'items é obrigatório'}), 400
+        
+        quantities = {}
+        prices = {}
+        for entry in items:
+            if isinstance(entry, dict):
+                if not _valid_id(entry.get('id')):
+                    return jsonify({'error': 'Cada item precisa de um id inteiro'}), 400
+                price_per_unit = entry.get('price_per_unit')
+                if price_per_unit is not None and not _positive_number(price_per_unit):
+                    return jsonify({'error': f"price_per_unit do item {entry['id']} deve ser um número maior que zero"}), 400
+                quantity_purchased = entry.get('quantity_purchased')
+                if quantity_purchased is not None and not _positive_number(quantity_purchased):
+                    return jsonify({'error': f"quantity_purchased do item {entry['id']} deve ser um número maior que zero"}), 400
+                quantities[entry['id']] = quantity_purchased
+                prices[entry['id']] = price_per_unit
+            elif _valid_id(entry):
+                quantities[entry] = None
+            else:
+                return jsonify({'error': 'Cada item precisa de um id inteiro'}), 400
+        
+        add_to_stock = data.get('add_to_stock', False)
+        added = purchase_items(quantities, add_to_stock, prices=prices)
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{len(added)} itens marcados como comprados',
+            'purchased_ids': list(added),
+            'skipped_ids': [item_id for item_id in quantities if item_id not in added],
             'added_to_stock': add_to_stock,
-            'quantity_added': quantity_purchased if add_to_stock else 0
+            'quantities_added': {str(item_id): quantity for item_id, quantity in added.items()}
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -121,28 +251,11 @@ def delete_shopping_item(id):
 def check_low_stock():
     """Verificar e adicionar ingredientes com estoque baixo à lista de compras"""
     try:
-        # Buscar ingredientes com quantidade abaixo do mínimo
-        low_stock_ingredients = Ingredient.query.filter(
-            Ingredient.quantity <= Ingredient.minimum_quantity,
-            Ingredient.minimum_quantity > 0
-        ).all()
-        
-        added_items = []
-        
-        for ingredient in low_stock_ingredients:
-            # Verificar se já não está na lista (não comprado)
-            existing = ShoppingList.query.filter_by(
-                ingredient_id=ingredient.id,
-                purchased=False
-            ).first()
-            
-            if not existing:
-                item = ShoppingList(
-                    ingredient_id=ingredient.id,
-                    quantity_needed=ingredient.minimum_quantity
-                )
-                db.session.add(item)
-                added_items.append(ingredient.name)
+        # Um único INSERT ... SELECT para todos os ingredientes no ponto de reposição
+        added_ids = insert_low_stock_items()
+        added_items = [
+            name for (name,) in db.session.query(Ingredient.name).filter(Ingredient.id.in_(added_ids))
+        ] if added_ids else []
         
         db.session.commit()
         
@@ -155,33 +268,143 @@ def check_low_stock():
         return jsonify({'error': str(e)}), 500
 
 
+@shopping_bp.route('/shopping-list/reorder-points', methods=['GET'])
+def get_reorder_points():
+    """Obter ponto de reposição e quantidade sugerida de cada ingrediente"""
+    try:
+        only_needed = request.args.get('needs_reorder', 'false').lower() == 'true'
+        
+        ingredients = Ingredient.query.order_by(Ingredient.name).all()
+        plan = reorder_plan(ingredients)
+        
+        if only_needed:
+            plan = [p for p in plan if p['needs_reorder']]
+        
+        return jsonify(plan), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @shopping_bp.route('/shopping-list/clear-purchased', methods=['DELETE'])
 def clear_purchased_items():
-    """Remover todos os itens comprados da lista"""
+    """Remover todos os itens comprados da lista (movidos para o arquivo)"""
     try:
-        deleted_count = ShoppingList.query.filter_by(purchased=True).delete()
+        archived_count = archive_purchased_items(older_than_days=0)
         db.session.commit()
         
         return jsonify({
-            'message': f'{deleted_count} itens comprados removidos da lista'
+            'message': f'{archived_count} itens comprados removidos da lista'
         }), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
+@shopping_bp.route('/shopping-list/archive', methods=['GET'])
+def get_archived_items():
+    """Listar itens comprados já arquivados (mais recentes primeiro)"""
+    try:
+        ingredient_id = request.args.get('ingredient_id', type=int)
+        limit = request.args.get('limit', 100, type=int)
+        
+        query = ShoppingListArchive.query
+        if ingredient_id:
+            query = query.filter_by(ingredient_id=ingredient_id)
+        
+        items = query.order_by(
+            ShoppingListArchive.purchased_at.desc(), ShoppingListArchive.id.desc()
+        ).limit(limit).all()
+        return jsonify([item.to_dict() for item in items]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @shopping_bp.route('/shopping-list/stats', methods=['GET'])
 def get_shopping_stats():
     """Obter estatísticas da lista de compras"""
     try:
-        total = ShoppingList.query.count()
-        pending = ShoppingList.query.filter_by(purchased=False).count()
-        purchased = ShoppingList.query.filter_by(purchased=True).count()
+        return jsonify(shopping_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _export_fingerprint(include_purchased):
+    """Resumo do conteúdo exportado, em cache até a próxima escrita.
+
+    Um digest por linha com tudo o que vai no arquivo (id, ingrediente, nome,
+    quantidade, unidade, comprado), lido em ordem de id e combinado num único
+    sha1: trocar quantidades entre itens ou o ingrediente de um item muda o ETag.
+    """
+    def compute():
+        row_digest = (
+            cast(ShoppingList.id, String) + ':' + cast(ShoppingList.ingredient_id, String) + ':'
+            + Ingredient.name + ':' + cast(ShoppingList.quantity_needed, String) + ':'
+            + func.coalesce(Ingredient.unit, '') + ':' + cast(ShoppingList.purchased, String)
+        )
+        rows = select(row_digest).select_from(ShoppingList).join(
+            Ingredient, Ingredient.id == ShoppingList.ingredient_id
+        ).order_by(ShoppingList.id)
+        if not include_purchased:
+            rows = rows.where(ShoppingList.purchased.is_(False))
+        # group_concat não garante ordem no SQLite: a concatenação é feita aqui
+        digest = hashlib.sha1()
+        for row in db.session.execute(rows).scalars():
+            digest.update(row.encode('utf-8'))
+            digest.update(b'|')
+        return digest.hexdigest()[:16]
+    return cached(EXPORT_ETAG_CACHE, include_purchased, compute)
+
+
+def _format_text_row(row):
+    _, name, quantity, unit, purchased = row
+    return f"[{'x' if purchased else ' '}] {name} - {quantity:g} {unit}"
+
+
+@shopping_bp.route('/shopping-list/export', methods=['GET'])
+def export_shopping_list():
+    """Exportar a lista de compras em streaming (?format=text|csv|json)
+    
+    Por padrão só os itens pendentes; ?include_purchased=true inclui os comprados.
+    Responde 304 quando o If-None-Match já corresponde ao conteúdo atual.
+    """
+    try:
+        export_format = request.args.get('format', 'text')
+        include_purchased = request.args.get('include_purchased', 'false').lower() == 'true'
         
-        return jsonify({
-            'total': total,
-            'pending': pending,
-            'purchased': purchased
-        }), 200
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'format deve ser um de: {", ".join(EXPORT_FORMATS)}'}), 400
+        
+        etag = f'{_export_fingerprint(include_purchased)}-{export_format}'
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        
+        statement = select(
+            ShoppingList.id,
+            Ingredient.name,
+            ShoppingList.quantity_needed,
+            Ingredient.unit,
+            ShoppingList.purchased
+        ).join(
+            Ingredient, Ingredient.id == ShoppingList.ingredient_id
+        ).order_by(ShoppingList.purchased, Ingredient.name)
+        if not include_purchased:
+            statement = statement.where(ShoppingList.purchased.is_(False))
+        
+        batches = stream_batches(statement)
+        if export_format == 'csv':
+            body = csv_stream(EXPORT_COLUMNS, batches)
+        elif export_format == 'json':
+            body = compact_json_stream(EXPORT_COLUMNS, batches, version=etag)
+        else:
+            body = text_stream(_format_text_row, batches)
+        
+        response = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[export_format])
+        response.set_etag(etag)
+        if export_format != 'json':
+            extension = 'csv' if export_format == 'csv' else 'txt'
+            response.headers['Content-Disposition'] = f'attachment; filename=lista-de-compras.{extension}'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,96 @@
+from flask import Blueprint, request, jsonify
+from models import db, StoreLayout
+from services.store_layout import replace_aisles, set_default
+from sqlalchemy.exc import IntegrityError
+
+store_layouts_bp = Blueprint('store_layouts', __name__)
+
+@store_layouts_bp.route('/store-layouts', methods=['GET'])
+def get_store_layouts():
+    """Listar layouts de loja"""
+    try:
+        layouts = StoreLayout.query.order_by(StoreLayout.name).all()
+        return jsonify([layout.to_dict() for layout in layouts]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@store_layouts_bp.route('/store-layouts/<int:id>', methods=['GET'])
+def get_store_layout(id):
+    """Obter um layout com seus corredores"""
+    try:
+        layout = StoreLayout.query.get_or_404(id)
+        return jsonify(layout.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 404
+
+
+@store_layouts_bp.route('/store-layouts', methods=['POST'])
+def create_store_layout():
+    """Criar layout de loja
+    
+    Body: {"name": "Mercado", "is_default": true, "aisles": [
+        {"name": "Hortifruti", "position": 1, "categories": ["Vegetais", "Frutas"], "ingredient_ids": [3]}
+    ]}
+    """
+    try:
+        data = request.get_json() or {}
+        
+        if not data.get('name'):
+            return jsonify({'error': 'Nome é obrigatório'}), 400
+        
+        layout = StoreLayout(name=data['name'])
+        db.session.add(layout)
+        replace_aisles(layout, data.get('aisles', []))
+        
+        if data.get('is_default') or StoreLayout.query.count() == 1:
+            set_default(layout)
+        
+        db.session.commit()
+        return jsonify(layout.to_dict()), 201
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Layout já existe'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@store_layouts_bp.route('/store-layouts/<int:id>', methods=['PUT'])
+def update_store_layout(id):
+    """Atualizar nome, padrão ou corredores de um layout"""
+    try:
+        layout = StoreLayout.query.get_or_404(id)
+        data = request.get_json() or {}
+        
+        if 'name' in data:
+            layout.name = data['name']
+        if 'aisles' in data:
+            replace_aisles(layout, data['aisles'])
+        if data.get('is_default'):
+            set_default(layout)
+        
+        db.session.commit()
+        return jsonify(layout.to_dict()), 200
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@store_layouts_bp.route('/store-layouts/<int:id>', methods=['DELETE'])
+def delete_store_layout(id):
+    """Deletar layout"""
+    try:
+        layout = StoreLayout.query.get_or_404(id)
+        db.session.delete(layout)
+        db.session.commit()
+        return jsonify({'message': 'Layout deletado com sucesso'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,199 @@
+"""
+Cache em memória por aplicação, invalidado automaticamente quando o banco muda.
+
+Cada resultado fica num "namespace" que declara de quais modelos depende
+(ex.: 'facets' depende de Ingredient). Quando uma transação que alterou
+algum desses modelos é commitada, os namespaces dependentes são descartados.
+
+Namespaces incrementais (register_append_handler) não são descartados quando a
+transação apenas inseriu linhas novas: os inserts viram eventos pendentes que
+são aplicados ao valor em cache na próxima leitura (cached_incremental).
+"""
+
+from collections import defaultdict
+from threading import RLock
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+
+# Modelo (classe) -> namespaces que dependem dele
+_dependencies = defaultdict(set)
+
+# Modelo (classe) -> [(namespace, extract)] para atualização incremental
+_append_handlers = defaultdict(list)
+
+
+class QueryCache:
+    """Armazena resultados por (namespace, chave)"""
+
+    def __init__(self):
+        self._entries = {}
+        self._pending = defaultdict(list)
+        self._lock = RLock()
+
+    def get(self, namespace, key=None, default=None):
+        with self._lock:
+            return self._entries.get((namespace, key), default)
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            self._entries[(namespace, key)] = value
+        return value
+
+    def append(self, namespace, events):
+        """Enfileirar eventos para todos os valores em cache do namespace"""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == namespace]:
+                self._pending[entry_key].extend(events)
+
+    def take_pending(self, namespace, key=None):
+        with self._lock:
+            return self._pending.pop((namespace, key), [])
+
+    def invalidate(self, *namespaces):
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] in namespaces]:
+                del self._entries[entry_key]
+                self._pending.pop(entry_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+
+def register_dependency(namespace, *models):
+    """Declarar que o namespace deve ser invalidado quando os modelos mudarem"""
+    for model in models:
+        _dependencies[model].add(namespace)
+
+
+def register_append_handler(namespace, model, extract):
+    """Inserts de `model` atualizam o namespace incrementalmente em vez de invalidá-lo.
+
+    extract(obj) é chamado no flush e deve retornar um valor simples (o objeto
+    não pode ser lido depois do commit sem nova consulta).
+    """
+    _append_handlers[model].append((namespace, extract))
+
+
+def get_cache():
+    """Cache da aplicação atual (um por app, criado sob demanda)"""
+    return current_app.extensions.setdefault('kitchen_cache', QueryCache())
+
+
+def cached(namespace, key, compute):
+    """Retornar o valor em cache ou calcular com compute() e guardar"""
+    cache = get_cache()
+    value = cache.get(namespace, key, _MISSING)
+    if value is _MISSING:
+        value = cache.set(namespace, key, compute())
+    return value
+
+
+def cached_incremental(namespace, key, compute, apply):
+    """Como cached(), mas aplica apply(valor, eventos) aos eventos pendentes"""
+    cache = get_cache()
+    value = cache.get(namespace, key, _MISSING)
+    if value is _MISSING:
+        cache.take_pending(namespace, key)
+        return cache.set(namespace, key, compute())
+    events = cache.take_pending(namespace, key)
+    if events:
+        value = cache.set(namespace, key, apply(value, events))
+    return value
+
+
+def invalidate(*namespaces):
+    """Invalidar namespaces manualmente (ex.: após SQL textual)"""
+    if has_app_context():
+        get_cache().invalidate(*namespaces)
+
+
+def invalidate_models(*models):
+    """Invalidar todos os namespaces que dependem dos modelos informados"""
+    namespaces = set()
+    for model in models:
+        namespaces |= _dependencies.get(model, set())
+    if namespaces:
+        invalidate(*namespaces)
+
+
+def _mark_changed(session, models):
+    session.info.setdefault('changed_models', set()).update(models)
+
+
+def _after_flush(session, flush_context):
+    modified = {type(obj) for obj in list(session.dirty) + list(session.deleted)}
+    inserted = {}
+    for obj in session.new:
+        inserted.setdefault(type(obj), []).append(obj)
+
+    appended = session.info.setdefault('appended', defaultdict(list))
+    for model, objs in inserted.items():
+        handlers = _append_handlers.get(model)
+        if not handlers or model in modified:
+            modified.add(model)
+            continue
+        for namespace, extract in handlers:
+            appended[(model, namespace)].extend(extract(obj) for obj in objs)
+
+    _mark_changed(session, modified)
+
+
+def _do_orm_execute(orm_execute_state):
+    # UPDATE/DELETE/INSERT em massa via ORM não passam pelo flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _mark_changed(orm_execute_state.session, {mapper.class_})
+
+
+def _after_commit(session):
+    changed = session.info.pop('changed_models', None) or set()
+    appended = session.info.pop('appended', None) or {}
+    if not has_app_context():
+        return
+
+    if changed:
+        invalidate_models(*changed)
+
+    # Namespaces invalidados por outra mudança serão recalculados do zero
+    invalidated = set()
+    for model in changed:
+        invalidated |= _dependencies.get(model, set())
+
+    # Inserts só são incrementais para quem registrou handler; os demais dependentes são invalidados
+    for model in {model for model, _ in appended} - changed:
+        incremental = {namespace for namespace, _ in _append_handlers.get(model, [])}
+        stale = _dependencies.get(model, set()) - incremental - invalidated
+        if stale:
+            invalidate(*stale)
+            invalidated |= stale
+
+    cache = get_cache()
+    for (model, namespace), events in appended.items():
+        if model in changed or namespace in invalidated:
+            continue
+        cache.append(namespace, events)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    session.info.pop('changed_models', None)
+    session.info.pop('appended', None)
+
+
+def init_cache_invalidation():
+    """Registrar os listeners de sessão (idempotente)"""
+    listeners = [
+        ('after_flush', _after_flush),
+        ('do_orm_execute', _do_orm_execute),
+        ('after_commit', _after_commit),
+        ('after_soft_rollback', _after_soft_rollback),
+    ]
+    if event.contains(Session, 'after_commit', _after_commit):
+        return
+    for name, listener in listeners:
+        event.listen(Session, name, listener)
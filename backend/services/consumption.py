@@ -0,0 +1,96 @@
+"""
+Análise de consumo: quanto de cada ingrediente foi usado por dia, semana, mês ou ano
+"""
+
+from sqlalchemy import Integer, cast, func, select
+from models import db, Recipe, RecipeIngredient, Ingredient, CookingHistory, CookingHistoryArchive
+from services.cache import cached, register_dependency
+from services.retention import all_history
+from services.duckdb_analytics import analytics_engine, duckdb_consumption
+
+CONSUMPTION_CACHE = 'consumption_analytics'
+register_dependency(CONSUMPTION_CACHE, CookingHistory, CookingHistoryArchive, Recipe, RecipeIngredient, Ingredient)
+
+PERIODS = ('day', 'week', 'month', 'year')
+
+
+def period_bucket(column, period):
+    """Expressão SQL do início do período de uma data/hora (texto ISO)"""
+    if period == 'day':
+        return func.date(column)
+    if period == 'week':
+        # strftime('%w'): 0 = domingo; recuar até a segunda-feira
+        days_since_monday = (cast(func.strftime('%w', column), Integer) + 6) % 7
+        return func.date(column, func.printf('-%d days', days_since_monday))
+    if period == 'month':
+        return func.strftime('%Y-%m', column)
+    if period == 'year':
+        return func.strftime('%Y', column)
+    raise ValueError(f'period deve ser um de: {", ".join(PERIODS)}')
+
+
+def _compute_consumption(period, start, end, ingredient_id, category):
+    """Consumo por (ingrediente, período) num único GROUP BY sobre o histórico ativo e arquivado"""
+    history = all_history()
+    bucket = period_bucket(history.c.cooked_at, period).label('period')
+    servings = func.coalesce(func.nullif(Recipe.servings, 0), 1)
+    consumed = func.sum(RecipeIngredient.quantity_needed * history.c.servings_made / servings)
+
+    statement = select(
+        Ingredient.id,
+        Ingredient.name,
+        Ingredient.unit,
+        bucket,
+        consumed
+    ).select_from(history).join(
+        Recipe, Recipe.id == history.c.recipe_id
+    ).join(
+        RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id
+    ).join(
+        Ingredient, Ingredient.id == RecipeIngredient.ingredient_id
+    )
+    if start is not None:
+        statement = statement.where(func.date(history.c.cooked_at) >= start.isoformat())
+    if end is not None:
+        statement = statement.where(func.date(history.c.cooked_at) <= end.isoformat())
+    if ingredient_id is not None:
+        statement = statement.where(Ingredient.id == ingredient_id)
+    if category is not None:
+        statement = statement.where(Ingredient.category == category)
+    statement = statement.group_by(Ingredient.id, Ingredient.name, Ingredient.unit, bucket).order_by(
+        Ingredient.name, bucket
+    )
+
+    return consumption_series(db.session.execute(statement))
+
+
+def consumption_series(rows):
+    """Agrupar linhas (ingredient_id, nome, unidade, período, quantidade), ordenadas
+    por ingrediente e período, em [{ingrediente, total, series}]"""
+    result = []
+    for row_id, name, unit, bucket_value, quantity in rows:
+        if not result or result[-1]['ingredient_id'] != row_id:
+            result.append({'ingredient_id': row_id, 'ingredient_name': name, 'unit': unit, 'total': 0, 'series': []})
+        entry = result[-1]
+        entry['series'].append({'period': bucket_value, 'quantity': round(quantity, 3)})
+        entry['total'] += quantity
+    for entry in result:
+        entry['total'] = round(entry['total'], 3)
+    return result
+
+
+def consumption_by_period(period='month', start=None, end=None, ingredient_id=None, category=None):
+    """Série de consumo por ingrediente, em cache por (período, filtros) até o histórico ou as receitas mudarem.
+
+    Com ANALYTICS_ENGINE=duckdb (e o pacote instalado) a agregação roda no DuckDB.
+    """
+    if period not in PERIODS:
+        raise ValueError(f'period deve ser um de: {", ".join(PERIODS)}')
+    compute = _compute_consumption
+    if analytics_engine() == 'duckdb':
+        compute = duckdb_consumption
+    return cached(
+        CONSUMPTION_CACHE,
+        (period, start, end, ingredient_id, category),
+        lambda: compute(period, start, end, ingredient_id, category)
+    )
@@ -0,0 +1,208 @@
+"""
+Cozimentos: fazer receitas (baixa do estoque + histórico), registro do consumo
+e desfazer cozimentos
+"""
+
+from datetime import datetime
+from sqlalchemy import case, delete, insert, or_, select, update
+from models import db, CookingHistory, FrozenMeal, Ingredient, ShoppingList, StockMovement
+from services.reorder import apply_reorders
+
+COOK_REASON = 'cook'
+UNDO_REASON = 'cook_undo'
+
+
+class InsufficientIngredients(Exception):
+    """Estoque insuficiente para fazer a receita; missing_ingredients traz o que falta"""
+    
+    def __init__(self, missing_ingredients):
+        super().__init__('Ingredientes insuficientes')
+        self.missing_ingredients = missing_ingredients
+
+
+def cook(recipe, servings, notes=None, session=None):
+    """Fazer uma receita: deduzir ingredientes, criar o histórico e gravar o consumo. Não faz commit.
+
+    Levanta InsufficientIngredients se faltar algum ingrediente. Ingredientes que
+    chegaram a zero ou ao ponto de reposição vão para a lista de compras, ligados
+    ao histórico. Retorna (history, ingredientes adicionados à lista de compras).
+    """
+    session = session or db.session
+    needed = [
+        (recipe_ing, (recipe_ing.quantity_needed / recipe.servings) * servings)
+        for recipe_ing in recipe.recipe_ingredients
+    ]
+    
+    missing_ingredients = [
+        {
+            'ingredient_name': recipe_ing.ingredient.name,
+            'quantity_needed': quantity_needed,
+            'quantity_available': recipe_ing.ingredient.quantity,
+            'missing': quantity_needed - recipe_ing.ingredient.quantity,
+            'unit': recipe_ing.unit
+        }
+        for recipe_ing, quantity_needed in needed
+        if recipe_ing.ingredient.quantity < quantity_needed
+    ]
+    if missing_ingredients:
+        raise InsufficientIngredients(missing_ingredients)
+    
+    # Deduzir ingredientes do estoque
+    now = datetime.utcnow()
+    consumption = {}
+    for recipe_ing, quantity_needed in needed:
+        ingredient = recipe_ing.ingredient
+        ingredient.quantity -= quantity_needed
+        ingredient.updated_at = now
+        consumption[ingredient.id] = consumption.get(ingredient.id, 0) + quantity_needed
+    
+    history = CookingHistory(recipe_id=recipe.id, servings_made=servings, notes=notes)
+    session.add(history)
+    session.flush()
+    
+    # Snapshot do consumo, para poder desfazer o cozimento depois
+    record_consumption(history.id, consumption, session)
+    return history, apply_reorders(session=session, source_history_id=history.id)
+
+
+def record_consumption(history_id, consumption, session=None):
+    """Gravar o consumo de um cozimento em stock_movements (um INSERT em massa).
+
+    consumption: {ingredient_id: quantidade deduzida}. É o snapshot usado
+    para desfazer o cozimento com exatamente as mesmas quantidades.
+    """
+    session = session or db.session
+    now = datetime.utcnow()
+    movements = [
+        {
+            'ingredient_id': ingredient_id,
+            'quantity_change': -quantity,
+            'reason': COOK_REASON,
+            'reference_id': history_id,
+            'created_at': now
+        }
+        for ingredient_id, quantity in consumption.items() if quantity
+    ]
+    if movements:
+        session.execute(insert(StockMovement), movements)
+
+
+def detach_history(history_ids, session=None):
+    """Desligar o snapshot de consumo, os itens da lista de compras e as refeições
+    congeladas de registros do histórico que vão deixar de existir (exclusão ou arquivamento).
+
+    cooking_history não usa AUTOINCREMENT: o SQLite pode dar o id de um registro
+    apagado ao próximo cozimento, e desfazer esse cozimento devolveria também o
+    consumo do antigo. As movimentações continuam no estoque, sem referência.
+
+    history_ids: lista de ids ou um SELECT de ids.
+    """
+    session = session or db.session
+    session.execute(
+        update(StockMovement).where(
+            StockMovement.reason.in_((COOK_REASON, UNDO_REASON)),
+            StockMovement.reference_id.in_(history_ids)
+        ).values(reference_id=None).execution_options(synchronize_session=False)
+    )
+    session.execute(
+        update(ShoppingList).where(
+            ShoppingList.source_history_id.in_(history_ids)
+        ).values(source_history_id=None).execution_options(synchronize_session=False)
+    )
+    session.execute(
+        update(FrozenMeal).where(
+            FrozenMeal.source_history_id.in_(history_ids)
+        ).values(source_history_id=None).execution_options(synchronize_session=False)
+    )
+
+
+def reverse_cooks(history_ids, session=None):
+    """Desfazer vários cozimentos numa única transação (sem commit).
+
+    Devolve ao estoque o consumo gravado de cada cozimento (um UPDATE com CASE),
+    registra movimentações cook_undo, remove os itens pendentes que o cozimento
+    adicionou à lista de compras e as refeições congeladas feitas nele, e apaga
+    os registros do histórico.
+
+    Registros sem consumo gravado (anteriores ao snapshot) e cozimentos cuja
+    refeição congelada já foi consumida ou descartada em parte não são desfeitos.
+    Retorna {'reversed_ids', 'skipped_ids', 'restored', 'shopping_items_removed', 'frozen_meals_removed'}.
+    """
+    session = session or db.session
+    history_ids = list(dict.fromkeys(history_ids))
+    if not history_ids:
+        return {'reversed_ids': [], 'skipped_ids': [], 'restored': {}, 'shopping_items_removed': 0, 'frozen_meals_removed': 0}
+
+    snapshot = session.execute(
+        select(StockMovement.reference_id, StockMovement.ingredient_id, StockMovement.quantity_change).where(
+            StockMovement.reason == COOK_REASON,
+            StockMovement.reference_id.in_(history_ids)
+        )
+    ).all()
+    histories = session.query(CookingHistory).filter(CookingHistory.id.in_(history_ids)).all()
+
+    frozen_in_use = set(session.execute(
+        select(FrozenMeal.source_history_id).where(
+            FrozenMeal.source_history_id.in_(history_ids),
+            or_(FrozenMeal.consumed_portions > 0, FrozenMeal.discarded_portions > 0)
+        )
+    ).scalars())
+
+    with_snapshot = {row.reference_id for row in snapshot}
+    to_reverse = [h for h in histories if h.id in with_snapshot and h.id not in frozen_in_use]
+    reversed_ids = [h.id for h in to_reverse]
+    if not reversed_ids:
+        return {'reversed_ids': [], 'skipped_ids': history_ids, 'restored': {}, 'shopping_items_removed': 0,
+                'frozen_meals_removed': 0}
+
+    now = datetime.utcnow()
+    reversing = set(reversed_ids)
+    restored = {}
+    movements = []
+    for reference_id, ingredient_id, quantity_change in snapshot:
+        if reference_id not in reversing:
+            continue
+        restored[ingredient_id] = restored.get(ingredient_id, 0) - quantity_change
+        movements.append({
+            'ingredient_id': ingredient_id,
+            'quantity_change': -quantity_change,
+            'reason': UNDO_REASON,
+            'reference_id': reference_id,
+            'created_at': now
+        })
+
+    session.execute(
+        update(Ingredient).where(Ingredient.id.in_(list(restored))).values(
+            quantity=Ingredient.quantity + case(restored, value=Ingredient.id, else_=0),
+            updated_at=now
+        ).execution_options(synchronize_session='fetch')
+    )
+    session.execute(insert(StockMovement), movements)
+
+    removed = session.execute(
+        delete(ShoppingList).where(
+            ShoppingList.source_history_id.in_(reversed_ids),
+            ShoppingList.purchased.is_(False)
+        ).execution_options(synchronize_session='fetch')
+    ).rowcount
+
+    # Refeições congeladas feitas nesses cozimentos deixam de existir
+    frozen_removed = session.execute(
+        delete(FrozenMeal).where(
+            FrozenMeal.source_history_id.in_(reversed_ids)
+        ).execution_options(synchronize_session='fetch')
+    ).rowcount
+
+    detach_history(reversed_ids, session)
+
+    # Exclusão pelo ORM para os listeners (rollups) acompanharem
+    for history in to_reverse:
+        session.delete(history)
+
+    return {
+        'reversed_ids': reversed_ids,
+        'skipped_ids': [history_id for history_id in history_ids if history_id not in reversed_ids],
+        'restored': {ingredient_id: round(quantity, 6) for ingredient_id, quantity in restored.items()},
+        'shopping_items_removed': removed,
+        'frozen_meals_removed': frozen_removed
+    }
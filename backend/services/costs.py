@@ -0,0 +1,107 @@
+"""
+Custos: histórico de preços de compra e custo por porção das receitas
+"""
+
+from sqlalchemy import func, select, case, and_, or_
+from models import db, Ingredient, IngredientPack, PriceRecord, Recipe, RecipeIngredient
+from services.cache import cached, register_dependency
+
+RECIPE_COSTS_CACHE = 'recipe_costs'
+register_dependency(RECIPE_COSTS_CACHE, PriceRecord, IngredientPack, Recipe, RecipeIngredient, Ingredient)
+
+PRICE_METHODS = ('latest', 'average')
+
+
+def _history_prices(method):
+    """Preço por unidade vindo das compras: o mais recente ou a média"""
+    if method == 'average':
+        return select(
+            PriceRecord.ingredient_id.label('ingredient_id'),
+            func.avg(PriceRecord.price_per_unit).label('price')
+        ).group_by(PriceRecord.ingredient_id).subquery('history_prices')
+
+    ranked = select(
+        PriceRecord.ingredient_id.label('ingredient_id'),
+        PriceRecord.price_per_unit.label('price'),
+        func.row_number().over(
+            partition_by=PriceRecord.ingredient_id,
+            order_by=(PriceRecord.recorded_at.desc(), PriceRecord.id.desc())
+        ).label('rank')
+    ).subquery('ranked_prices')
+    return select(ranked.c.ingredient_id, ranked.c.price).where(
+        ranked.c.rank == 1
+    ).subquery('history_prices')
+
+
+def pack_unit_prices():
+    """Menor preço por unidade entre as embalagens cadastradas de cada ingrediente"""
+    return select(
+        IngredientPack.ingredient_id.label('ingredient_id'),
+        func.min(IngredientPack.price / IngredientPack.size).label('price')
+    ).where(
+        IngredientPack.price.isnot(None),
+        IngredientPack.size > 0
+    ).group_by(IngredientPack.ingredient_id).subquery('pack_prices')
+
+
+def unit_prices(method='latest'):
+    """Subconsulta (ingredient_id, price): preço das compras, senão o da embalagem mais barata"""
+    history = _history_prices(method)
+    packs = pack_unit_prices()
+    return select(
+        Ingredient.id.label('ingredient_id'),
+        func.coalesce(history.c.price, packs.c.price).label('price')
+    ).outerjoin(
+        history, history.c.ingredient_id == Ingredient.id
+    ).outerjoin(
+        packs, packs.c.ingredient_id == Ingredient.id
+    ).subquery('unit_prices')
+
+
+def _compute_recipe_costs(method):
+    """Custo de todas as receitas num único GROUP BY.
+
+    É o produto matriz-vetor (quantidades da receita x preço por unidade) feito
+    no SQL. Ingredientes ilimitados sem preço contam como custo zero; os demais
+    sem preço entram em unpriced e deixam o custo incompleto.
+    """
+    prices = unit_prices(method)
+    missing = and_(
+        RecipeIngredient.id.isnot(None),
+        prices.c.price.is_(None),
+        or_(Ingredient.unlimited.is_(False), Ingredient.unlimited.is_(None))
+    )
+    rows = db.session.execute(
+        select(
+            Recipe.id,
+            Recipe.servings,
+            func.sum(RecipeIngredient.quantity_needed * prices.c.price),
+            func.sum(case((missing, 1), else_=0))
+        ).select_from(Recipe).outerjoin(
+            RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id
+        ).outerjoin(
+            Ingredient, Ingredient.id == RecipeIngredient.ingredient_id
+        ).outerjoin(
+            prices, prices.c.ingredient_id == RecipeIngredient.ingredient_id
+        ).group_by(Recipe.id, Recipe.servings)
+    ).all()
+
+    costs = {}
+    for recipe_id, servings, total, unpriced in rows:
+        total = total or 0
+        costs[recipe_id] = {
+            'recipe_id': recipe_id,
+            'servings': servings,
+            'total_cost': round(total, 2),
+            'cost_per_serving': round(total / (servings or 1), 2),
+            'unpriced_ingredients': unpriced or 0,
+            'complete': not unpriced
+        }
+    return costs
+
+
+def recipe_costs(method='latest'):
+    """{recipe_id: custo}, em cache até mudarem preços, embalagens ou receitas"""
+    if method not in PRICE_METHODS:
+        raise ValueError(f'method deve ser um de: {", ".join(PRICE_METHODS)}')
+    return cached(RECIPE_COSTS_CACHE, method, lambda: _compute_recipe_costs(method))
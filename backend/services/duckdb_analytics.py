@@ -0,0 +1,109 @@
+"""
+Modo de análise com DuckDB (opcional): relatórios pesados lidos direto do
+arquivo SQLite (sqlite_scan, somente leitura) por um DuckDB embutido.
+
+Ativado com ANALYTICS_ENGINE=duckdb, `pip install duckdb` e a extensão sqlite
+instalada antes (`python -c "import duckdb; duckdb.install_extension('sqlite')"`):
+nada é baixado durante uma requisição. Sem o pacote, as análises continuam no
+SQLite. Os endpoints transacionais não passam por aqui.
+"""
+
+from flask import current_app
+from models import db
+
+try:
+    import duckdb
+except ImportError:  # Dependência opcional
+    duckdb = None
+
+ENGINES = ('sqlite', 'duckdb')
+
+_BUCKETS = {
+    'day': "strftime(CAST(h.cooked_at AS TIMESTAMP), '%Y-%m-%d')",
+    'week': "strftime(date_trunc('week', CAST(h.cooked_at AS TIMESTAMP)), '%Y-%m-%d')",
+    'month': "strftime(CAST(h.cooked_at AS TIMESTAMP), '%Y-%m')",
+    'year': "strftime(CAST(h.cooked_at AS TIMESTAMP), '%Y')",
+}
+
+
+def is_available():
+    return duckdb is not None
+
+
+def analytics_engine():
+    """Motor configurado para as análises; cai para sqlite se o DuckDB não estiver instalado"""
+    engine = current_app.config.get('ANALYTICS_ENGINE', 'sqlite')
+    if engine not in ENGINES:
+        current_app.logger.warning(f'ANALYTICS_ENGINE desconhecido: {engine}; usando sqlite')
+        return 'sqlite'
+    if engine == 'duckdb' and not is_available():
+        current_app.logger.warning('ANALYTICS_ENGINE=duckdb, mas o pacote duckdb não está instalado; usando sqlite')
+        return 'sqlite'
+    return engine
+
+
+def database_path():
+    """Caminho do arquivo SQLite em uso pela aplicação"""
+    return db.engine.url.database
+
+
+def connect():
+    """Conexão DuckDB em memória com a extensão sqlite carregada.
+
+    A instalação automática de extensões fica desligada: sem a extensão
+    já instalada, falha na hora com RuntimeError em vez de baixá-la.
+    """
+    if not is_available():
+        raise RuntimeError('duckdb não está instalado')
+    connection = duckdb.connect(config={'autoinstall_known_extensions': False})
+    try:
+        connection.execute('LOAD sqlite')
+    except duckdb.Error as e:
+        connection.close()
+        raise RuntimeError(f'Extensão sqlite do DuckDB não instalada: {e}')
+    return connection
+
+
+def duckdb_consumption(period, start=None, end=None, ingredient_id=None, category=None):
+    """Mesmo resultado de services.consumption._compute_consumption, agregado no DuckDB"""
+    from services.consumption import consumption_series
+
+    # O caminho do banco também vai como parâmetro, nunca interpolado no SQL
+    conditions = []
+    params = {'path': database_path()}
+    if start is not None:
+        conditions.append('CAST(h.cooked_at AS DATE) >= $start')
+        params['start'] = start
+    if end is not None:
+        conditions.append('CAST(h.cooked_at AS DATE) <= $end')
+        params['end'] = end
+    if ingredient_id is not None:
+        conditions.append('i.id = $ingredient_id')
+        params['ingredient_id'] = ingredient_id
+    if category is not None:
+        conditions.append('i.category = $category')
+        params['category'] = category
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    bucket = _BUCKETS[period]
+
+    query = f"""
+        WITH h AS (
+            SELECT recipe_id, servings_made, cooked_at FROM sqlite_scan($path, 'cooking_history')
+            UNION ALL
+            SELECT recipe_id, servings_made, cooked_at FROM sqlite_scan($path, 'cooking_history_archive')
+        )
+        SELECT i.id, i.name, i.unit, {bucket} AS period,
+               SUM(ri.quantity_needed * h.servings_made / COALESCE(NULLIF(r.servings, 0), 1)) AS consumed
+        FROM h
+        JOIN sqlite_scan($path, 'recipes') r ON r.id = h.recipe_id
+        JOIN sqlite_scan($path, 'recipe_ingredients') ri ON ri.recipe_id = r.id
+        JOIN sqlite_scan($path, 'ingredients') i ON i.id = ri.ingredient_id
+        {where}
+        GROUP BY i.id, i.name, i.unit, period
+        ORDER BY i.name, period
+    """
+    connection = connect()
+    try:
+        return consumption_series(connection.execute(query, params).fetchall())
+    finally:
+        connection.close()
@@ -0,0 +1,89 @@
+"""
+Serviço de validade: responde "o que vence nos próximos N dias" para todos os estoques
+"""
+
+import heapq
+from datetime import date, timedelta
+from flask import current_app
+from models import Ingredient, FrozenMeal
+
+DEFAULT_WINDOW_DAYS = 7
+
+
+def get_window_days(days=None):
+    """Janela em dias: parâmetro explícito ou EXPIRY_WINDOW_DAYS da configuração"""
+    if days is None:
+        days = current_app.config.get('EXPIRY_WINDOW_DAYS', DEFAULT_WINDOW_DAYS)
+    return max(0, int(days))
+
+
+def expiring_ingredients(days=None, today=None):
+    """Ingredientes com validade entre hoje e hoje + N dias, ordenados pela validade.
+
+    A consulta é um range scan no índice de ingredients.expiry_date.
+    """
+    today = today or date.today()
+    limit_date = today + timedelta(days=get_window_days(days))
+    return Ingredient.query.filter(
+        Ingredient.expiry_date.isnot(None),
+        Ingredient.expiry_date >= today,
+        Ingredient.expiry_date <= limit_date
+    ).order_by(Ingredient.expiry_date, Ingredient.id).all()
+
+
+def expiring_frozen_meals(days=None, today=None):
+    """Refeições congeladas (status frozen) que vencem entre hoje e hoje + N dias"""
+    today = today or date.today()
+    limit_date = today + timedelta(days=get_window_days(days))
+    return FrozenMeal.query.filter(
+        FrozenMeal.expiry_date.isnot(None),
+        FrozenMeal.expiry_date >= today,
+        FrozenMeal.expiry_date <= limit_date,
+        FrozenMeal.status == 'frozen'
+    ).order_by(FrozenMeal.expiry_date, FrozenMeal.id).all()
+
+
+def _ingredient_entry(ingredient, today):
+    return {
+        'type': 'ingredient',
+        'id': ingredient.id,
+        'name': ingredient.name,
+        'emoji': ingredient.emoji,
+        'quantity': ingredient.quantity,
+        'unit': ingredient.unit,
+        'location': ingredient.location,
+        'expiry_date': ingredient.expiry_date.isoformat(),
+        'days_until_expiry': (ingredient.expiry_date - today).days
+    }
+
+
+def _frozen_meal_entry(meal, today):
+    return {
+        'type': 'frozen_meal',
+        'id': meal.id,
+        'name': meal.recipe.name if meal.recipe else None,
+        'emoji': meal.recipe.emoji if meal.recipe else '🍽️',
+        'quantity': meal.remaining_portions(),
+        'unit': meal.measure or 'porções',
+        'location': 'Freezer',
+        'expiry_date': meal.expiry_date.isoformat(),
+        'days_until_expiry': (meal.expiry_date - today).days
+    }
+
+
+def expiring_items(days=None, today=None):
+    """Todos os itens que vencem na janela, de todos os estoques, numa única lista.
+
+    Cada consulta já vem ordenada pelo índice de validade, então as listas são
+    apenas intercaladas (merge) em vez de reordenadas.
+    """
+    today = today or date.today()
+    ingredients = (
+        (ing.expiry_date, 0, _ingredient_entry(ing, today))
+        for ing in expiring_ingredients(days, today)
+    )
+    meals = (
+        (meal.expiry_date, 1, _frozen_meal_entry(meal, today))
+        for meal in expiring_frozen_meals(days, today)
+    )
+    return [entry for _, _, entry in heapq.merge(ingredients, meals, key=lambda t: (t[0], t[1]))]
@@ -0,0 +1,102 @@
+"""
+Exportação em streaming: linhas lidas do banco em lotes e serializadas sob demanda
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from models import db
+
+EXPORT_BATCH_SIZE = 500
+
+
+def stream_batches(statement, session=None, batch_size=EXPORT_BATCH_SIZE):
+    """Executar um SELECT de colunas e iterar em lotes de tuplas (yield_per).
+
+    Nenhum objeto ORM é montado e a memória fica limitada a um lote.
+    """
+    session = session or db.session
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+    try:
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+    finally:
+        result.close()
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'Tipo não serializável: {type(value).__name__}')
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+def csv_stream(header, batches):
+    """CSV com cabeçalho; um bloco de texto por lote"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows(
+            [v.isoformat() if isinstance(v, (date, datetime)) else v for v in row] for row in batch
+        )
+        yield buffer.getvalue()
+
+
+def ndjson_stream(keys, batches):
+    """Um objeto JSON por linha"""
+    for batch in batches:
+        yield ''.join(_dumps(dict(zip(keys, row))) + '\n' for row in batch)
+
+
+def compact_json_stream(columns, batches, **meta):
+    """JSON compacto: {"columns": [...], "rows": [[...], ...], **meta} sem repetir as chaves"""
+    head = dict(meta, columns=list(columns))
+    yield _dumps(head)[:-1] + ',"rows":['
+    first = True
+    for batch in batches:
+        if not batch:
+            continue
+        chunk = ','.join(_dumps(list(row)) for row in batch)
+        yield chunk if first else ',' + chunk
+        first = False
+    yield ']}'
+
+
+def text_stream(format_row, batches):
+    """Texto simples: uma linha por item, formatada por format_row(row)"""
+    for batch in batches:
+        yield ''.join(format_row(row) + '\n' for row in batch)
+
+
+def nested_ndjson_stream(parent_keys, child_keys, child_field, batches):
+    """Um objeto JSON por linha, com as linhas-filhas aninhadas em `child_field`.
+
+    Cada tupla traz as colunas do pai seguidas das do filho, ordenadas pelo
+    primeiro campo do pai (ex.: id); filhos só com NULL (LEFT JOIN vazio) são
+    ignorados. Os grupos podem atravessar lotes.
+    """
+    size = len(parent_keys)
+    current = None
+    for batch in batches:
+        lines = []
+        for row in batch:
+            if current is None or current[parent_keys[0]] != row[0]:
+                if current is not None:
+                    lines.append(_dumps(current) + '\n')
+                current = dict(zip(parent_keys, row[:size]))
+                current[child_field] = []
+            child = row[size:]
+            if any(value is not None for value in child):
+                current[child_field].append(dict(zip(child_keys, child)))
+        if lines:
+            yield ''.join(lines)
+    if current is not None:
+        yield _dumps(current) + '\n'
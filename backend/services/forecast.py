@@ -0,0 +1,179 @@
+"""
+Previsão de consumo: taxa diária suavizada por ingrediente e data prevista de término
+"""
+
+import math
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, Ingredient, Recipe, RecipeIngredient, CookingHistory
+from services.cache import cached_incremental, register_dependency, register_append_handler
+
+RATES_CACHE = 'consumption_rates'
+# Alterações/remoções recalculam tudo; registros novos de histórico são aplicados incrementalmente
+register_dependency(RATES_CACHE, CookingHistory, RecipeIngredient, Recipe)
+register_append_handler(
+    RATES_CACHE,
+    CookingHistory,
+    lambda h: (h.recipe_id, h.servings_made, h.cooked_at)
+)
+
+DEFAULT_LOOKBACK_DAYS = 90  # Histórico considerado
+DEFAULT_SPAN_DAYS = 14      # "Meia-vida" aproximada da média exponencial
+
+
+def daily_consumption_query(since):
+    """Consumo por (ingrediente, dia) desde `since`, num único GROUP BY.
+
+    Cada registro do histórico consome quantity_needed / recipe.servings * servings_made
+    de cada ingrediente da receita.
+    """
+    day = func.date(CookingHistory.cooked_at)
+    servings = func.coalesce(func.nullif(Recipe.servings, 0), 1)
+    consumed = func.sum(RecipeIngredient.quantity_needed * CookingHistory.servings_made / servings)
+    return db.session.query(
+        RecipeIngredient.ingredient_id,
+        day.label('day'),
+        consumed.label('consumed')
+    ).join(
+        Recipe, Recipe.id == CookingHistory.recipe_id
+    ).join(
+        RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id
+    ).filter(
+        CookingHistory.cooked_at >= since
+    ).group_by(
+        RecipeIngredient.ingredient_id, day
+    )
+
+
+def _to_date(day):
+    if isinstance(day, str):
+        return datetime.strptime(day, '%Y-%m-%d').date()
+    if isinstance(day, datetime):
+        return day.date()
+    return day
+
+
+def _compute_state(lookback_days, span_days, today):
+    """Estado da média móvel exponencial do consumo diário, para todos os ingredientes.
+
+    A EWMA com valor inicial zero tem forma fechada:
+        s = alpha * sum((1 - alpha) ** idade_do_dia * consumo_do_dia)
+    então basta uma passada pelas linhas agrupadas (dias sem consumo contribuem zero)
+    e um registro novo só soma um termo, sem reler o histórico.
+    """
+    since = datetime.combine(today - timedelta(days=lookback_days - 1), datetime.min.time())
+    state = {
+        'today': today,
+        'lookback_days': lookback_days,
+        'decay': 1.0 - 2.0 / (span_days + 1),
+        'min_observed_days': span_days,
+        'first_days': {},
+        'weighted': {}
+    }
+    for ingredient_id, day, consumed in daily_consumption_query(since):
+        _add_consumption(state, ingredient_id, _to_date(day), consumed or 0)
+    return state
+
+
+def _add_consumption(state, ingredient_id, day, consumed):
+    age = (state['today'] - day).days
+    if age < 0 or age >= state['lookback_days']:
+        return
+    weighted = state['weighted']
+    weighted[ingredient_id] = weighted.get(ingredient_id, 0.0) + (state['decay'] ** age) * consumed
+    first_days = state['first_days']
+    if ingredient_id not in first_days or day < first_days[ingredient_id]:
+        first_days[ingredient_id] = day
+
+
+def _apply_new_history(state, events):
+    """Somar os registros novos de histórico ao estado (uma consulta para todas as receitas)"""
+    recipe_ids = {recipe_id for recipe_id, _, _ in events}
+    rows = db.session.query(
+        RecipeIngredient.recipe_id,
+        RecipeIngredient.ingredient_id,
+        RecipeIngredient.quantity_needed,
+        Recipe.servings
+    ).join(
+        Recipe, Recipe.id == RecipeIngredient.recipe_id
+    ).filter(
+        RecipeIngredient.recipe_id.in_(recipe_ids)
+    ).all()
+
+    per_recipe = {}
+    for recipe_id, ingredient_id, quantity_needed, recipe_servings in rows:
+        per_recipe.setdefault(recipe_id, []).append((ingredient_id, quantity_needed / (recipe_servings or 1)))
+
+    for recipe_id, servings_made, cooked_at in events:
+        day = _to_date(cooked_at or datetime.utcnow())
+        for ingredient_id, per_serving in per_recipe.get(recipe_id, []):
+            _add_consumption(state, ingredient_id, day, per_serving * servings_made)
+    return state
+
+
+def _rates_from_state(state):
+    """Taxa diária por ingrediente, com correção do viés do início da série.
+
+    Os dias observados contam a partir do primeiro consumo de cada ingrediente,
+    e nunca menos que span_days: com histórico curto (um único cozimento hoje)
+    a correção dividiria por alpha e a taxa seria o total consumido num dia.
+    """
+    alpha = 1.0 - state['decay']
+    rates = {}
+    for ingredient_id, total in state['weighted'].items():
+        observed_days = (state['today'] - state['first_days'][ingredient_id]).days + 1
+        observed_days = min(state['lookback_days'], max(observed_days, state['min_observed_days']))
+        rates[ingredient_id] = alpha * total / (1.0 - state['decay'] ** observed_days)
+    return rates
+
+
+def consumption_rates(lookback_days=DEFAULT_LOOKBACK_DAYS, span_days=DEFAULT_SPAN_DAYS):
+    """Taxas diárias {ingredient_id: quantidade/dia}.
+
+    O estado fica em cache; histórico novo é somado incrementalmente e qualquer
+    outra mudança (receitas, edições ou remoções de histórico) força recálculo.
+    """
+    today = datetime.utcnow().date()
+    state = cached_incremental(
+        RATES_CACHE,
+        (lookback_days, span_days, today),
+        lambda: _compute_state(lookback_days, span_days, today),
+        _apply_new_history
+    )
+    return _rates_from_state(state)
+
+
+def depletion_forecast(lookback_days=DEFAULT_LOOKBACK_DAYS, span_days=DEFAULT_SPAN_DAYS):
+    """Previsão de término para cada ingrediente com consumo registrado.
+
+    As taxas vêm do cache; só o estoque atual é lido a cada chamada.
+    """
+    rates = consumption_rates(lookback_days, span_days)
+    today = datetime.utcnow().date()
+
+    forecast = []
+    if not rates:
+        return forecast
+
+    ingredients = Ingredient.query.filter(Ingredient.id.in_(list(rates))).all()
+    for ingredient in ingredients:
+        rate = rates[ingredient.id]
+        runs_out_on = None
+        days_left = None
+        if rate > 0 and not ingredient.unlimited:
+            days_left = max(0.0, ingredient.quantity) / rate
+            runs_out_on = (today + timedelta(days=math.floor(days_left))).isoformat()
+
+        forecast.append({
+            'ingredient_id': ingredient.id,
+            'ingredient_name': ingredient.name,
+            'unit': ingredient.unit,
+            'quantity': ingredient.quantity,
+            'daily_rate': round(rate, 4),
+            'days_left': round(days_left, 1) if days_left is not None else None,
+            'runs_out_on': runs_out_on
+        })
+
+    # Quem acaba primeiro vem primeiro; ilimitados/sem consumo no final
+    forecast.sort(key=lambda f: (f['runs_out_on'] is None, f['runs_out_on'] or '', f['ingredient_name']))
+    return forecast
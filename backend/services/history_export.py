@@ -0,0 +1,48 @@
+"""
+Exportação do histórico com o consumo de ingredientes de cada registro
+"""
+
+from datetime import timedelta
+from sqlalchemy import func, select
+from models import CookingHistory, Recipe, RecipeIngredient, Ingredient
+
+HISTORY_COLUMNS = ['id', 'cooked_at', 'recipe_id', 'recipe_name', 'servings_made', 'notes']
+CONSUMPTION_COLUMNS = ['ingredient_id', 'ingredient_name', 'quantity', 'unit']
+
+
+def history_export_select(start=None, end=None, recipe_id=None):
+    """Uma linha por (registro, ingrediente consumido), em ordem cronológica.
+
+    O consumo segue a escala do cook_recipe:
+    quantity_needed / recipe.servings * servings_made. start/end são datas (inclusivo).
+    """
+    servings = func.coalesce(func.nullif(Recipe.servings, 0), 1)
+    quantity = RecipeIngredient.quantity_needed * CookingHistory.servings_made / servings
+
+    statement = select(
+        CookingHistory.id,
+        CookingHistory.cooked_at,
+        CookingHistory.recipe_id,
+        Recipe.name,
+        CookingHistory.servings_made,
+        CookingHistory.notes,
+        RecipeIngredient.ingredient_id,
+        Ingredient.name,
+        quantity,
+        RecipeIngredient.unit
+    ).select_from(CookingHistory).join(
+        Recipe, Recipe.id == CookingHistory.recipe_id
+    ).outerjoin(
+        RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id
+    ).outerjoin(
+        Ingredient, Ingredient.id == RecipeIngredient.ingredient_id
+    )
+
+    if start is not None:
+        statement = statement.where(CookingHistory.cooked_at >= start)
+    if end is not None:
+        statement = statement.where(CookingHistory.cooked_at < end + timedelta(days=1))
+    if recipe_id is not None:
+        statement = statement.where(CookingHistory.recipe_id == recipe_id)
+
+    return statement.order_by(CookingHistory.cooked_at, CookingHistory.id, RecipeIngredient.id)
@@ -0,0 +1,308 @@
+"""
+Rollups do histórico: contagens por dia, semana e total de cada receita, e os
+contadores de uso em recipes (times_cooked, total_servings_made, last_cooked_at,
+popularity), mantidos a cada registro criado ou apagado em cooking_history
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, event, func, literal, select, delete, update, insert as core_insert
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from models import db, CookingHistory, CookingHistoryArchive, HistoryRollup, Recipe, popularity_weight
+from services.retention import all_history
+from services.consumption import period_bucket
+
+DAY = 'day'
+WEEK = 'week'
+TOTAL = 'total'
+TOTAL_START = date(1970, 1, 1)
+
+
+def week_start(day):
+    """Segunda-feira da semana do dia"""
+    return day - timedelta(days=day.weekday())
+
+
+def _keys(recipe_id, cooked_at):
+    day = cooked_at.date()
+    return [
+        (DAY, day, recipe_id),
+        (WEEK, week_start(day), recipe_id),
+        (TOTAL, TOTAL_START, recipe_id),
+    ]
+
+
+def _track_history_changes(session, flush_context):
+    """Anotar os deltas de cada registro inserido (+1) ou apagado (-1) no flush"""
+    changes = [(obj, 1) for obj in session.new if isinstance(obj, CookingHistory)]
+    changes += [(obj, -1) for obj in session.deleted if isinstance(obj, CookingHistory)]
+    if not changes:
+        return
+    deltas = session.info.setdefault('history_rollup_deltas', {})
+    touched = session.info.setdefault('history_recipes_touched', {})
+    for obj, sign in changes:
+        for key in _keys(obj.recipe_id, obj.cooked_at):
+            count, servings = deltas.get(key, (0, 0))
+            deltas[key] = (count + sign, servings + sign * (obj.servings_made or 0))
+        recipe = touched.setdefault(obj.recipe_id, {'latest': None, 'deleted': False, 'popularity': 0.0})
+        recipe['popularity'] += sign * popularity_weight(obj.cooked_at)
+        if sign < 0:
+            recipe['deleted'] = True
+        elif recipe['latest'] is None or obj.cooked_at > recipe['latest']:
+            recipe['latest'] = obj.cooked_at
+
+
+def apply_rollup_deltas(session=None):
+    """Aplicar os deltas pendentes num único UPSERT (somando às linhas existentes)
+    e atualizar os contadores das receitas afetadas"""
+    session = session or db.session
+    deltas = session.info.pop('history_rollup_deltas', None)
+    touched = session.info.pop('history_recipes_touched', None)
+    if not deltas:
+        return
+    if touched:
+        _apply_recipe_counters(session, deltas, touched)
+    rows = [
+        {'period': period, 'period_start': start, 'recipe_id': recipe_id,
+         'cook_count': count, 'servings_made': servings}
+        for (period, start, recipe_id), (count, servings) in deltas.items()
+        if count or servings
+    ]
+    if not rows:
+        return
+    statement = insert(HistoryRollup).values(rows)
+    session.execute(statement.on_conflict_do_update(
+        index_elements=['period', 'period_start', 'recipe_id'],
+        set_={
+            'cook_count': HistoryRollup.cook_count + statement.excluded.cook_count,
+            'servings_made': HistoryRollup.servings_made + statement.excluded.servings_made
+        }
+    ))
+    if any(count < 0 for count, _ in deltas.values()):
+        session.execute(delete(HistoryRollup).where(HistoryRollup.cook_count <= 0))
+
+
+def _last_cooked_subquery():
+    # Maior cooked_at da receita no histórico ativo (índice recipe_id, cooked_at), senão no arquivo
+    recipes = Recipe.__table__
+    return func.coalesce(
+        select(func.max(CookingHistory.cooked_at)).where(
+            CookingHistory.recipe_id == recipes.c.id
+        ).scalar_subquery(),
+        select(func.max(CookingHistoryArchive.cooked_at)).where(
+            CookingHistoryArchive.recipe_id == recipes.c.id
+        ).scalar_subquery()
+    )
+
+
+def _apply_recipe_counters(session, deltas, touched):
+    """Um UPDATE com CASE nos contadores das receitas tocadas na transação.
+
+    Inserções só podem avançar last_cooked_at; quando houve exclusão, o valor
+    é recalculado pelo índice (recipe_id, cooked_at). Executado no Core (sem
+    eventos do ORM) para não invalidar os caches que dependem de Recipe, e
+    sem mexer em updated_at: a receita em si não mudou.
+    """
+    recipes = Recipe.__table__
+    counts = {}
+    servings = {}
+    for recipe_id in touched:
+        count, servings_made = deltas.get((TOTAL, TOTAL_START, recipe_id), (0, 0))
+        if count:
+            counts[recipe_id] = count
+        if servings_made:
+            servings[recipe_id] = servings_made
+    popularity = {recipe_id: t['popularity'] for recipe_id, t in touched.items() if t['popularity']}
+    recompute = [recipe_id for recipe_id, t in touched.items() if t['deleted']]
+    latest = {recipe_id: t['latest'] for recipe_id, t in touched.items() if not t['deleted'] and t['latest']}
+
+    values = {'updated_at': recipes.c.updated_at}
+    if counts:
+        values['times_cooked'] = func.coalesce(recipes.c.times_cooked, 0) + case(counts, value=recipes.c.id, else_=0)
+    if servings:
+        values['total_servings_made'] = (
+            func.coalesce(recipes.c.total_servings_made, 0) + case(servings, value=recipes.c.id, else_=0)
+        )
+    if popularity:
+        # Remover um cozimento subtrai exatamente o peso que ele somou
+        values['popularity'] = func.max(
+            func.coalesce(recipes.c.popularity, 0) + case(popularity, value=recipes.c.id, else_=0), 0
+        )
+    whens = []
+    if recompute:
+        whens.append((recipes.c.id.in_(recompute), _last_cooked_subquery()))
+    if latest:
+        new_value = case(latest, value=recipes.c.id)
+        whens.append((
+            recipes.c.id.in_(list(latest)),
+            func.max(func.coalesce(recipes.c.last_cooked_at, new_value), new_value)
+        ))
+    if whens:
+        values['last_cooked_at'] = case(*whens, else_=recipes.c.last_cooked_at)
+
+    session.connection().execute(
+        update(recipes).where(recipes.c.id.in_(list(touched))).values(**values)
+    )
+
+
+def rebuild_recipe_counters(session=None):
+    """Recalcular os contadores de todas as receitas a partir do histórico ativo e arquivado.
+
+    Não faz commit.
+    """
+    session = session or db.session
+    recipes = Recipe.__table__
+    history = all_history()
+    totals = select(
+        history.c.recipe_id,
+        func.count().label('times_cooked'),
+        func.sum(history.c.servings_made).label('servings')
+    ).group_by(history.c.recipe_id).subquery('totals')
+    session.connection().execute(
+        update(recipes).values(
+            times_cooked=func.coalesce(
+                select(totals.c.times_cooked).where(totals.c.recipe_id == recipes.c.id).scalar_subquery(), 0
+            ),
+            total_servings_made=func.coalesce(
+                select(totals.c.servings).where(totals.c.recipe_id == recipes.c.id).scalar_subquery(), 0
+            ),
+            last_cooked_at=_last_cooked_subquery(),
+            popularity=0,
+            updated_at=recipes.c.updated_at
+        )
+    )
+
+    # Pesos calculados em Python (o SQLite pode não ter funções matemáticas)
+    popularity = {}
+    rows = session.execute(
+        select(history.c.recipe_id, history.c.cooked_at).execution_options(yield_per=1000)
+    )
+    for recipe_id, cooked_at in rows:
+        popularity[recipe_id] = popularity.get(recipe_id, 0.0) + popularity_weight(cooked_at)
+    if popularity:
+        session.connection().execute(
+            update(recipes).where(recipes.c.id.in_(list(popularity))).values(
+                popularity=case(popularity, value=recipes.c.id),
+                updated_at=recipes.c.updated_at
+            )
+        )
+
+
+def _apply_on_commit(session):
+    # before_commit roda antes do flush final: forçar o flush para anotar as mudanças
+    session.flush()
+    apply_rollup_deltas(session)
+
+
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('history_rollup_deltas', None)
+    session.info.pop('history_recipes_touched', None)
+
+
+def init_history_rollups():
+    """Registrar os listeners de sessão (idempotente)"""
+    if event.contains(Session, 'before_commit', _apply_on_commit):
+        return
+    event.listen(Session, 'after_flush', _track_history_changes)
+    event.listen(Session, 'before_commit', _apply_on_commit)
+    event.listen(Session, 'after_soft_rollback', _discard_on_rollback)
+
+
+def rebuild_rollups(session=None):
+    """Recriar os rollups a partir do histórico ativo e arquivado (migração/correção).
+
+    Não faz commit.
+    """
+    session = session or db.session
+    history = all_history()
+    session.execute(delete(HistoryRollup))
+
+    day = period_bucket(history.c.cooked_at, 'day')
+    monday = period_bucket(history.c.cooked_at, 'week')
+
+    for period, start in ((DAY, day), (WEEK, monday), (TOTAL, literal(TOTAL_START))):
+        session.execute(
+            core_insert(HistoryRollup).from_select(
+                ['period', 'period_start', 'recipe_id', 'cook_count', 'servings_made'],
+                select(
+                    literal(period),
+                    start,
+                    history.c.recipe_id,
+                    func.count(),
+                    func.sum(history.c.servings_made)
+                ).group_by(start, history.c.recipe_id)
+            )
+        )
+
+
+def range_totals(start, end, session=None):
+    """Cozimentos e porções entre start e end (datas, inclusivo).
+
+    Semanas inteiras vêm das linhas semanais e só as bordas das diárias:
+    no máximo ~2 semanas de linhas diárias, independente do tamanho do período.
+    """
+    session = session or db.session
+    first_full_week = week_start(start) if start == week_start(start) else week_start(start) + timedelta(days=7)
+    after_last_full_week = week_start(end + timedelta(days=1))
+
+    if first_full_week >= after_last_full_week:
+        conditions = [(DAY, start, end)]
+    else:
+        conditions = [
+            (DAY, start, first_full_week - timedelta(days=1)),
+            (WEEK, first_full_week, after_last_full_week - timedelta(days=7)),
+            (DAY, after_last_full_week, end),
+        ]
+
+    cooks = servings = 0
+    for period, low, high in conditions:
+        if low > high:
+            continue
+        row = session.query(
+            func.coalesce(func.sum(HistoryRollup.cook_count), 0),
+            func.coalesce(func.sum(HistoryRollup.servings_made), 0)
+        ).filter(
+            HistoryRollup.period == period,
+            HistoryRollup.period_start >= low,
+            HistoryRollup.period_start <= high
+        ).one()
+        cooks += row[0]
+        servings += row[1]
+    return {'cooks': cooks, 'servings': servings}
+
+
+def top_recipes(limit=10, session=None):
+    """Receitas mais feitas, das linhas de total (uma por receita)"""
+    session = session or db.session
+    rows = session.query(
+        Recipe.id, Recipe.name, HistoryRollup.cook_count
+    ).join(
+        HistoryRollup, HistoryRollup.recipe_id == Recipe.id
+    ).filter(
+        HistoryRollup.period == TOTAL
+    ).order_by(HistoryRollup.cook_count.desc(), Recipe.name).limit(limit).all()
+    return [
+        {'recipe_id': r.id, 'recipe_name': r.name, 'times_cooked': r.cook_count}
+        for r in rows
+    ]
+
+
+def total_cooks(session=None):
+    """Total de cozimentos registrados (soma das linhas de total)"""
+    session = session or db.session
+    return session.query(
+        func.coalesce(func.sum(HistoryRollup.cook_count), 0)
+    ).filter(HistoryRollup.period == TOTAL).scalar()
+
+
+def trending_recipes(limit=10, session=None):
+    """Receitas mais populares agora (decaimento exponencial), pelo índice de popularity"""
+    session = session or db.session
+    now = datetime.utcnow()
+    recipes = session.query(Recipe).filter(Recipe.popularity > 0).order_by(
+        Recipe.popularity.desc(), Recipe.name
+    ).limit(limit).all()
+    return [
+        {'recipe_id': r.id, 'recipe_name': r.name, 'popularity_score': r.popularity_score(now)}
+        for r in recipes
+    ]
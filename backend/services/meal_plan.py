@@ -0,0 +1,123 @@
+"""
+Plano de refeições: necessidade de ingredientes e geração da lista de compras
+"""
+
+from datetime import datetime
+from sqlalchemy import func, select, and_, or_, literal, text
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Recipe, RecipeIngredient, Ingredient, ShoppingList, MealPlanEntry
+
+
+def _requirements_select(start, end, by_date=False):
+    """Quantidade necessária por ingrediente (e por dia, se by_date) para o plano entre start e end.
+
+    Um único GROUP BY sobre plano x receita x ingredientes da receita, com a
+    mesma escala do cook_recipe: quantity_needed / recipe.servings * porções planejadas.
+    """
+    servings = func.coalesce(func.nullif(Recipe.servings, 0), 1)
+    columns = [RecipeIngredient.ingredient_id.label('ingredient_id')]
+    group_by = [RecipeIngredient.ingredient_id]
+    if by_date:
+        columns.append(MealPlanEntry.planned_date.label('planned_date'))
+        group_by.append(MealPlanEntry.planned_date)
+    columns.append(
+        func.sum(RecipeIngredient.quantity_needed * MealPlanEntry.servings / servings).label('required')
+    )
+    return select(*columns).select_from(MealPlanEntry).join(
+        Recipe, Recipe.id == MealPlanEntry.recipe_id
+    ).join(
+        RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id
+    ).where(
+        MealPlanEntry.planned_date >= start,
+        MealPlanEntry.planned_date <= end
+    ).group_by(*group_by)
+
+
+def required_quantities(start, end):
+    """Subconsulta: quantidade total necessária por ingrediente no período"""
+    return _requirements_select(start, end).subquery('required')
+
+
+def daily_requirements(start, end, session=None):
+    """Necessidade por (ingrediente, dia) no período: [(ingredient_id, date, quantidade)]"""
+    session = session or db.session
+    return session.execute(_requirements_select(start, end, by_date=True)).all()
+
+
+def _shortfall_select(start, end):
+    """Necessário, em estoque, pendente na lista e falta, por ingrediente (uma consulta)"""
+    required = required_quantities(start, end)
+    pending = func.coalesce(ShoppingList.quantity_needed, 0)
+    in_stock = func.max(Ingredient.quantity, 0)
+    shortfall = required.c.required - in_stock - pending
+    return select(
+        Ingredient.id.label('ingredient_id'),
+        Ingredient.name.label('ingredient_name'),
+        Ingredient.unit.label('unit'),
+        Ingredient.unlimited.label('unlimited'),
+        required.c.required.label('required'),
+        in_stock.label('in_stock'),
+        pending.label('pending'),
+        shortfall.label('shortfall')
+    ).select_from(required).join(
+        Ingredient, Ingredient.id == required.c.ingredient_id
+    ).outerjoin(
+        ShoppingList,
+        and_(ShoppingList.ingredient_id == Ingredient.id, ShoppingList.purchased.is_(False))
+    )
+
+
+def plan_requirements(start, end, session=None):
+    """Lista de necessidades do plano, com a falta de cada ingrediente"""
+    session = session or db.session
+    rows = session.execute(
+        _shortfall_select(start, end).order_by(Ingredient.name)
+    ).mappings().all()
+    result = []
+    for row in rows:
+        shortfall = 0 if row['unlimited'] else max(0.0, row['shortfall'])
+        result.append({
+            'ingredient_id': row['ingredient_id'],
+            'ingredient_name': row['ingredient_name'],
+            'unit': row['unit'],
+            'required': round(row['required'], 2),
+            'in_stock': row['in_stock'],
+            'pending': row['pending'],
+            'shortfall': round(shortfall, 2)
+        })
+    return result
+
+
+def generate_shopping_list(start, end, session=None):
+    """Inserir na lista de compras apenas a falta do plano, num único statement.
+
+    INSERT ... SELECT sobre a agregação do plano; quando o ingrediente já tem item
+    pendente, o índice único parcial dispara o ON CONFLICT, que soma a falta
+    ao item existente. Regerar sem mudanças no plano/estoque não altera nada.
+
+    Retorna [(ingredient_id, quantity_needed final)] dos itens inseridos/atualizados.
+    """
+    session = session or db.session
+    shortfall = _shortfall_select(start, end).subquery('shortfall')
+
+    candidates = select(
+        shortfall.c.ingredient_id,
+        func.round(shortfall.c.shortfall, 2),
+        literal(datetime.utcnow()),
+        literal(False)
+    ).where(
+        or_(shortfall.c.unlimited.is_(False), shortfall.c.unlimited.is_(None)),
+        func.round(shortfall.c.shortfall, 2) > 0
+    )
+
+    statement = insert(ShoppingList).from_select(
+        ['ingredient_id', 'quantity_needed', 'added_at', 'purchased'],
+        candidates
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['ingredient_id'],
+        index_where=text('purchased = 0'),
+        set_={'quantity_needed': ShoppingList.quantity_needed + statement.excluded.quantity_needed}
+    ).returning(ShoppingList.ingredient_id, ShoppingList.quantity_needed)
+
+    return [tuple(row) for row in session.execute(statement)]
@@ -0,0 +1,133 @@
+"""
+Embalagens: arredondar a quantidade da lista de compras para embalagens inteiras,
+escolhendo a combinação mais barata
+"""
+
+import math
+from functools import reduce
+from models import db, IngredientPack
+from services.cache import cached, register_dependency
+
+PACK_PLANS_CACHE = 'pack_plans'
+register_dependency(PACK_PLANS_CACHE, IngredientPack)
+
+SCALE = 1000        # Resolução: 0,001 da unidade do ingrediente
+MAX_STATES = 20000  # Acima disso o solver cai para a heurística gulosa
+
+
+def _cost(pack, priced):
+    # Com preços: menor custo. Sem preços: menor quantidade comprada (menos sobra)
+    return pack['price'] if priced else pack['size']
+
+
+def solve_packs(packs, needed):
+    """Combinação de embalagens que cobre `needed` com o menor custo.
+
+    packs: [{'id', 'size', 'price', 'label'}]. Knapsack de cobertura limitado:
+    as quantidades são levadas para uma grade inteira (MDC dos tamanhos) e a
+    programação dinâmica vai até needed + maior embalagem. Empates são
+    decididos por menos sobra e depois por menos embalagens.
+
+    Retorna {'packs': [{'pack_id', 'size', 'label', 'count'}], 'quantity', 'cost'}
+    ou None se não houver embalagens.
+    """
+    packs = [p for p in packs if p['size'] and p['size'] > 0]
+    if not packs:
+        return None
+    if needed <= 0:
+        return {'packs': [], 'quantity': 0, 'cost': 0 if _all_priced(packs) else None}
+
+    priced = _all_priced(packs)
+    units = [max(1, int(round(p['size'] * SCALE))) for p in packs]
+    step = reduce(math.gcd, units)
+    sizes = [u // step for u in units]
+    target = math.ceil(round(needed * SCALE, 6) / step)
+    limit = target + max(sizes)
+
+    if limit > MAX_STATES:
+        return _greedy(packs, needed, priced)
+
+    # best[c] = (custo, número de embalagens, índice da última, c anterior)
+    best = [None] * (limit + 1)
+    best[0] = (0.0, 0, None, None)
+    for c in range(1, limit + 1):
+        for i, size in enumerate(sizes):
+            if size > c or best[c - size] is None:
+                continue
+            prev = best[c - size]
+            candidate = (prev[0] + _cost(packs[i], priced), prev[1] + 1, i, c - size)
+            if best[c] is None or candidate[:2] < best[c][:2]:
+                best[c] = candidate
+
+    options = [
+        (best[c][0], c, best[c][1], c)
+        for c in range(target, limit + 1) if best[c] is not None
+    ]
+    if not options:
+        return _greedy(packs, needed, priced)
+    _, _, _, covered = min(options)
+
+    counts = [0] * len(packs)
+    c = covered
+    while c:
+        _, _, i, prev = best[c]
+        counts[i] += 1
+        c = prev
+    return _result(packs, counts, priced)
+
+
+def _all_priced(packs):
+    return all(p.get('price') is not None for p in packs)
+
+
+def _greedy(packs, needed, priced):
+    """Para quantidades enormes: só a embalagem de melhor custo por unidade"""
+    best = min(range(len(packs)), key=lambda i: (_cost(packs[i], priced) / packs[i]['size'], -packs[i]['size']))
+    counts = [0] * len(packs)
+    counts[best] = math.ceil(round(needed / packs[best]['size'], 9))
+    return _result(packs, counts, priced)
+
+
+def _result(packs, counts, priced):
+    chosen = [
+        {'pack_id': p['id'], 'size': p['size'], 'label': p['label'], 'price': p['price'], 'count': n}
+        for p, n in zip(packs, counts) if n
+    ]
+    chosen.sort(key=lambda p: -p['size'])
+    return {
+        'packs': chosen,
+        'quantity': round(sum(p['size'] * p['count'] for p in chosen), 3),
+        'cost': round(sum(p['price'] * p['count'] for p in chosen), 2) if priced else None
+    }
+
+
+def packs_by_ingredient(ingredient_ids, session=None):
+    """Embalagens de vários ingredientes numa única consulta: {ingredient_id: [pack dict]}"""
+    session = session or db.session
+    result = {}
+    if not ingredient_ids:
+        return result
+    for pack in session.query(IngredientPack).filter(IngredientPack.ingredient_id.in_(list(ingredient_ids))):
+        result.setdefault(pack.ingredient_id, []).append(pack.to_dict())
+    return result
+
+
+def pack_plan(ingredient_id, needed, packs):
+    """solve_packs em cache por (ingrediente, quantidade necessária)"""
+    return cached(
+        PACK_PLANS_CACHE,
+        (ingredient_id, round(needed, 6)),
+        lambda: solve_packs(packs, needed)
+    )
+
+
+def attach_pack_plans(items):
+    """Adicionar 'pack_plan' aos itens serializados da lista de compras (to_dict)"""
+    packs = packs_by_ingredient({item['ingredient_id'] for item in items})
+    for item in items:
+        ingredient_packs = packs.get(item['ingredient_id'])
+        item['pack_plan'] = (
+            pack_plan(item['ingredient_id'], item['quantity_needed'], ingredient_packs)
+            if ingredient_packs else None
+        )
+    return items
@@ -0,0 +1,85 @@
+"""
+Compras: marcar itens da lista como comprados e repor o estoque em massa
+"""
+
+from datetime import datetime
+from sqlalchemy import case, insert, select, update
+from models import db, Ingredient, ShoppingList, StockMovement, PriceRecord
+
+
+def purchase_items(quantities, add_to_stock=False, prices=None, session=None):
+    """Marcar vários itens como comprados numa única transação.
+
+    quantities: {shopping_item_id: quantidade comprada ou None (usa quantity_needed)}
+    prices: {shopping_item_id: preço por unidade} opcional, gravado em price_history
+
+    Usa um SELECT para os itens pendentes, um UPDATE para marcá-los, um UPDATE
+    com CASE para somar ao estoque (incremento no SQL, sem ler-modificar-gravar)
+    e INSERTs em massa em stock_movements e price_history. Não faz commit.
+
+    Retorna {item_id: quantidade adicionada ao estoque (0 se add_to_stock=False)}
+    apenas para os itens que estavam pendentes.
+    """
+    session = session or db.session
+    if not quantities:
+        return {}
+
+    pending = session.execute(
+        select(ShoppingList.id, ShoppingList.ingredient_id, ShoppingList.quantity_needed).where(
+            ShoppingList.id.in_(list(quantities)),
+            ShoppingList.purchased.is_(False)
+        )
+    ).all()
+    if not pending:
+        return {}
+
+    now = datetime.utcnow()
+    item_ids = [row.id for row in pending]
+    session.execute(
+        update(ShoppingList).where(ShoppingList.id.in_(item_ids)).values(
+            purchased=True,
+            purchased_at=now
+        ).execution_options(synchronize_session='fetch')
+    )
+
+    prices = prices or {}
+    added = {}
+    per_ingredient = {}
+    movements = []
+    price_records = []
+    for row in pending:
+        quantity = quantities.get(row.id)
+        if quantity is None:
+            quantity = row.quantity_needed
+        added[row.id] = quantity if add_to_stock else 0
+        if prices.get(row.id) is not None:
+            price_records.append({
+                'ingredient_id': row.ingredient_id,
+                'price_per_unit': prices[row.id],
+                'quantity': quantity,
+                'shopping_item_id': row.id,
+                'recorded_at': now
+            })
+        if add_to_stock and quantity:
+            per_ingredient[row.ingredient_id] = per_ingredient.get(row.ingredient_id, 0) + quantity
+            movements.append({
+                'ingredient_id': row.ingredient_id,
+                'quantity_change': quantity,
+                'reason': 'purchase',
+                'reference_id': row.id,
+                'created_at': now
+            })
+
+    if per_ingredient:
+        session.execute(
+            update(Ingredient).where(Ingredient.id.in_(list(per_ingredient))).values(
+                quantity=Ingredient.quantity + case(per_ingredient, value=Ingredient.id, else_=0),
+                updated_at=now
+            ).execution_options(synchronize_session='fetch')
+        )
+        session.execute(insert(StockMovement), movements)
+
+    if price_records:
+        session.execute(insert(PriceRecord), price_records)
+
+    return added
@@ -0,0 +1,234 @@
+"""
+Pontos de reposição dinâmicos: quando comprar e quanto comprar, a partir do consumo real.
+
+Também concentra a regra "adicionar à lista de compras se estiver baixo": todo
+ingrediente cuja quantidade diminuiu numa transação é anotado no flush, e quem
+baixa o estoque (cozinhar, descartar, editar a quantidade) chama apply_reorders()
+antes do commit para avaliá-los de uma vez (uma consulta + um insert em massa).
+Commits que não chamam apply_reorders() (scripts de seed, reset) não criam itens.
+
+O índice único parcial em shopping_list(ingredient_id) WHERE purchased = 0
+garante no máximo um item pendente por ingrediente; os inserts usam
+ON CONFLICT DO NOTHING e nunca falham por duplicidade.
+"""
+
+import json
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, and_, or_, case, cast, exists, func, inspect, literal, select, Integer, Float
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from models import db, Ingredient, ShoppingList
+from services.forecast import consumption_rates
+
+DEFAULT_LEAD_TIME_DAYS = 2   # Dias até a compra chegar na despensa
+DEFAULT_SAFETY_DAYS = 2      # Estoque de segurança, em dias de consumo
+DEFAULT_COVER_DAYS = 7       # Dias de consumo que uma compra deve cobrir
+DEFAULT_ORDER_QUANTITY = 100  # Sem histórico nem mínimo configurado
+
+
+def _settings():
+    config = current_app.config
+    return (
+        config.get('REORDER_LEAD_TIME_DAYS', DEFAULT_LEAD_TIME_DAYS),
+        config.get('REORDER_SAFETY_DAYS', DEFAULT_SAFETY_DAYS),
+        config.get('REORDER_COVER_DAYS', DEFAULT_COVER_DAYS),
+    )
+
+
+def reorder_point(ingredient, rate=None, settings=None):
+    """Quantidade em estoque a partir da qual o ingrediente deve ser comprado.
+
+    Consumo diário x (prazo de entrega + dias de segurança), nunca abaixo do
+    minimum_quantity configurado manualmente.
+    """
+    if rate is None:
+        rate = consumption_rates().get(ingredient.id, 0.0)
+    lead_time, safety, _ = settings or _settings()
+    return max(ingredient.minimum_quantity or 0, rate * (lead_time + safety))
+
+
+def order_quantity(ingredient, rate=None, settings=None):
+    """Quanto comprar: o suficiente para voltar ao ponto de reposição + dias de cobertura"""
+    if rate is None:
+        rate = consumption_rates().get(ingredient.id, 0.0)
+    if rate <= 0:
+        return ingredient.minimum_quantity or DEFAULT_ORDER_QUANTITY
+
+    lead_time, safety, cover = settings or _settings()
+    target = max(ingredient.minimum_quantity or 0, rate * (lead_time + safety + cover))
+    quantity = target - max(0.0, ingredient.quantity or 0)
+    # round (e não ceil) para bater com o ROUND(..., 2) do INSERT em massa de insert_low_stock_items
+    return round(max(quantity, rate * cover), 2)
+
+
+def needs_reorder(ingredient, rate=None, settings=None):
+    """Se o estoque acabou ou chegou ao ponto de reposição (ilimitados nunca entram).
+
+    Mesma regra do WHERE de insert_low_stock_items.
+    """
+    if ingredient.unlimited:
+        return False
+    quantity = ingredient.quantity or 0
+    point = reorder_point(ingredient, rate, settings)
+    return quantity <= 0 or (point > 0 and quantity <= point)
+
+
+def reorder_plan(ingredients):
+    """Ponto de reposição, quantidade sugerida e situação para vários ingredientes de uma vez"""
+    rates = consumption_rates()
+    settings = _settings()
+    plan = []
+    for ingredient in ingredients:
+        rate = rates.get(ingredient.id, 0.0)
+        plan.append({
+            'ingredient_id': ingredient.id,
+            'ingredient_name': ingredient.name,
+            'unit': ingredient.unit,
+            'quantity': ingredient.quantity,
+            'minimum_quantity': ingredient.minimum_quantity,
+            'daily_rate': round(rate, 4),
+            'reorder_point': round(reorder_point(ingredient, rate, settings), 2),
+            'order_quantity': order_quantity(ingredient, rate, settings),
+            'needs_reorder': needs_reorder(ingredient, rate, settings)
+        })
+    return plan
+
+
+def _track_quantity_changes(session, flush_context):
+    """Anotar os ingredientes cuja quantidade mudou, com a quantidade do início da transação"""
+    touched = session.info.setdefault('reorder_touched', {})
+    for obj in session.dirty:
+        if not isinstance(obj, Ingredient):
+            continue
+        history = inspect(obj).attrs.quantity.history
+        if history.deleted and obj.id not in touched:
+            touched[obj.id] = history.deleted[0]
+
+
+def _discard_touched(session, *args):
+    # Fim da transação (commit ou rollback): as anotações não avaliadas são descartadas
+    session.info.pop('reorder_touched', None)
+
+
+def init_reorder_tracking():
+    """Registrar os listeners de sessão (idempotente)"""
+    if event.contains(Session, 'after_flush', _track_quantity_changes):
+        return
+    event.listen(Session, 'after_flush', _track_quantity_changes)
+    event.listen(Session, 'after_commit', _discard_touched)
+    event.listen(Session, 'after_soft_rollback', _discard_touched)
+
+
+def apply_reorders(session=None, source_history_id=None):
+    """Adicionar à lista de compras os ingredientes que diminuíram na transação atual
+    e estão em zero ou no ponto de reposição. Não faz commit.
+
+    Vale para qualquer diminuição que termine no ponto de reposição, mesmo que o
+    estoque já estivesse abaixo dele antes. Ingredientes que já têm item pendente na lista são ignorados.
+    source_history_id liga os itens criados ao cozimento que os gerou.
+    Retorna os nomes dos ingredientes adicionados.
+    """
+    session = session or db.session
+    session.flush()
+
+    touched = session.info.pop('reorder_touched', {})
+    ids = list(touched)
+    if not ids:
+        return []
+
+    # Uma consulta: ingredientes + item pendente (se houver)
+    rows = session.query(Ingredient, ShoppingList.id).outerjoin(
+        ShoppingList,
+        and_(ShoppingList.ingredient_id == Ingredient.id, ShoppingList.purchased.is_(False))
+    ).filter(
+        Ingredient.id.in_(ids)
+    ).all()
+
+    rates = consumption_rates()
+    settings = _settings()
+    to_insert = []
+    added = []
+    seen = set()
+    for ingredient, pending_id in rows:
+        if pending_id is not None or ingredient.id in seen or ingredient.unlimited:
+            continue
+        seen.add(ingredient.id)
+
+        rate = rates.get(ingredient.id, 0.0)
+        if ingredient.quantity >= touched[ingredient.id]:
+            continue
+        if not needs_reorder(ingredient, rate, settings):
+            continue
+
+        to_insert.append({
+            'ingredient_id': ingredient.id,
+            'quantity_needed': order_quantity(ingredient, rate, settings),
+            'source_history_id': source_history_id
+        })
+        added.append(ingredient.name)
+
+    # Um insert em massa (itens pendentes criados em paralelo são ignorados)
+    if to_insert:
+        session.execute(insert(ShoppingList).on_conflict_do_nothing(), to_insert)
+    return added
+
+
+def insert_low_stock_items(session=None):
+    """Adicionar à lista de compras, num único statement, todo ingrediente sem
+    estoque ou no ponto de reposição.
+
+    INSERT ... SELECT ... WHERE NOT EXISTS ... ON CONFLICT DO NOTHING: o ponto
+    de reposição e a quantidade são calculados no SQL (mesma fórmula de
+    reorder_point/order_quantity), com as taxas de consumo passadas como JSON.
+
+    Retorna os ids dos ingredientes adicionados.
+    """
+    session = session or db.session
+    lead_time, safety, cover = _settings()
+    rates = consumption_rates()
+
+    if rates:
+        # Taxas como um único parâmetro JSON, expandido por json_each (sem limite de binds)
+        rates_json = func.json_each(json.dumps(rates)).table_valued('key', 'value')
+        rates_table = select(
+            cast(rates_json.c.key, Integer).label('ingredient_id'),
+            cast(rates_json.c.value, Float).label('rate')
+        ).cte('rates')
+        rate = func.coalesce(rates_table.c.rate, 0.0)
+    else:
+        rates_table = None
+        rate = literal(0.0)
+
+    minimum = func.coalesce(Ingredient.minimum_quantity, 0.0)
+    point = func.max(minimum, rate * (lead_time + safety))
+    target = func.max(minimum, rate * (lead_time + safety + cover))
+    quantity = case(
+        (rate <= 0, case((minimum > 0, minimum), else_=DEFAULT_ORDER_QUANTITY)),
+        else_=func.round(func.max(target - func.max(0.0, Ingredient.quantity), rate * cover), 2)
+    )
+
+    pending = exists().where(
+        ShoppingList.ingredient_id == Ingredient.id,
+        ShoppingList.purchased.is_(False)
+    )
+    candidates = select(
+        Ingredient.id,
+        quantity,
+        literal(datetime.utcnow()),
+        literal(False)
+    )
+    if rates_table is not None:
+        candidates = candidates.outerjoin(rates_table, rates_table.c.ingredient_id == Ingredient.id)
+    candidates = candidates.where(
+        or_(Ingredient.unlimited.is_(False), Ingredient.unlimited.is_(None)),
+        or_(Ingredient.quantity <= 0, and_(point > 0, Ingredient.quantity <= point)),
+        ~pending
+    )
+
+    statement = insert(ShoppingList).from_select(
+        ['ingredient_id', 'quantity_needed', 'added_at', 'purchased'],
+        candidates
+    ).on_conflict_do_nothing().returning(ShoppingList.ingredient_id)
+
+    return [row.ingredient_id for row in session.execute(statement)]
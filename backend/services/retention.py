@@ -0,0 +1,99 @@
+"""
+Retenção: mover itens comprados e histórico antigo para tabelas de arquivo
+"""
+
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select, insert, literal, union_all
+from models import (
+    db, ShoppingList, ShoppingListArchive, CookingHistory, CookingHistoryArchive, Recipe
+)
+from services.cooking import detach_history
+
+DEFAULT_SHOPPING_RETENTION_DAYS = 30
+DEFAULT_HISTORY_RETENTION_DAYS = 730
+
+
+def archive_purchased_items(older_than_days=None, now=None, session=None):
+    """Mover itens comprados há mais de `older_than_days` dias para shopping_list_archive.
+
+    Um INSERT ... SELECT e um DELETE com o mesmo filtro, na transação da
+    sessão (não faz commit). older_than_days=0 arquiva todos os comprados.
+    Retorna o número de itens arquivados.
+    """
+    session = session or db.session
+    if older_than_days is None:
+        older_than_days = current_app.config.get('SHOPPING_RETENTION_DAYS', DEFAULT_SHOPPING_RETENTION_DAYS)
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=older_than_days)
+
+    purchased_at = func.coalesce(ShoppingList.purchased_at, ShoppingList.added_at)
+    condition = [ShoppingList.purchased.is_(True), purchased_at <= cutoff]
+
+    session.execute(
+        insert(ShoppingListArchive).from_select(
+            ['original_id', 'ingredient_id', 'quantity_needed', 'added_at', 'purchased_at', 'archived_at'],
+            select(
+                ShoppingList.id,
+                ShoppingList.ingredient_id,
+                ShoppingList.quantity_needed,
+                ShoppingList.added_at,
+                purchased_at,
+                literal(now)
+            ).where(*condition)
+        )
+    )
+    return ShoppingList.query.filter(*condition).delete(synchronize_session=False)
+
+
+def archive_history(older_than_days=None, now=None, session=None):
+    """Mover registros de cooking_history mais antigos que `older_than_days` dias.
+
+    Guarda o nome da receita junto, para o arquivo continuar legível mesmo
+    depois que a receita for apagada. Não faz commit.
+    Retorna o número de registros arquivados.
+    """
+    session = session or db.session
+    if older_than_days is None:
+        older_than_days = current_app.config.get('HISTORY_RETENTION_DAYS', DEFAULT_HISTORY_RETENTION_DAYS)
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=older_than_days)
+
+    condition = CookingHistory.cooked_at < cutoff
+    detach_history(select(CookingHistory.id).where(condition), session)
+
+    session.execute(
+        insert(CookingHistoryArchive).from_select(
+            ['original_id', 'recipe_id', 'recipe_name', 'servings_made', 'cooked_at', 'notes', 'archived_at'],
+            select(
+                CookingHistory.id,
+                CookingHistory.recipe_id,
+                Recipe.name,
+                CookingHistory.servings_made,
+                CookingHistory.cooked_at,
+                CookingHistory.notes,
+                literal(now)
+            ).outerjoin(Recipe, Recipe.id == CookingHistory.recipe_id).where(condition)
+        )
+    )
+    return CookingHistory.query.filter(condition).delete(synchronize_session=False)
+
+
+def run_retention(shopping_days=None, history_days=None, session=None):
+    """Arquivar itens comprados e histórico antigo (sem commit)"""
+    now = datetime.utcnow()
+    return {
+        'shopping_items_archived': archive_purchased_items(shopping_days, now, session),
+        'history_archived': archive_history(history_days, now, session)
+    }
+
+
+def all_history():
+    """Subconsulta com o histórico ativo e o arquivado: (recipe_id, servings_made, cooked_at)
+
+    Para análises que precisam de todo o período, não só das tabelas quentes.
+    """
+    return union_all(
+        select(CookingHistory.recipe_id, CookingHistory.servings_made, CookingHistory.cooked_at),
+        select(CookingHistoryArchive.recipe_id, CookingHistoryArchive.servings_made, CookingHistoryArchive.cooked_at)
+    ).subquery('all_history')
@@ -0,0 +1,82 @@
+"""
+Estatísticas da lista de compras: contagens e custo estimado dos itens pendentes.
+
+Os contadores ficam em cache. Itens novos são somados a eles no próximo acesso
+(sem reler a tabela); compras, edições, remoções e mudanças de preço forçam o
+recálculo pela consulta agregada.
+"""
+
+from sqlalchemy import and_, case, func, select
+from models import db, ShoppingList, IngredientPack, PriceRecord
+from services.cache import cached_incremental, register_dependency, register_append_handler
+from services.costs import unit_prices
+
+STATS_CACHE = 'shopping_stats'
+register_dependency(STATS_CACHE, ShoppingList, IngredientPack, PriceRecord)
+register_append_handler(
+    STATS_CACHE,
+    ShoppingList,
+    lambda item: (item.ingredient_id, item.quantity_needed, bool(item.purchased))
+)
+
+
+def _compute_counters():
+    """Contagens e custo num único SELECT com agregados condicionais.
+
+    O custo usa o último preço pago por unidade ou, sem histórico, o da
+    embalagem mais barata (sem arredondar para embalagens inteiras); itens
+    pendentes sem preço entram em unpriced.
+    """
+    prices = unit_prices()
+
+    pending = ShoppingList.purchased.is_(False)
+    total, pending_count, cost, unpriced = db.session.query(
+        func.count(ShoppingList.id),
+        func.sum(case((pending, 1), else_=0)),
+        func.sum(case((pending, ShoppingList.quantity_needed * prices.c.price), else_=0)),
+        func.sum(case((and_(pending, prices.c.price.is_(None)), 1), else_=0))
+    ).outerjoin(
+        prices, prices.c.ingredient_id == ShoppingList.ingredient_id
+    ).one()
+    return {
+        'total': total or 0,
+        'pending': pending_count or 0,
+        'cost': cost or 0.0,
+        'unpriced': unpriced or 0
+    }
+
+
+def _apply_new_items(counters, events):
+    """Somar os itens inseridos desde o último acesso (preços só dos ingredientes novos)"""
+    counters = dict(counters)
+    counters['total'] += len(events)
+    pending = [(ingredient_id, quantity) for ingredient_id, quantity, purchased in events if not purchased]
+    if not pending:
+        return counters
+
+    prices = unit_prices()
+    price_by_id = dict(db.session.execute(
+        select(prices.c.ingredient_id, prices.c.price).where(
+            prices.c.ingredient_id.in_({ingredient_id for ingredient_id, _ in pending})
+        )
+    ).all())
+    for ingredient_id, quantity in pending:
+        counters['pending'] += 1
+        price = price_by_id.get(ingredient_id)
+        if price is None:
+            counters['unpriced'] += 1
+        elif quantity is not None:
+            counters['cost'] += quantity * price
+    return counters
+
+
+def shopping_stats():
+    """Total, pendentes, comprados e custo estimado dos pendentes"""
+    counters = cached_incremental(STATS_CACHE, None, _compute_counters, _apply_new_items)
+    return {
+        'total': counters['total'],
+        'pending': counters['pending'],
+        'purchased': counters['total'] - counters['pending'],
+        'estimated_cost': round(counters['cost'], 2),
+        'unpriced': counters['unpriced']
+    }
@@ -0,0 +1,132 @@
+"""
+Simulação do estoque ao longo do plano de refeições: quando cada ingrediente acaba ou vence
+"""
+
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import func
+from models import db, Ingredient, ShoppingList
+from services.meal_plan import daily_requirements
+from services.reorder import DEFAULT_LEAD_TIME_DAYS
+
+MAX_HORIZON_DAYS = 365
+
+
+def _pending_purchases(session):
+    """Quantidade pendente na lista de compras por ingrediente"""
+    return dict(session.query(
+        ShoppingList.ingredient_id,
+        func.sum(ShoppingList.quantity_needed)
+    ).filter(
+        ShoppingList.purchased.is_(False)
+    ).group_by(ShoppingList.ingredient_id).all())
+
+
+def simulate_stock(start, horizon_days, include_purchases=True, session=None):
+    """Replay dia a dia do plano sobre o estoque atual.
+
+    - Consumo: necessidades do plano por (ingrediente, dia), numa única consulta.
+    - Compras: itens pendentes na lista chegam após REORDER_LEAD_TIME_DAYS
+      (as que não chegam dentro do horizonte são ignoradas).
+    - Validade: no dia seguinte ao vencimento, o que sobrou do estoque
+      original é descartado (compras novas são consideradas frescas).
+
+    Só ingredientes com consumo ou compra no período são simulados; os eventos
+    ficam em dicionários esparsos e cada ingrediente percorre o horizonte uma vez.
+    """
+    session = session or db.session
+    horizon_days = max(1, min(horizon_days, MAX_HORIZON_DAYS))
+    end = start + timedelta(days=horizon_days - 1)
+
+    demand = {}
+    for ingredient_id, planned_date, required in daily_requirements(start, end, session):
+        offset = (planned_date - start).days
+        demand.setdefault(ingredient_id, {})[offset] = required or 0
+
+    arrivals = {}
+    if include_purchases:
+        lead_time = current_app.config.get('REORDER_LEAD_TIME_DAYS', DEFAULT_LEAD_TIME_DAYS)
+        # Compras que só chegariam depois do horizonte ficam de fora
+        if lead_time < horizon_days:
+            for ingredient_id, quantity in _pending_purchases(session).items():
+                arrivals[ingredient_id] = {lead_time: quantity or 0}
+
+    ingredient_ids = set(demand) | set(arrivals)
+    if not ingredient_ids:
+        return []
+
+    ingredients = session.query(Ingredient).filter(Ingredient.id.in_(ingredient_ids)).all()
+    results = []
+    for ingredient in ingredients:
+        results.append(_simulate_ingredient(
+            ingredient,
+            start,
+            horizon_days,
+            demand.get(ingredient.id, {}),
+            arrivals.get(ingredient.id, {})
+        ))
+
+    results.sort(key=lambda r: (
+        r['runs_out_on'] is None,
+        r['runs_out_on'] or '',
+        r['ingredient_name']
+    ))
+    return results
+
+
+def _simulate_ingredient(ingredient, start, horizon_days, demand, arrivals):
+    """Linha do tempo de um ingrediente (um valor de estoque por dia)"""
+    unlimited = bool(ingredient.unlimited)
+    original = max(0.0, ingredient.quantity or 0)   # Estoque atual (sujeito à validade)
+    fresh = 0.0                                     # Compras que chegam no período
+
+    expiry_offset = None
+    if ingredient.expiry_date is not None:
+        expiry_offset = (ingredient.expiry_date - start).days
+
+    timeline = []
+    runs_out_on = None
+    max_shortfall = 0.0
+    expired_quantity = 0.0
+
+    if expiry_offset is not None and expiry_offset < 0:
+        # Já vencido antes do início da simulação
+        expired_quantity = original
+        original = 0.0
+
+    for day in range(horizon_days):
+        fresh += arrivals.get(day, 0.0)
+
+        # O vencido é descartado antes do consumo do dia seguinte ao vencimento
+        if expiry_offset is not None and day == expiry_offset + 1 and original > 0:
+            expired_quantity += original
+            original = 0.0
+
+        need = demand.get(day, 0.0)
+        if need and not unlimited:
+            # Usa primeiro o estoque que vence, depois as compras novas
+            used = min(original, need)
+            original -= used
+            need -= used
+            fresh -= need
+
+        stock = original + fresh
+        timeline.append(round(stock, 2))
+
+        if stock < 0:
+            if runs_out_on is None:
+                runs_out_on = (start + timedelta(days=day)).isoformat()
+            max_shortfall = max(max_shortfall, -stock)
+
+    return {
+        'ingredient_id': ingredient.id,
+        'ingredient_name': ingredient.name,
+        'unit': ingredient.unit,
+        'initial_stock': ingredient.quantity,
+        'expiry_date': ingredient.expiry_date.isoformat() if ingredient.expiry_date else None,
+        'timeline': timeline,
+        'runs_out_on': runs_out_on,
+        'shortfall': round(max_shortfall, 2),
+        'expires_before_use': expired_quantity > 0,
+        'expired_quantity': round(expired_quantity, 2)
+    }
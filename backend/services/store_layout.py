@@ -0,0 +1,109 @@
+"""
+Layout da loja: ordenar a lista de compras pelo percurso dos corredores
+"""
+
+from sqlalchemy import func, and_
+from sqlalchemy.orm import aliased, contains_eager
+from models import db, StoreLayout, StoreAisle, ShoppingList, Ingredient
+
+UNASSIGNED_AISLE = 'Outros'
+UNASSIGNED_POSITION = 999999
+
+
+def get_layout(layout_id=None):
+    """Layout pedido, ou o padrão (None se não houver)"""
+    if layout_id is not None:
+        return StoreLayout.query.get(layout_id)
+    return StoreLayout.query.filter_by(is_default=True).first()
+
+
+def aisle_ordered(query, layout_id):
+    """Ordenar uma consulta de ShoppingList pelo percurso do layout, no próprio SQL.
+
+    Dois LEFT JOINs em store_aisles: um pela exceção do ingrediente e outro pela
+    categoria; a exceção vence. Itens sem corredor vão para o final.
+
+    Retorna uma consulta de (ShoppingList, nome do corredor, posição).
+    """
+    override = aliased(StoreAisle)
+    by_category = aliased(StoreAisle)
+    aisle_name = func.coalesce(override.name, by_category.name, UNASSIGNED_AISLE)
+    position = func.coalesce(override.position, by_category.position, UNASSIGNED_POSITION)
+
+    return query.join(
+        ShoppingList.ingredient
+    ).outerjoin(
+        override,
+        and_(override.layout_id == layout_id, override.ingredient_id == Ingredient.id)
+    ).outerjoin(
+        by_category,
+        and_(
+            by_category.layout_id == layout_id,
+            by_category.ingredient_id.is_(None),
+            by_category.category == Ingredient.category
+        )
+    ).options(
+        contains_eager(ShoppingList.ingredient)
+    ).add_columns(
+        aisle_name.label('aisle'),
+        position.label('aisle_position')
+    ).order_by(
+        position, aisle_name, Ingredient.name
+    )
+
+
+def group_by_aisle(items):
+    """Agrupar itens (já ordenados) em [{'aisle', 'position', 'items'}]"""
+    groups = []
+    for item in items:
+        if not groups or groups[-1]['aisle'] != item['aisle'] or groups[-1]['position'] != item['aisle_position']:
+            groups.append({'aisle': item['aisle'], 'position': item['aisle_position'], 'items': []})
+        groups[-1]['items'].append(item)
+    return groups
+
+
+def replace_aisles(layout, aisles_data):
+    """Substituir os corredores de um layout a partir do formato de to_dict().
+
+    Cada categoria e cada ingrediente só pode estar num corredor; senão o JOIN
+    de aisle_ordered devolveria o item uma vez por corredor.
+    """
+    seen_categories = set()
+    seen_ingredients = set()
+    for aisle in aisles_data:
+        for category in aisle.get('categories', []):
+            if category in seen_categories:
+                raise ValueError(f'Categoria "{category}" está em mais de um corredor')
+            seen_categories.add(category)
+        for ingredient_id in aisle.get('ingredient_ids', []):
+            if ingredient_id in seen_ingredients:
+                raise ValueError(f'Ingrediente {ingredient_id} está em mais de um corredor')
+            seen_ingredients.add(ingredient_id)
+
+    layout.aisles = []
+    if layout.id is not None:
+        # Apagar os corredores antigos antes de inserir os novos (índices únicos)
+        db.session.flush()
+    for index, aisle in enumerate(aisles_data):
+        name = aisle.get('name')
+        if not name:
+            raise ValueError('Cada corredor precisa de nome')
+        position = aisle.get('position', index + 1)
+        categories = aisle.get('categories', [])
+        ingredient_ids = aisle.get('ingredient_ids', [])
+        if not categories and not ingredient_ids:
+            # Corredor vazio: manter no layout mesmo sem regras
+            layout.aisles.append(StoreAisle(name=name, position=position))
+        for category in categories:
+            layout.aisles.append(StoreAisle(name=name, position=position, category=category))
+        for ingredient_id in ingredient_ids:
+            layout.aisles.append(StoreAisle(name=name, position=position, ingredient_id=ingredient_id))
+
+
+def set_default(layout):
+    """Marcar como padrão (e desmarcar os demais)"""
+    db.session.flush()
+    StoreLayout.query.filter(StoreLayout.id != layout.id).update(
+        {StoreLayout.is_default: False}, synchronize_session=False
+    )
+    layout.is_default = True
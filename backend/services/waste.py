@@ -0,0 +1,165 @@
+"""
+Desperdício: descartar ingredientes e refeições congeladas e relatório do que foi jogado fora
+"""
+
+from datetime import datetime
+from sqlalchemy import case, func, select
+from models import db, StockMovement, WasteRecord
+from services.cache import cached, register_dependency
+from services.costs import recipe_costs, unit_prices
+from services.reorder import apply_reorders
+
+WASTE_CACHE = 'waste_report'
+register_dependency(WASTE_CACHE, WasteRecord)
+
+WASTE_REASON = 'waste'
+WASTE_REASONS = ('expired', 'spoiled', 'leftover', 'other')
+WASTE_GROUPS = ('ingredient', 'category', 'month')
+FROZEN_MEAL_CATEGORY = 'Refeições congeladas'
+
+
+def _validate_reason(reason):
+    if reason not in WASTE_REASONS:
+        raise ValueError(f'reason deve ser um de: {", ".join(WASTE_REASONS)}')
+
+
+def discard_ingredient(ingredient, quantity=None, reason='expired', notes=None, session=None):
+    """Descartar parte (ou todo) o estoque de um ingrediente como desperdício. Não faz commit.
+
+    Baixa o estoque pelo ORM e aplica a regra de reposição (apply_reorders).
+    Grava o descarte com o custo pelo preço atual (unit_prices) e uma
+    movimentação 'waste' apontando para ele. Se o estoque zerar, a validade é limpa.
+    """
+    session = session or db.session
+    _validate_reason(reason)
+    available = max(0.0, ingredient.quantity or 0)
+    if quantity is None:
+        quantity = available
+    if not isinstance(quantity, (int, float)) or isinstance(quantity, bool) or quantity <= 0:
+        raise ValueError('quantity deve ser um número maior que zero')
+    if not ingredient.unlimited and quantity > available:
+        raise ValueError(f'Apenas {available} {ingredient.unit} em estoque')
+
+    prices = unit_prices()
+    price = session.execute(
+        select(prices.c.price).where(prices.c.ingredient_id == ingredient.id)
+    ).scalar()
+
+    now = datetime.utcnow()
+    record = WasteRecord(
+        ingredient_id=ingredient.id,
+        item_name=ingredient.name,
+        category=ingredient.category,
+        quantity=quantity,
+        unit=ingredient.unit,
+        reason=reason,
+        cost=round(price * quantity, 2) if price is not None else None,
+        notes=notes,
+        discarded_at=now
+    )
+    session.add(record)
+
+    if not ingredient.unlimited:
+        ingredient.quantity = round(available - quantity, 6)
+        if ingredient.quantity <= 0:
+            ingredient.expiry_date = None
+        ingredient.updated_at = now
+    session.flush()
+
+    session.add(StockMovement(
+        ingredient_id=ingredient.id,
+        quantity_change=-quantity,
+        reason=WASTE_REASON,
+        reference_id=record.id,
+        created_at=now
+    ))
+    apply_reorders(session=session)
+    return record
+
+
+def discard_frozen_meal(meal, portions=None, reason='expired', notes=None, session=None):
+    """Descartar porções de uma refeição congelada como desperdício. Não faz commit.
+
+    O custo é o custo por porção da receita, quando todos os ingredientes têm preço.
+    Sem porções restantes, a refeição passa a 'discarded'.
+    """
+    session = session or db.session
+    _validate_reason(reason)
+    remaining = meal.remaining_portions()
+    if portions is None:
+        portions = remaining
+    if not isinstance(portions, int) or isinstance(portions, bool) or portions <= 0:
+        raise ValueError('portions deve ser um número inteiro maior que zero')
+    if portions > remaining:
+        raise ValueError(f'Apenas {remaining} porções disponíveis')
+
+    cost = recipe_costs().get(meal.recipe_id)
+    record = WasteRecord(
+        frozen_meal_id=meal.id,
+        recipe_id=meal.recipe_id,
+        item_name=meal.recipe.name if meal.recipe else f'Refeição #{meal.id}',
+        category=FROZEN_MEAL_CATEGORY,
+        quantity=portions,
+        unit='porções',
+        reason=reason,
+        cost=round(cost['cost_per_serving'] * portions, 2) if cost and cost['complete'] else None,
+        notes=notes
+    )
+    session.add(record)
+
+    meal.discarded_portions = (meal.discarded_portions or 0) + portions
+    if meal.remaining_portions() <= 0:
+        meal.status = 'discarded'
+    meal.updated_at = datetime.utcnow()
+    session.flush()
+    return record
+
+
+def _compute_waste_report(group_by, start, end):
+    """Totais de desperdício por grupo num único GROUP BY sobre waste_records"""
+    if group_by == 'month':
+        keys = [func.strftime('%Y-%m', WasteRecord.discarded_at).label('month')]
+    elif group_by == 'category':
+        keys = [func.coalesce(WasteRecord.category, 'Sem categoria').label('category')]
+    else:
+        keys = [
+            WasteRecord.ingredient_id.label('ingredient_id'),
+            WasteRecord.recipe_id.label('recipe_id'),
+            WasteRecord.item_name.label('item_name'),
+            WasteRecord.unit.label('unit')
+        ]
+
+    cost = func.sum(WasteRecord.cost)
+    # Meses em ordem cronológica; os demais grupos do mais caro para o mais barato
+    order = keys if group_by == 'month' else [func.coalesce(cost, 0).desc(), *keys]
+    statement = select(
+        *keys,
+        func.sum(WasteRecord.quantity).label('quantity'),
+        cost.label('cost'),
+        func.count(WasteRecord.id).label('records'),
+        func.sum(case((WasteRecord.cost.is_(None), 1), else_=0)).label('unpriced')
+    ).group_by(*keys).order_by(*order)
+    if start is not None:
+        statement = statement.where(func.date(WasteRecord.discarded_at) >= start.isoformat())
+    if end is not None:
+        statement = statement.where(func.date(WasteRecord.discarded_at) <= end.isoformat())
+
+    groups = []
+    for row in db.session.execute(statement).mappings():
+        group = dict(row)
+        group['quantity'] = round(group['quantity'] or 0, 2)
+        group['cost'] = round(group['cost'] or 0, 2)
+        groups.append(group)
+    return {
+        'group_by': group_by,
+        'groups': groups,
+        'total_cost': round(sum(g['cost'] for g in groups), 2),
+        'total_records': sum(g['records'] for g in groups)
+    }
+
+
+def waste_report(group_by='ingredient', start=None, end=None):
+    """Relatório de desperdício por ingrediente, categoria ou mês, em cache até um novo descarte"""
+    if group_by not in WASTE_GROUPS:
+        raise ValueError(f'group_by deve ser um de: {", ".join(WASTE_GROUPS)}')
+    return cached(WASTE_CACHE, (group_by, start, end), lambda: _compute_waste_report(group_by, start, end))
@@ -16,10 +16,11 @@ def app():
     # Criar arquivo temporário para o banco de dados
     db_fd, db_path = tempfile.mkstemp(suffix='.db')
     
-    app = create_app()
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'TESTING': True,
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
     
     with app.app_context():
         db.create_all()
@@ -0,0 +1,151 @@
+"""
+Testes unitários para as análises de consumo
+"""
+import pytest
+import json
+from datetime import datetime
+from models import CookingHistory, CookingHistoryArchive
+
+
+class FakeDuckDBConnection:
+    """Conexão falsa que registra os statements executados"""
+    
+    def __init__(self):
+        self.statements = []
+        self.fail_load = False
+        self.closed = False
+    
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+        if self.fail_load and sql.startswith('LOAD'):
+            raise FakeDuckDBError('Extension "sqlite" not found')
+        return self
+    
+    def fetchall(self):
+        return []
+    
+    def close(self):
+        self.closed = True
+
+
+class FakeDuckDBError(Exception):
+    pass
+
+
+@pytest.fixture
+def fake_duckdb(monkeypatch):
+    """Módulo duckdb falso, para testar a conexão sem o pacote instalado"""
+    import services.duckdb_analytics as duckdb_analytics
+    
+    class FakeDuckDB:
+        Error = FakeDuckDBError
+        connection = FakeDuckDBConnection()
+        config = None
+        
+        @classmethod
+        def connect(cls, config=None):
+            cls.config = config
+            return cls.connection
+    
+    monkeypatch.setattr(duckdb_analytics, 'duckdb', FakeDuckDB)
+    return FakeDuckDB
+
+
+class TestConsumptionAnalytics:
+    """Testes para GET /api/analytics/consumption"""
+    
+    def test_monthly_consumption(self, client, db_session, sample_recipe):
+        """Testar consumo por mês, incluindo o histórico arquivado"""
+        # Receita: 2 tomates para 2 porções
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=2, cooked_at=datetime(2024, 1, 5)))
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=4, cooked_at=datetime(2024, 1, 20)))
+        db_session.add(CookingHistoryArchive(original_id=99, recipe_id=sample_recipe.id, servings_made=1,
+                                             cooked_at=datetime(2023, 12, 31)))
+        db_session.commit()
+        
+        response = client.get('/api/analytics/consumption?period=month')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data[0]['ingredient_name'] == 'Tomate'
+        assert data[0]['series'] == [
+            {'period': '2023-12', 'quantity': 1.0},
+            {'period': '2024-01', 'quantity': 6.0}
+        ]
+        assert data[0]['total'] == 7.0
+    
+    def test_weekly_buckets_and_cache_refresh(self, client, db_session, sample_recipe):
+        """Testar semanas começando na segunda e atualização após novo registro"""
+        # 2024-01-07 é domingo; 2024-01-08 é segunda
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=2, cooked_at=datetime(2024, 1, 7)))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/analytics/consumption?period=week').data)
+        assert [p['period'] for p in data[0]['series']] == ['2024-01-01']
+        
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=2, cooked_at=datetime(2024, 1, 8)))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/analytics/consumption?period=week').data)
+        assert [p['period'] for p in data[0]['series']] == ['2024-01-01', '2024-01-08']
+    
+    def test_invalid_period(self, client):
+        """Testar período inválido"""
+        response = client.get('/api/analytics/consumption?period=decade')
+        
+        assert response.status_code == 400
+
+
+class TestAnalyticsEngine:
+    """Testes para o modo de análise com DuckDB"""
+    
+    def test_falls_back_to_sqlite(self, client, app, monkeypatch):
+        """Testar que sem o pacote duckdb as análises continuam no SQLite"""
+        import services.duckdb_analytics as duckdb_analytics
+        monkeypatch.setattr(duckdb_analytics, 'duckdb', None)
+        app.config['ANALYTICS_ENGINE'] = 'duckdb'
+        
+        data = json.loads(client.get('/api/analytics/engine').data)
+        
+        assert data == {'engine': 'sqlite', 'duckdb_available': False}
+        assert client.get('/api/analytics/consumption').status_code == 200
+    
+    def test_connect_does_not_download_extension(self, app, fake_duckdb):
+        """Testar que a conexão só carrega a extensão sqlite, sem instalação automática"""
+        from services.duckdb_analytics import connect
+        
+        connect()
+        
+        assert fake_duckdb.config == {'autoinstall_known_extensions': False}
+        assert [sql for sql, _ in fake_duckdb.connection.statements] == ['LOAD sqlite']
+    
+    def test_missing_extension_fails_fast(self, app, fake_duckdb):
+        """Testar que sem a extensão instalada a conexão falha com RuntimeError"""
+        from services.duckdb_analytics import connect
+        fake_duckdb.connection.fail_load = True
+        
+        with pytest.raises(RuntimeError):
+            connect()
+        assert fake_duckdb.connection.closed
+    
+    def test_database_path_is_bound(self, app, fake_duckdb):
+        """Testar que o caminho do banco vai como parâmetro, não no texto do SQL"""
+        from services.duckdb_analytics import database_path, duckdb_consumption
+        
+        assert duckdb_consumption('day', category="x' OR '1'='1") == []
+        
+        sql, params = fake_duckdb.connection.statements[-1]
+        assert params == {'path': database_path(), 'category': "x' OR '1'='1"}
+        assert database_path() not in sql
+    
+    def test_duckdb_matches_sqlite(self, client, app, db_session, sample_recipe):
+        """Testar que o DuckDB devolve o mesmo consumo que o SQLite"""
+        pytest.importorskip('duckdb')
+        from services.consumption import _compute_consumption
+        from services.duckdb_analytics import duckdb_consumption
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=2, cooked_at=datetime(2024, 1, 7)))
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=4, cooked_at=datetime(2024, 1, 8)))
+        db_session.commit()
+        
+        for period in ('day', 'week', 'month', 'year'):
+            assert duckdb_consumption(period) == _compute_consumption(period, None, None, None, None)
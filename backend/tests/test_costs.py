@@ -0,0 +1,92 @@
+"""
+Testes unitários para histórico de preços e custo das receitas
+"""
+import pytest
+import json
+from models import ShoppingList, PriceRecord
+
+
+def _buy(client, db_session, ingredient_id, price):
+    item = ShoppingList(ingredient_id=ingredient_id, quantity_needed=1)
+    db_session.add(item)
+    db_session.commit()
+    return client.post(
+        f'/api/shopping-list/{item.id}/purchase',
+        data=json.dumps({'price_per_unit': price}),
+        content_type='application/json'
+    )
+
+
+class TestPriceHistory:
+    """Testes para o registro de preços na compra"""
+    
+    def test_purchase_records_price(self, client, db_session, sample_ingredient):
+        """Testar que a compra com price_per_unit grava o histórico"""
+        response = _buy(client, db_session, sample_ingredient.id, 1.5)
+        
+        assert response.status_code == 200
+        response = client.get(f'/api/ingredients/{sample_ingredient.id}/prices')
+        data = json.loads(response.data)
+        assert len(data) == 1
+        assert data[0]['price_per_unit'] == 1.5
+    
+    def test_invalid_price(self, client, sample_shopping_item):
+        """Testar preço inválido"""
+        response = client.post(
+            f'/api/shopping-list/{sample_shopping_item.id}/purchase',
+            data=json.dumps({'price_per_unit': -1}),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 400
+        assert PriceRecord.query.count() == 0
+    
+    def test_bulk_invalid_price(self, client, sample_shopping_item):
+        """Testar que a compra em massa valida o preço como a compra individual"""
+        for price in (-5, 0, '4.5'):
+            response = client.post(
+                '/api/shopping-list/purchase',
+                data=json.dumps({'items': [{'id': sample_shopping_item.id, 'price_per_unit': price}]}),
+                content_type='application/json'
+            )
+            
+            assert response.status_code == 400
+        assert PriceRecord.query.count() == 0
+        assert ShoppingList.query.filter_by(purchased=True).count() == 0
+
+
+class TestRecipeCosts:
+    """Testes para GET /api/recipes/costs e /api/recipes/<id>/cost"""
+    
+    def test_cost_without_prices(self, client, sample_recipe):
+        """Testar receita sem preços: custo incompleto"""
+        response = client.get(f'/api/recipes/{sample_recipe.id}/cost')
+        
+        data = json.loads(response.data)
+        assert data['complete'] is False
+        assert data['unpriced_ingredients'] == 1
+    
+    def test_latest_and_average(self, client, db_session, sample_recipe):
+        """Testar custo pelo último preço e pela média, com atualização após nova compra"""
+        ingredient_id = sample_recipe.recipe_ingredients[0].ingredient_id
+        recipe_id = sample_recipe.id
+        _buy(client, db_session, ingredient_id, 1.0)
+        
+        # Receita: 2 tomates para 2 porções
+        data = json.loads(client.get(f'/api/recipes/{recipe_id}/cost').data)
+        assert data['total_cost'] == 2.0
+        assert data['cost_per_serving'] == 1.0
+        assert data['complete'] is True
+        
+        _buy(client, db_session, ingredient_id, 2.0)
+        
+        latest = json.loads(client.get(f'/api/recipes/{recipe_id}/cost').data)
+        average = json.loads(client.get(f'/api/recipes/{recipe_id}/cost?method=average').data)
+        assert latest['cost_per_serving'] == 2.0
+        assert average['cost_per_serving'] == 1.5
+    
+    def test_invalid_method(self, client):
+        """Testar método inválido"""
+        response = client.get('/api/recipes/costs?method=median')
+        
+        assert response.status_code == 400
@@ -0,0 +1,70 @@
+"""
+Testes unitários para o serviço de validade e GET /api/expiring
+"""
+import pytest
+import json
+from datetime import date, datetime, timedelta
+from models import Ingredient, FrozenMeal
+
+
+@pytest.fixture
+def expiring_stock(db_session, sample_recipe):
+    """Ingredientes e refeições congeladas com validades variadas"""
+    today = date.today()
+    items = [
+        Ingredient(name='Iogurte', quantity=1, unit='unidades', expiry_date=today + timedelta(days=2)),
+        Ingredient(name='Queijo', quantity=1, unit='unidades', expiry_date=today + timedelta(days=12)),
+        Ingredient(name='Creme', quantity=1, unit='unidades', expiry_date=today - timedelta(days=1)),
+        FrozenMeal(recipe_id=sample_recipe.id, portions=2, frozen_at=datetime.utcnow(),
+                   expiry_date=today + timedelta(days=1), status='frozen'),
+        FrozenMeal(recipe_id=sample_recipe.id, portions=2, frozen_at=datetime.utcnow(),
+                   expiry_date=today + timedelta(days=3), status='consumed'),
+    ]
+    for item in items:
+        db_session.add(item)
+    db_session.commit()
+    return items
+
+
+class TestGetExpiringItems:
+    """Testes para GET /api/expiring"""
+    
+    def test_default_window(self, client, expiring_stock):
+        """Testar janela padrão de 7 dias com todos os estoques ordenados"""
+        response = client.get('/api/expiring')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['days'] == 7
+        assert [(i['type'], i['name']) for i in data['items']] == [
+            ('frozen_meal', 'Salada de Tomate'),
+            ('ingredient', 'Iogurte'),
+        ]
+        assert data['items'][0]['days_until_expiry'] == 1
+    
+    def test_custom_window(self, client, expiring_stock):
+        """Testar janela configurável via ?days="""
+        response = client.get('/api/expiring?days=15')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        names = [i['name'] for i in data['items']]
+        assert 'Queijo' in names
+        assert 'Creme' not in names
+        assert data['total'] == 3
+    
+    def test_config_window(self, app, client, expiring_stock):
+        """Testar janela definida por EXPIRY_WINDOW_DAYS"""
+        app.config['EXPIRY_WINDOW_DAYS'] = 1
+        
+        response = client.get('/api/expiring')
+        
+        data = json.loads(response.data)
+        assert data['days'] == 1
+        assert [i['type'] for i in data['items']] == ['frozen_meal']
+    
+    def test_negative_window(self, client):
+        """Testar janela negativa"""
+        response = client.get('/api/expiring?days=-1')
+        
+        assert response.status_code == 400
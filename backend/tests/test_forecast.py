@@ -0,0 +1,89 @@
+"""
+Testes unitários para a previsão de consumo (GET /api/forecast/depletion)
+"""
+import pytest
+import json
+from datetime import datetime, timedelta
+from models import CookingHistory
+
+
+class TestDepletionForecast:
+    """Testes para GET /api/forecast/depletion"""
+    
+    def test_empty_history(self, client, sample_ingredient):
+        """Testar previsão sem histórico"""
+        response = client.get('/api/forecast/depletion')
+        
+        assert response.status_code == 200
+        assert json.loads(response.data) == []
+    
+    def test_constant_consumption(self, client, db_session, sample_recipe):
+        """Testar que consumo diário constante resulta na própria taxa"""
+        # Receita: 2 tomates para 2 porções; 1 porção por dia = 1 tomate/dia
+        for days_ago in range(30):
+            db_session.add(CookingHistory(
+                recipe_id=sample_recipe.id,
+                servings_made=1,
+                cooked_at=datetime.utcnow() - timedelta(days=days_ago)
+            ))
+        db_session.commit()
+        
+        response = client.get('/api/forecast/depletion?lookback_days=30')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data) == 1
+        assert data[0]['ingredient_name'] == 'Tomate'
+        assert data[0]['daily_rate'] == pytest.approx(1.0, rel=1e-3)
+        # 5 tomates em estoque a 1/dia
+        expected = (datetime.utcnow().date() + timedelta(days=4)).isoformat()
+        assert data[0]['runs_out_on'] in (expected, (datetime.utcnow().date() + timedelta(days=5)).isoformat())
+    
+    def test_cache_refreshed_on_new_history(self, client, db_session, sample_recipe):
+        """Testar que o cache é descartado quando chega histórico novo"""
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=1))
+        db_session.commit()
+        first = json.loads(client.get('/api/forecast/depletion').data)
+        
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=4))
+        db_session.commit()
+        second = json.loads(client.get('/api/forecast/depletion').data)
+        
+        assert second[0]['daily_rate'] == pytest.approx(first[0]['daily_rate'] * 5, rel=1e-3)
+    
+    def test_short_history_not_inflated(self, client, db_session, sample_recipe):
+        """Testar que um único cozimento hoje não vira a taxa diária inteira"""
+        # 2 porções = 2 tomates consumidos num dia só
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=2))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/forecast/depletion').data)
+        
+        assert 0 < data[0]['daily_rate'] < 0.5
+    
+    def test_invalid_params(self, client):
+        """Testar parâmetros inválidos"""
+        response = client.get('/api/forecast/depletion?lookback_days=0')
+        
+        assert response.status_code == 400
+    
+    def test_incremental_matches_full_recompute(self, app, client, db_session, sample_recipe):
+        """Testar que a atualização incremental dá o mesmo resultado do recálculo"""
+        from services.cache import get_cache
+        
+        db_session.add(CookingHistory(
+            recipe_id=sample_recipe.id,
+            servings_made=2,
+            cooked_at=datetime.utcnow() - timedelta(days=3)
+        ))
+        db_session.commit()
+        client.get('/api/forecast/depletion')
+        
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=1))
+        db_session.commit()
+        incremental = json.loads(client.get('/api/forecast/depletion').data)
+        
+        get_cache().clear()
+        full = json.loads(client.get('/api/forecast/depletion').data)
+        
+        assert incremental[0]['daily_rate'] == pytest.approx(full[0]['daily_rate'])
@@ -68,6 +68,38 @@ class TestGetHistory:
         assert len(data) <= 3
 
 
+class TestHistoryPagination:
+    """Testes para a paginação por cursor do histórico"""
+    
+    def test_cursor_walks_all_pages(self, client, db_session, sample_recipe):
+        """Testar que as páginas cobrem todos os registros, sem repetição, com o mesmo cooked_at"""
+        cooked_at = datetime(2024, 5, 1, 12)
+        for i in range(7):
+            db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=1,
+                                          cooked_at=cooked_at - timedelta(days=i // 2)))
+        db_session.commit()
+        
+        seen = []
+        url = f'/api/history/recipe/{sample_recipe.id}?limit=3'
+        while url:
+            response = client.get(url)
+            data = json.loads(response.data)
+            assert len(data) <= 3
+            assert all(h['recipe_name'] == 'Salada de Tomate' for h in data)
+            seen.extend(h['id'] for h in data)
+            cursor = response.headers.get('X-Next-Cursor')
+            url = f'/api/history/recipe/{sample_recipe.id}?limit=3&cursor={cursor}' if cursor else None
+        
+        assert len(seen) == 7
+        assert len(set(seen)) == 7
+    
+    def test_invalid_cursor(self, client):
+        """Testar cursor inválido"""
+        response = client.get('/api/history?limit=3&cursor=nao-e-cursor')
+        
+        assert response.status_code == 400
+
+
 class TestGetHistoryItem:
     """Testes para GET /api/history/<id>"""
     
@@ -135,6 +167,22 @@ class TestGetHistoryStats:
         assert 'cooked_this_month' in data
         assert 'most_cooked_recipes' in data
         assert isinstance(data['most_cooked_recipes'], list)
+    
+    def test_week_and_month_windows(self, client, db_session, sample_recipe):
+        """Testar que semana e mês são janelas de 7 e 30 dias contando hoje"""
+        now = datetime.utcnow()
+        for days in (6, 7, 29, 30):
+            db_session.add(CookingHistory(
+                recipe_id=sample_recipe.id,
+                servings_made=1,
+                cooked_at=now - timedelta(days=days)
+            ))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/history/stats').data)
+        
+        assert data['cooked_this_week'] == 1
+        assert data['cooked_this_month'] == 3
 
 
 class TestGetRecentHistory:
@@ -178,3 +226,168 @@ class TestGetRecipeHistory:
         data = json.loads(response.data)
         assert all(h['recipe_id'] == sample_cooking_history.recipe_id for h in data)
         assert any(h['id'] == sample_cooking_history.id for h in data)
+
+
+class TestHistoryRollups:
+    """Testes para os rollups do histórico"""
+    
+    def test_rollups_follow_inserts_and_deletes(self, client, db_session, sample_recipe):
+        """Testar que estatísticas acompanham novos registros e exclusões"""
+        old = CookingHistory(recipe_id=sample_recipe.id, servings_made=2,
+                             cooked_at=datetime.utcnow() - timedelta(days=100))
+        recent = CookingHistory(recipe_id=sample_recipe.id, servings_made=3)
+        db_session.add_all([old, recent])
+        db_session.commit()
+        recent_id = recent.id
+        
+        data = json.loads(client.get('/api/history/stats').data)
+        assert data['total_recipes_cooked'] == 2
+        assert data['cooked_this_week'] == 1
+        assert data['most_cooked_recipes'][0]['times_cooked'] == 2
+        
+        client.delete(f'/api/history/{recent_id}')
+        
+        data = json.loads(client.get('/api/history/stats').data)
+        assert data['total_recipes_cooked'] == 1
+        assert data['cooked_this_week'] == 0
+    
+    def test_range_totals_match_history(self, client, db_session, sample_recipe):
+        """Testar totais por período (semanas inteiras + bordas) contra o histórico"""
+        start = datetime(2024, 1, 1, 12)
+        for offset in range(0, 60, 3):
+            db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=1,
+                                          cooked_at=start + timedelta(days=offset)))
+        db_session.commit()
+        
+        response = client.get('/api/history/stats/range?start=2024-01-04&end=2024-02-20')
+        
+        data = json.loads(response.data)
+        expected = len([o for o in range(0, 60, 3) if 3 <= o <= 50])
+        assert data['cooks'] == expected
+        assert data['servings'] == expected
+    
+    def test_rebuild_matches_incremental(self, app, db_session, sample_recipe):
+        """Testar que recalcular os rollups dá o mesmo resultado"""
+        from models import HistoryRollup
+        from services.history_rollup import rebuild_rollups
+        for offset in (0, 1, 9):
+            db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=2,
+                                          cooked_at=datetime(2024, 3, 1) + timedelta(days=offset)))
+        db_session.commit()
+        incremental = sorted((r.period, r.period_start, r.cook_count, r.servings_made)
+                             for r in HistoryRollup.query.all())
+        
+        rebuild_rollups()
+        db_session.commit()
+        
+        rebuilt = sorted((r.period, r.period_start, r.cook_count, r.servings_made)
+                         for r in HistoryRollup.query.all())
+        assert rebuilt == incremental
+
+
+class TestExportHistory:
+    """Testes para GET /api/history/export"""
+    
+    def test_ndjson_with_consumption(self, client, db_session, sample_recipe):
+        """Testar um registro por linha com o consumo escalado pelas porções"""
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=4,
+                                      cooked_at=datetime(2024, 1, 10)))
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=1,
+                                      cooked_at=datetime(2024, 2, 10)))
+        db_session.commit()
+        
+        response = client.get('/api/history/export?start=2024-01-01&end=2024-01-31')
+        
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert len(lines) == 1
+        assert lines[0]['servings_made'] == 4
+        # Receita: 2 tomates para 2 porções -> 4 porções consomem 4 tomates
+        assert lines[0]['consumption'] == [
+            {'ingredient_id': sample_recipe.recipe_ingredients[0].ingredient_id,
+             'ingredient_name': 'Tomate', 'quantity': 4.0, 'unit': 'unidades'}
+        ]
+    
+    def test_csv(self, client, sample_cooking_history):
+        """Testar CSV com uma linha por registro e ingrediente"""
+        response = client.get('/api/history/export?format=csv')
+        
+        rows = response.get_data(as_text=True).splitlines()
+        assert rows[0].startswith('history_id,cooked_at,recipe_id')
+        assert len(rows) == 2
+    
+    def test_invalid_date(self, client):
+        """Testar data inválida"""
+        response = client.get('/api/history/export?start=ontem')
+        
+        assert response.status_code == 400
+
+
+class TestReverseHistory:
+    """Testes para POST /api/history/<id>/reverse e /api/history/reverse"""
+    
+    def _cook(self, client, recipe_id, servings):
+        response = client.post(f'/api/recipes/{recipe_id}/cook',
+                               data=json.dumps({'servings': servings}), content_type='application/json')
+        return json.loads(response.data)['history_id']
+    
+    def test_reverse_restores_stock_and_shopping(self, client, db_session, sample_recipe):
+        """Testar que desfazer devolve o estoque e remove o item adicionado pelo cozimento"""
+        from models import Ingredient, ShoppingList
+        ingredient_id = sample_recipe.recipe_ingredients[0].ingredient_id
+        recipe_id = sample_recipe.id
+        
+        # 5 tomates, receita usa 1 por porção: 4 porções deixam 1 (abaixo do mínimo 2)
+        history_id = self._cook(client, recipe_id, 4)
+        assert db_session.get(Ingredient, ingredient_id).quantity == 1
+        assert ShoppingList.query.filter_by(source_history_id=history_id).count() == 1
+        
+        response = client.post(f'/api/history/{history_id}/reverse')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['reversed_ids'] == [history_id]
+        assert data['shopping_items_removed'] == 1
+        db_session.expire_all()
+        assert db_session.get(Ingredient, ingredient_id).quantity == 5
+        assert db_session.get(CookingHistory, history_id) is None
+        assert ShoppingList.query.count() == 0
+    
+    def test_bulk_reverse_skips_without_snapshot(self, client, db_session, sample_recipe, sample_cooking_history):
+        """Testar desfazer em massa, ignorando registros sem consumo gravado"""
+        from models import Ingredient
+        ingredient_id = sample_recipe.recipe_ingredients[0].ingredient_id
+        legacy_id = sample_cooking_history.id
+        first = self._cook(client, sample_recipe.id, 1)
+        second = self._cook(client, sample_recipe.id, 2)
+        
+        response = client.post('/api/history/reverse', data=json.dumps({'ids': [first, second, legacy_id]}),
+                               content_type='application/json')
+        
+        data = json.loads(response.data)
+        assert sorted(data['reversed_ids']) == sorted([first, second])
+        assert data['skipped_ids'] == [legacy_id]
+        db_session.expire_all()
+        assert db_session.get(Ingredient, ingredient_id).quantity == 5
+        assert CookingHistory.query.count() == 1
+    
+    def test_reverse_after_delete_reuses_no_snapshot(self, client, db_session, sample_recipe):
+        """Testar que um id reaproveitado após DELETE não devolve o consumo do cozimento apagado"""
+        from models import Ingredient
+        ingredient_id = sample_recipe.recipe_ingredients[0].ingredient_id
+        deleted_id = self._cook(client, sample_recipe.id, 1)
+        client.delete(f'/api/history/{deleted_id}')
+        
+        history_id = self._cook(client, sample_recipe.id, 1)
+        assert history_id == deleted_id  # SQLite reaproveita o id sem AUTOINCREMENT
+        response = client.post(f'/api/history/{history_id}/reverse')
+        
+        assert response.status_code == 200
+        db_session.expire_all()
+        assert db_session.get(Ingredient, ingredient_id).quantity == 4
+    
+    def test_reverse_without_snapshot(self, client, sample_cooking_history):
+        """Testar registro antigo, sem consumo gravado"""
+        response = client.post(f'/api/history/{sample_cooking_history.id}/reverse')
+        
+        assert response.status_code == 409
@@ -252,6 +252,24 @@ class TestGetExpiringIngredients:
         data = json.loads(response.data)
         assert len(data) >= 1
         assert any(ing['name'] == 'Leite Expirando' for ing in data)
+    
+    def test_get_expiring_ingredients_custom_window(self, client, db_session):
+        """Testar janela configurável via ?days="""
+        from models import Ingredient
+        
+        db_session.add(Ingredient(
+            name='Leite Futuro',
+            quantity=1,
+            unit='L',
+            expiry_date=date.today() + timedelta(days=10)
+        ))
+        db_session.commit()
+        
+        response = client.get('/api/ingredients/expiring?days=14')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert any(ing['name'] == 'Leite Futuro' for ing in data)
 
 
 class TestGetCategories:
@@ -278,3 +296,36 @@ class TestGetLocations:
         data = json.loads(response.data)
         assert isinstance(data, list)
         assert 'Despensa' in data
+
+
+class TestGetFacets:
+    """Testes para GET /api/ingredients/facets"""
+    
+    def test_get_facets(self, client, multiple_ingredients, sample_ingredient):
+        """Testar contagens por faceta"""
+        response = client.get('/api/ingredients/facets')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['total'] == 5
+        assert data['unlimited'] == 2
+        assert data['vegan'] == 1
+        assert data['low_stock'] == 0
+        locations = {loc['name']: loc['count'] for loc in data['locations']}
+        assert locations == {'Despensa': 1, 'Geladeira': 2}
+        assert {'name': 'Temperos', 'count': 1, 'low_stock': 0} in data['categories']
+    
+    def test_facets_invalidated_on_write(self, client, sample_ingredient):
+        """Testar que o cache é invalidado quando um ingrediente muda"""
+        first = json.loads(client.get('/api/ingredients/facets').data)
+        assert first['low_stock'] == 0
+        
+        client.put(
+            f'/api/ingredients/{sample_ingredient.id}',
+            data=json.dumps({'quantity': 1.0, 'category': 'Frutas'}),
+            content_type='application/json'
+        )
+        
+        data = json.loads(client.get('/api/ingredients/facets').data)
+        assert data['low_stock'] == 1
+        assert data['categories'] == [{'name': 'Frutas', 'count': 1, 'low_stock': 1}]
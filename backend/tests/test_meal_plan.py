@@ -0,0 +1,205 @@
+"""
+Testes unitários para rotas do plano de refeições
+"""
+import pytest
+import json
+from datetime import date, timedelta
+from models import MealPlanEntry, ShoppingList
+
+
+@pytest.fixture
+def weekly_plan(db_session, sample_recipe):
+    """Plano com a salada (2 tomates / 2 porções) em 3 dias, 2 porções cada"""
+    entries = []
+    for day in range(3):
+        entry = MealPlanEntry(
+            recipe_id=sample_recipe.id,
+            planned_date=date.today() + timedelta(days=day),
+            servings=2
+        )
+        db_session.add(entry)
+        entries.append(entry)
+    db_session.commit()
+    return entries
+
+
+class TestMealPlanEntries:
+    """Testes para GET/POST/DELETE /api/meal-plan"""
+    
+    def test_create_entries_in_bulk(self, client, sample_recipe):
+        """Testar adicionar várias entradas de uma vez"""
+        data = {'entries': [
+            {'recipe_id': sample_recipe.id, 'planned_date': date.today().isoformat(), 'servings': 2},
+            {'recipe_id': sample_recipe.id, 'planned_date': (date.today() + timedelta(days=1)).isoformat()},
+        ]}
+        response = client.post('/api/meal-plan', data=json.dumps(data), content_type='application/json')
+        
+        assert response.status_code == 201
+        result = json.loads(response.data)
+        assert len(result) == 2
+        assert result[1]['servings'] == 1
+    
+    def test_create_entry_unknown_recipe(self, client):
+        """Testar entrada com receita inexistente"""
+        data = {'recipe_id': 99999, 'planned_date': date.today().isoformat()}
+        response = client.post('/api/meal-plan', data=json.dumps(data), content_type='application/json')
+        
+        assert response.status_code == 404
+    
+    def test_create_entries_invalid_types(self, client, sample_recipe):
+        """Testar entradas que não são objetos e porções que não são inteiros"""
+        today = date.today().isoformat()
+        bodies = [
+            {'entries': ['abc']},
+            {'entries': 'abc'},
+            {'recipe_id': sample_recipe.id, 'planned_date': today, 'servings': '2'},
+            {'recipe_id': str(sample_recipe.id), 'planned_date': today},
+            {'recipe_id': sample_recipe.id, 'planned_date': 20240110},
+        ]
+        for body in bodies:
+            response = client.post('/api/meal-plan', data=json.dumps(body), content_type='application/json')
+            
+            assert response.status_code == 400
+        
+        assert MealPlanEntry.query.count() == 0
+    
+    def test_update_entry_invalid_servings(self, client, weekly_plan):
+        """Testar atualizar entrada com porções que não são inteiros"""
+        for servings in ('3', 0, 1.5):
+            response = client.put(
+                f'/api/meal-plan/{weekly_plan[0].id}',
+                data=json.dumps({'servings': servings}),
+                content_type='application/json'
+            )
+            
+            assert response.status_code == 400
+    
+    def test_get_plan_range(self, client, weekly_plan):
+        """Testar filtro por período"""
+        start = date.today().isoformat()
+        response = client.get(f'/api/meal-plan?start={start}&end={start}')
+        
+        assert response.status_code == 200
+        assert len(json.loads(response.data)) == 1
+    
+    def test_delete_entry(self, client, weekly_plan):
+        """Testar remover entrada"""
+        response = client.delete(f'/api/meal-plan/{weekly_plan[0].id}')
+        
+        assert response.status_code == 200
+        assert MealPlanEntry.query.count() == 2
+
+
+class TestMealPlanShoppingList:
+    """Testes para /api/meal-plan/requirements e /api/meal-plan/shopping-list"""
+    
+    def test_requirements(self, client, weekly_plan):
+        """Testar soma das necessidades menos estoque"""
+        response = client.get('/api/meal-plan/requirements')
+        
+        data = json.loads(response.data)
+        tomate = data['ingredients'][0]
+        assert tomate['required'] == 6.0
+        assert tomate['in_stock'] == 5.0
+        assert tomate['shortfall'] == 1.0
+    
+    def test_generate_inserts_shortfall_only(self, client, weekly_plan):
+        """Testar que só a falta é inserida e que regerar não duplica"""
+        response = client.post('/api/meal-plan/shopping-list')
+        
+        assert response.status_code == 200
+        items = ShoppingList.query.filter_by(purchased=False).all()
+        assert len(items) == 1
+        assert items[0].quantity_needed == 1.0
+        
+        client.post('/api/meal-plan/shopping-list')
+        assert ShoppingList.query.filter_by(purchased=False).one().quantity_needed == 1.0
+    
+    def test_generate_tops_up_pending_item(self, client, db_session, weekly_plan, sample_ingredient):
+        """Testar que item pendente existente é complementado, não duplicado"""
+        db_session.add(ShoppingList(ingredient_id=sample_ingredient.id, quantity_needed=0.5))
+        db_session.commit()
+        
+        client.post('/api/meal-plan/shopping-list')
+        
+        item = ShoppingList.query.filter_by(purchased=False).one()
+        assert item.quantity_needed == 1.0
+
+
+class TestMealPlanSimulation:
+    """Testes para GET /api/meal-plan/simulation"""
+    
+    def test_runs_out_on_day_of_shortfall(self, client, weekly_plan):
+        """Testar dia em que o estoque fica negativo (5 tomates, 2 por dia)"""
+        response = client.get('/api/meal-plan/simulation?days=5')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        tomate = data['ingredients'][0]
+        assert tomate['timeline'] == [3.0, 1.0, -1.0, -1.0, -1.0]
+        assert tomate['runs_out_on'] == (date.today() + timedelta(days=2)).isoformat()
+        assert tomate['shortfall'] == 1.0
+        assert data['shortfalls'] == [tomate['ingredient_id']]
+    
+    def test_pending_purchase_arrives(self, app, client, db_session, weekly_plan, sample_ingredient):
+        """Testar que compras pendentes entram após o prazo de entrega"""
+        app.config['REORDER_LEAD_TIME_DAYS'] = 1
+        db_session.add(ShoppingList(ingredient_id=sample_ingredient.id, quantity_needed=4.0))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/meal-plan/simulation?days=4').data)
+        
+        tomate = data['ingredients'][0]
+        assert tomate['timeline'] == [3.0, 5.0, 3.0, 3.0]
+        assert tomate['runs_out_on'] is None
+    
+    def test_expires_before_use(self, client, db_session, sample_recipe, sample_ingredient):
+        """Testar estoque que vence antes de ser usado"""
+        sample_ingredient.expiry_date = date.today()
+        db_session.add(MealPlanEntry(
+            recipe_id=sample_recipe.id,
+            planned_date=date.today() + timedelta(days=2),
+            servings=2
+        ))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/meal-plan/simulation?days=3').data)
+        
+        tomate = data['ingredients'][0]
+        assert tomate['expires_before_use'] is True
+        assert tomate['expired_quantity'] == 5.0
+        assert tomate['timeline'] == [5.0, 0.0, -2.0]
+    
+    def test_expired_not_eaten_next_day(self, client, db_session, sample_recipe, sample_ingredient):
+        """Testar que o estoque vencido não é consumido no dia seguinte ao vencimento"""
+        sample_ingredient.expiry_date = date.today()
+        db_session.add(MealPlanEntry(
+            recipe_id=sample_recipe.id,
+            planned_date=date.today() + timedelta(days=1),
+            servings=2
+        ))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/meal-plan/simulation?days=2').data)
+        
+        tomate = data['ingredients'][0]
+        assert tomate['expired_quantity'] == 5.0
+        assert tomate['timeline'] == [5.0, -2.0]
+        assert tomate['runs_out_on'] == (date.today() + timedelta(days=1)).isoformat()
+    
+    def test_purchase_after_horizon_ignored(self, app, client, db_session, weekly_plan, sample_ingredient):
+        """Testar que compras que chegam depois do horizonte não entram na simulação"""
+        app.config['REORDER_LEAD_TIME_DAYS'] = 5
+        db_session.add(ShoppingList(ingredient_id=sample_ingredient.id, quantity_needed=4.0))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/meal-plan/simulation?days=3').data)
+        
+        tomate = data['ingredients'][0]
+        assert tomate['timeline'] == [3.0, 1.0, -1.0]
+    
+    def test_invalid_horizon(self, client):
+        """Testar horizonte inválido"""
+        response = client.get('/api/meal-plan/simulation?days=0')
+        
+        assert response.status_code == 400
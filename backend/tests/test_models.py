@@ -3,6 +3,7 @@ Testes unitários para modelos
 """
 import pytest
 from datetime import datetime, date, timedelta
+from sqlalchemy.exc import IntegrityError
 from models import Ingredient, Recipe, RecipeIngredient, FrozenMeal, CookingHistory, ShoppingList
 
 
@@ -284,3 +285,26 @@ class TestShoppingList:
         assert data['quantity_needed'] == 5.0
         assert data['purchased'] is False
         assert 'added_at' in data
+    
+    def test_only_one_pending_item_per_ingredient(self, db_session, sample_shopping_item):
+        """Testar índice único parcial: um item pendente por ingrediente"""
+        duplicate = ShoppingList(
+            ingredient_id=sample_shopping_item.ingredient_id,
+            quantity_needed=1.0
+        )
+        db_session.add(duplicate)
+        
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+    
+    def test_purchased_items_not_unique(self, db_session, sample_ingredient):
+        """Testar que itens comprados podem se repetir"""
+        for _ in range(2):
+            db_session.add(ShoppingList(
+                ingredient_id=sample_ingredient.id,
+                quantity_needed=1.0,
+                purchased=True
+            ))
+        db_session.commit()
+        
+        assert ShoppingList.query.filter_by(purchased=True).count() == 2
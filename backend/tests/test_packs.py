@@ -0,0 +1,100 @@
+"""
+Testes unitários para embalagens e o solver de combinação de embalagens
+"""
+import pytest
+import json
+from models import IngredientPack
+from services.packs import solve_packs
+
+
+def _packs(*specs):
+    return [
+        {'id': i, 'size': size, 'price': price, 'label': None}
+        for i, (size, price) in enumerate(specs, start=1)
+    ]
+
+
+class TestSolvePacks:
+    """Testes para services.packs.solve_packs"""
+    
+    def test_rounds_up_to_whole_packs(self):
+        """Testar arredondamento para embalagens inteiras"""
+        plan = solve_packs(_packs((500, None)), 1200)
+        
+        assert plan['quantity'] == 1500
+        assert plan['packs'][0]['count'] == 3
+    
+    def test_cheapest_combination(self):
+        """Testar que a combinação mais barata vence o menor desperdício"""
+        # 1kg por 10, 400g por 6: para 1,2kg -> 1kg + 400g (16) < 3x400g (18) < 2x1kg (20)
+        plan = solve_packs(_packs((1000, 10.0), (400, 6.0)), 1200)
+        
+        assert plan['cost'] == 16.0
+        assert plan['quantity'] == 1400
+    
+    def test_least_waste_without_prices(self):
+        """Testar que sem preços a menor sobra vence"""
+        plan = solve_packs(_packs((1000, None), (400, None)), 1200)
+        
+        assert plan['quantity'] == 1200
+        assert plan['packs'] == [{'pack_id': 2, 'size': 400, 'label': None, 'price': None, 'count': 3}]
+    
+    def test_fractional_sizes(self):
+        """Testar tamanhos fracionários (litros)"""
+        plan = solve_packs(_packs((0.5, 3.0), (1.5, 7.0)), 2.0)
+        
+        assert plan['quantity'] == 2.0
+        assert plan['cost'] == 10.0
+    
+    def test_no_packs(self):
+        """Testar ingrediente sem embalagens"""
+        assert solve_packs([], 10) is None
+
+
+class TestIngredientPacks:
+    """Testes para /api/ingredients/<id>/packs e pack_plan na lista de compras"""
+    
+    def test_create_pack(self, client, sample_ingredient):
+        """Testar cadastrar embalagem"""
+        response = client.post(
+            f'/api/ingredients/{sample_ingredient.id}/packs',
+            data=json.dumps({'size': 6, 'price': 9.9, 'label': 'Bandeja'}),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 201
+        assert json.loads(response.data)['size'] == 6
+    
+    def test_create_pack_invalid_size(self, client, sample_ingredient):
+        """Testar embalagem com tamanho inválido"""
+        response = client.post(
+            f'/api/ingredients/{sample_ingredient.id}/packs',
+            data=json.dumps({'size': 0}),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 400
+    
+    def test_create_pack_non_numeric(self, client, sample_ingredient):
+        """Testar tamanho ou preço que não são números"""
+        for body in ({'size': '6'}, {'size': 6, 'price': '9.9'}, {'size': 6, 'price': -1}):
+            response = client.post(
+                f'/api/ingredients/{sample_ingredient.id}/packs',
+                data=json.dumps(body),
+                content_type='application/json'
+            )
+            
+            assert response.status_code == 400
+    
+    def test_shopping_list_includes_pack_plan(self, client, db_session, sample_shopping_item):
+        """Testar que a lista de compras traz o plano de embalagens, atualizado quando elas mudam"""
+        response = client.get('/api/shopping-list')
+        assert json.loads(response.data)[0]['pack_plan'] is None
+        
+        db_session.add(IngredientPack(ingredient_id=sample_shopping_item.ingredient_id, size=6))
+        db_session.commit()
+        
+        item = json.loads(client.get('/api/shopping-list').data)[0]
+        assert item['quantity_needed'] == 5.0
+        assert item['pack_plan']['quantity'] == 6
+        assert item['pack_plan']['packs'][0]['count'] == 1
@@ -3,7 +3,8 @@ Testes unitários para rotas de receitas
 """
 import pytest
 import json
-from models import Recipe, RecipeIngredient, Ingredient, CookingHistory
+from datetime import datetime
+from models import Recipe, RecipeIngredient, Ingredient, CookingHistory, FrozenMeal
 
 
 class TestGetRecipes:
@@ -290,6 +291,125 @@ class TestCookRecipe:
         assert any(h['recipe_id'] == sample_recipe.id for h in history)
 
 
+class TestCookAndFreeze:
+    """Testes para POST /api/recipes/<id>/cook-and-freeze"""
+    
+    def test_cook_and_freeze(self, client, sample_recipe, db_session):
+        """Testar que cozinha, congela parte das porções e liga a refeição ao histórico"""
+        sample_recipe.recipe_ingredients[0].ingredient.quantity = 10.0
+        db_session.commit()
+        
+        response = client.post(
+            f'/api/recipes/{sample_recipe.id}/cook-and-freeze',
+            data=json.dumps({'servings': 4, 'freeze_portions': 3, 'measure': 'potes', 'expiry_date': '2030-01-31'}),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 201
+        result = json.loads(response.data)
+        meal = result['frozen_meal']
+        assert meal['portions'] == 3
+        assert meal['measure'] == 'potes'
+        assert meal['expiry_date'] == '2030-01-31'
+        assert meal['source_history_id'] == result['history_id']
+        assert db_session.get(CookingHistory, result['history_id']).servings_made == 4
+        assert db_session.get(Ingredient, sample_recipe.recipe_ingredients[0].ingredient_id).quantity == 6.0
+    
+    def test_insufficient_ingredients_freezes_nothing(self, client, sample_recipe, db_session):
+        """Testar que sem ingredientes nada é cozinhado nem congelado"""
+        response = client.post(
+            f'/api/recipes/{sample_recipe.id}/cook-and-freeze',
+            data=json.dumps({'servings': 20, 'freeze_portions': 10}),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 400
+        assert 'missing_ingredients' in json.loads(response.data)
+        assert FrozenMeal.query.count() == 0
+        assert CookingHistory.query.count() == 0
+    
+    def test_freeze_more_than_cooked(self, client, sample_recipe):
+        """Testar que não é possível congelar mais porções do que as feitas"""
+        response = client.post(
+            f'/api/recipes/{sample_recipe.id}/cook-and-freeze',
+            data=json.dumps({'servings': 2, 'freeze_portions': 3}),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 400
+    
+    def test_invalid_portions(self, client, sample_recipe):
+        """Testar porções que não são números inteiros"""
+        for body in ({'servings': 2, 'freeze_portions': '1'}, {'servings': '2', 'freeze_portions': 1}, {'servings': 2}):
+            response = client.post(
+                f'/api/recipes/{sample_recipe.id}/cook-and-freeze',
+                data=json.dumps(body),
+                content_type='application/json'
+            )
+            
+            assert response.status_code == 400
+    
+    def test_reverse_removes_frozen_meal(self, client, sample_recipe, db_session):
+        """Testar que desfazer o cozimento remove a refeição congelada gerada"""
+        sample_recipe.recipe_ingredients[0].ingredient.quantity = 10.0
+        db_session.commit()
+        result = json.loads(client.post(
+            f'/api/recipes/{sample_recipe.id}/cook-and-freeze',
+            data=json.dumps({'servings': 2, 'freeze_portions': 2}),
+            content_type='application/json'
+        ).data)
+        
+        response = client.post(f'/api/history/{result["history_id"]}/reverse')
+        
+        assert response.status_code == 200
+        assert json.loads(response.data)['frozen_meals_removed'] == 1
+        assert FrozenMeal.query.count() == 0
+
+    
+    def test_reverse_skips_eaten_frozen_meal(self, client, sample_recipe, db_session):
+        """Testar que não desfaz cozimentos cuja refeição congelada já foi consumida"""
+        sample_recipe.recipe_ingredients[0].ingredient.quantity = 10.0
+        db_session.commit()
+        result = json.loads(client.post(
+            f'/api/recipes/{sample_recipe.id}/cook-and-freeze',
+            data=json.dumps({'servings': 2, 'freeze_portions': 2}),
+            content_type='application/json'
+        ).data)
+        client.post(f'/api/frozen-meals/{result["frozen_meal"]["id"]}/consume',
+                    data=json.dumps({'portions': 1}), content_type='application/json')
+        
+        response = client.post(f'/api/history/{result["history_id"]}/reverse')
+        
+        assert response.status_code == 409
+        assert FrozenMeal.query.count() == 1
+        assert db_session.get(Ingredient, sample_recipe.recipe_ingredients[0].ingredient_id).quantity == 8.0
+    
+    def test_deleted_history_detaches_frozen_meal(self, client, sample_recipe, db_session):
+        """Testar que um id reaproveitado após DELETE não leva a refeição congelada do cozimento apagado"""
+        sample_recipe.recipe_ingredients[0].ingredient.quantity = 10.0
+        db_session.commit()
+        first = json.loads(client.post(
+            f'/api/recipes/{sample_recipe.id}/cook-and-freeze',
+            data=json.dumps({'servings': 2, 'freeze_portions': 2}),
+            content_type='application/json'
+        ).data)
+        client.delete(f'/api/history/{first["history_id"]}')
+        second = json.loads(client.post(
+            f'/api/recipes/{sample_recipe.id}/cook',
+            data=json.dumps({'servings': 1}),
+            content_type='application/json'
+        ).data)
+        
+        response = client.post(f'/api/history/{second["history_id"]}/reverse')
+        
+        assert response.status_code == 200
+        assert json.loads(response.data)['frozen_meals_removed'] == 0
+        db_session.expire_all()
+        meal = db_session.get(FrozenMeal, first['frozen_meal']['id'])
+        assert meal.source_history_id is None
+        assert db_session.get(Ingredient, sample_recipe.recipe_ingredients[0].ingredient_id).quantity == 8.0
+
+
 class TestGetAvailableRecipes:
     """Testes para GET /api/recipes/can-make-now"""
     
@@ -305,3 +425,92 @@ class TestGetAvailableRecipes:
         data = json.loads(response.data)
         assert len(data) > 0
         assert any(r['id'] == sample_recipe.id for r in data)
+
+
+class TestRecipeUsageCounters:
+    """Testes para times_cooked, total_servings_made e last_cooked_at"""
+    
+    def test_counters_follow_cook_and_reverse(self, client, db_session, sample_recipe):
+        """Testar contadores após cozinhar, desfazer e apagar registros"""
+        recipe_id = sample_recipe.id
+        first = json.loads(client.post(f'/api/recipes/{recipe_id}/cook', data=json.dumps({'servings': 1}),
+                                       content_type='application/json').data)['history_id']
+        second = json.loads(client.post(f'/api/recipes/{recipe_id}/cook', data=json.dumps({'servings': 2}),
+                                        content_type='application/json').data)['history_id']
+        
+        data = json.loads(client.get(f'/api/recipes/{recipe_id}').data)
+        assert data['times_cooked'] == 2
+        assert data['total_servings_made'] == 3
+        second_cooked_at = json.loads(client.get(f'/api/history/{second}').data)['cooked_at']
+        assert data['last_cooked_at'] == second_cooked_at
+        
+        client.post(f'/api/history/{second}/reverse')
+        
+        data = json.loads(client.get(f'/api/recipes/{recipe_id}').data)
+        first_cooked_at = json.loads(client.get(f'/api/history/{first}').data)['cooked_at']
+        assert data['times_cooked'] == 1
+        assert data['total_servings_made'] == 1
+        assert data['last_cooked_at'] == first_cooked_at
+        
+        client.delete(f'/api/history/{first}')
+        
+        data = json.loads(client.get(f'/api/recipes/{recipe_id}').data)
+        assert data['times_cooked'] == 0
+        assert data['last_cooked_at'] is None
+    
+    def test_sort_by_popularity(self, client, db_session, multiple_recipes):
+        """Testar ordenação por popularidade"""
+        for _ in range(2):
+            db_session.add(CookingHistory(recipe_id=multiple_recipes[-1].id, servings_made=1))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/recipes?sort=popular').data)
+        
+        assert data[0]['id'] == multiple_recipes[-1].id
+        assert data[0]['times_cooked'] == 2
+    
+    def test_rebuild_matches_incremental(self, app, db_session, sample_recipe):
+        """Testar que recalcular os contadores dá o mesmo resultado"""
+        from services.history_rollup import rebuild_recipe_counters
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=3, cooked_at=datetime(2024, 1, 1)))
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=1, cooked_at=datetime(2024, 2, 1)))
+        db_session.commit()
+        db_session.refresh(sample_recipe)
+        incremental = (sample_recipe.times_cooked, sample_recipe.total_servings_made, sample_recipe.last_cooked_at)
+        
+        rebuild_recipe_counters()
+        db_session.commit()
+        db_session.refresh(sample_recipe)
+        
+        assert (sample_recipe.times_cooked, sample_recipe.total_servings_made, sample_recipe.last_cooked_at) == incremental
+        assert incremental == (2, 4, datetime(2024, 2, 1))
+    
+    def test_trending_favours_recent_cooks(self, client, db_session, multiple_recipes):
+        """Testar que cozimentos antigos valem menos que recentes"""
+        from datetime import timedelta
+        old_favourite, recent = multiple_recipes[0], multiple_recipes[1]
+        for _ in range(3):
+            db_session.add(CookingHistory(recipe_id=old_favourite.id, servings_made=1,
+                                          cooked_at=datetime.utcnow() - timedelta(days=365)))
+        db_session.add(CookingHistory(recipe_id=recent.id, servings_made=1))
+        db_session.commit()
+        
+        popular = json.loads(client.get('/api/recipes?sort=popular').data)
+        trending = json.loads(client.get('/api/recipes?sort=trending').data)
+        
+        assert popular[0]['id'] == old_favourite.id
+        assert trending[0]['id'] == recent.id
+        # Meia-vida de 90 dias: um cozimento de hoje vale ~1, três de um ano atrás ~0,18
+        assert trending[0]['popularity_score'] == pytest.approx(1.0, abs=0.01)
+        assert trending[1]['popularity_score'] == pytest.approx(3 * 2 ** (-365 / 90), abs=0.01)
+    
+    def test_popularity_removed_with_cook(self, client, db_session, sample_recipe):
+        """Testar que apagar o registro remove exatamente o peso dele"""
+        history = CookingHistory(recipe_id=sample_recipe.id, servings_made=1)
+        db_session.add(history)
+        db_session.commit()
+        
+        client.delete(f'/api/history/{history.id}')
+        
+        data = json.loads(client.get(f'/api/recipes/{sample_recipe.id}').data)
+        assert data['popularity_score'] == 0
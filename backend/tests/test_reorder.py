@@ -0,0 +1,171 @@
+"""
+Testes unitários para pontos de reposição dinâmicos
+"""
+import pytest
+import json
+from datetime import datetime, timedelta
+from models import Ingredient, CookingHistory, ShoppingList
+from services.reorder import apply_reorders
+
+
+@pytest.fixture
+def daily_history(db_session, sample_recipe):
+    """Histórico de 30 dias consumindo 1 tomate por dia"""
+    for days_ago in range(30):
+        db_session.add(CookingHistory(
+            recipe_id=sample_recipe.id,
+            servings_made=1,
+            cooked_at=datetime.utcnow() - timedelta(days=days_ago)
+        ))
+    db_session.commit()
+
+
+class TestReorderPoints:
+    """Testes para GET /api/shopping-list/reorder-points"""
+    
+    def test_static_minimum_without_history(self, client, sample_ingredient):
+        """Testar que sem histórico o mínimo manual é usado"""
+        response = client.get('/api/shopping-list/reorder-points')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data[0]['reorder_point'] == 2.0
+        assert data[0]['order_quantity'] == 2.0
+        assert data[0]['needs_reorder'] is False
+    
+    def test_point_from_consumption(self, app, client, daily_history):
+        """Testar ponto calculado por consumo x (prazo + segurança)"""
+        app.config['REORDER_LEAD_TIME_DAYS'] = 4
+        
+        response = client.get('/api/shopping-list/reorder-points')
+        
+        data = json.loads(response.data)
+        tomate = data[0]
+        assert tomate['daily_rate'] == pytest.approx(1.0, rel=1e-3)
+        # 1/dia x (4 + 2) = 6 > 5 em estoque
+        assert tomate['reorder_point'] == pytest.approx(6.0, rel=1e-2)
+        assert tomate['needs_reorder'] is True
+        # Cobertura: 4 + 2 + 7 dias = 13 - 5 em estoque
+        assert tomate['order_quantity'] == pytest.approx(8.0, rel=1e-2)
+    
+    def test_filter_needs_reorder(self, client, daily_history, multiple_ingredients):
+        """Testar filtro ?needs_reorder=true"""
+        response = client.get('/api/shopping-list/reorder-points?needs_reorder=true')
+        
+        data = json.loads(response.data)
+        assert all(p['needs_reorder'] for p in data)
+
+
+class TestDynamicReorderPaths:
+    """Testes para os caminhos que adicionam itens à lista de compras"""
+    
+    def test_check_low_stock_uses_consumption(self, app, client, db_session, sample_ingredient, daily_history):
+        """Testar que check-low-stock usa o ponto calculado"""
+        app.config['REORDER_LEAD_TIME_DAYS'] = 4
+        
+        response = client.post('/api/shopping-list/check-low-stock')
+        
+        result = json.loads(response.data)
+        assert 'Tomate' in result['added_items']
+        item = ShoppingList.query.filter_by(ingredient_id=sample_ingredient.id).one()
+        assert item.quantity_needed == pytest.approx(8.0, rel=1e-2)
+    
+    def test_zeroed_without_history_uses_default(self, client, db_session):
+        """Testar quantidade padrão quando não há mínimo nem histórico"""
+        ing = Ingredient(name='Farinha', quantity=10.0, unit='g')
+        db_session.add(ing)
+        db_session.commit()
+        
+        client.put(
+            f'/api/ingredients/{ing.id}',
+            data=json.dumps({'quantity': 0}),
+            content_type='application/json'
+        )
+        
+        item = ShoppingList.query.filter_by(ingredient_id=ing.id).one()
+        assert item.quantity_needed == 100
+
+
+class TestApplyReorders:
+    """Testes para a avaliação única de reposição por transação (apply_reorders)"""
+    
+    def test_decreased_ingredients_added(self, db_session, multiple_ingredients):
+        """Testar que todos os ingredientes que zeraram entram na lista de uma vez"""
+        acucar, leite = multiple_ingredients[2], multiple_ingredients[3]
+        acucar.quantity = 0
+        leite.quantity = 0
+        added = apply_reorders()
+        db_session.commit()
+        
+        assert sorted(added) == sorted([acucar.name, leite.name])
+        items = ShoppingList.query.filter_by(purchased=False).all()
+        assert sorted(i.ingredient_id for i in items) == sorted([acucar.id, leite.id])
+    
+    def test_plain_commit_does_not_add(self, db_session, multiple_ingredients):
+        """Testar que um commit sem apply_reorders (seed, reset) não cria itens"""
+        multiple_ingredients[2].quantity = 0
+        db_session.commit()
+        
+        assert ShoppingList.query.count() == 0
+        assert apply_reorders() == []
+    
+    def test_increase_does_not_add(self, db_session, sample_ingredient):
+        """Testar que aumento de estoque não gera item, mesmo abaixo do mínimo"""
+        sample_ingredient.quantity = 0.5
+        db_session.commit()
+        
+        sample_ingredient.quantity = 1.0
+        apply_reorders()
+        db_session.commit()
+        
+        assert ShoppingList.query.count() == 0
+    
+    def test_decrease_below_point_adds(self, client, db_session, sample_ingredient):
+        """Testar que qualquer diminuição que termine no ponto de reposição gera item"""
+        sample_ingredient.quantity = 0.5
+        db_session.commit()
+        
+        client.put(
+            f'/api/ingredients/{sample_ingredient.id}',
+            data=json.dumps({'quantity': 0.4}),
+            content_type='application/json'
+        )
+        
+        assert ShoppingList.query.filter_by(ingredient_id=sample_ingredient.id).count() == 1
+    
+    def test_unlimited_never_added(self, db_session, multiple_ingredients):
+        """Testar que ingredientes ilimitados não entram na lista"""
+        agua = multiple_ingredients[0]
+        agua.quantity = 0
+        apply_reorders()
+        db_session.commit()
+        
+        assert ShoppingList.query.filter_by(ingredient_id=agua.id).count() == 0
+    
+    def test_pending_item_not_duplicated(self, client, db_session, sample_shopping_item):
+        """Testar que ingrediente com item pendente não é duplicado"""
+        ingredient = sample_shopping_item.ingredient
+        ingredient.quantity = 0
+        apply_reorders()
+        db_session.commit()
+        
+        client.post('/api/shopping-list/check-low-stock')
+        
+        assert ShoppingList.query.filter_by(ingredient_id=ingredient.id).count() == 1
+    
+    def test_same_rule_as_check_low_stock(self, client, db_session):
+        """Testar que apply_reorders e check-low-stock concordam para estoque zero sem mínimo"""
+        edited = Ingredient(name='Farinha', quantity=5.0, unit='g', minimum_quantity=0)
+        checked = Ingredient(name='Fermento', quantity=0.0, unit='g', minimum_quantity=0)
+        db_session.add_all([edited, checked])
+        db_session.commit()
+        
+        client.put(
+            f'/api/ingredients/{edited.id}',
+            data=json.dumps({'quantity': 0}),
+            content_type='application/json'
+        )
+        client.post('/api/shopping-list/check-low-stock')
+        
+        items = {i.ingredient_id: i.quantity_needed for i in ShoppingList.query.all()}
+        assert items == {edited.id: 100, checked.id: 100}
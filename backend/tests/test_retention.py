@@ -0,0 +1,62 @@
+"""
+Testes unitários para retenção e arquivamento
+"""
+import pytest
+import json
+from datetime import datetime, timedelta
+from models import ShoppingList, CookingHistory
+
+
+class TestRetention:
+    """Testes para POST /api/maintenance/retention"""
+    
+    def test_archives_old_purchases_and_history(self, client, db_session, sample_ingredient, sample_recipe):
+        """Testar que só o que passou da retenção sai das tabelas quentes"""
+        old = datetime.utcnow() - timedelta(days=60)
+        db_session.add(ShoppingList(ingredient_id=sample_ingredient.id, quantity_needed=1,
+                                    purchased=True, purchased_at=old))
+        db_session.add(ShoppingList(ingredient_id=sample_ingredient.id, quantity_needed=2,
+                                    purchased=True, purchased_at=datetime.utcnow()))
+        db_session.add(ShoppingList(ingredient_id=sample_ingredient.id, quantity_needed=3))
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=2, cooked_at=old))
+        db_session.add(CookingHistory(recipe_id=sample_recipe.id, servings_made=1))
+        db_session.commit()
+        
+        response = client.post('/api/maintenance/retention',
+                               data=json.dumps({'shopping_days': 30, 'history_days': 30}),
+                               content_type='application/json')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data == {'shopping_items_archived': 1, 'history_archived': 1}
+        assert ShoppingList.query.count() == 2
+        assert CookingHistory.query.count() == 1
+        
+        archived = json.loads(client.get('/api/history/archive').data)
+        assert archived[0]['recipe_name'] == 'Salada de Tomate'
+        assert archived[0]['servings_made'] == 2
+    
+    def test_invalid_days(self, client):
+        """Testar dias inválidos"""
+        response = client.post('/api/maintenance/retention',
+                               data=json.dumps({'history_days': -1}),
+                               content_type='application/json')
+        
+        assert response.status_code == 400
+
+
+class TestClearPurchasedArchives:
+    """Testes para DELETE /api/shopping-list/clear-purchased"""
+    
+    def test_clear_purchased_keeps_archive(self, client, db_session, sample_shopping_item):
+        """Testar que limpar os comprados preserva os dados no arquivo"""
+        sample_shopping_item.purchased = True
+        sample_shopping_item.purchased_at = datetime.utcnow()
+        db_session.commit()
+        
+        client.delete('/api/shopping-list/clear-purchased')
+        
+        assert ShoppingList.query.count() == 0
+        archived = json.loads(client.get('/api/shopping-list/archive').data)
+        assert len(archived) == 1
+        assert archived[0]['quantity_needed'] == 5.0
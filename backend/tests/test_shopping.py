@@ -3,7 +3,7 @@ Testes unitários para rotas de lista de compras
 """
 import pytest
 import json
-from models import ShoppingList, Ingredient
+from models import ShoppingList, Ingredient, IngredientPack
 
 
 class TestGetShoppingList:
@@ -83,6 +83,17 @@ class TestAddToShoppingList:
         assert result['ingredient_id'] == sample_ingredient.id
         assert result['quantity_needed'] == 10.0
     
+    def test_add_keeps_explicit_zero(self, client, sample_ingredient):
+        """Testar que quantity_needed=0 informado não é trocado pela quantidade sugerida"""
+        response = client.post(
+            '/api/shopping-list',
+            data=json.dumps({'ingredient_id': sample_ingredient.id, 'quantity_needed': 0}),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 201
+        assert json.loads(response.data)['quantity_needed'] == 0
+    
     def test_add_to_shopping_list_missing_ingredient_id(self, client):
         """Testar adicionar sem ingredient_id"""
         data = {'quantity_needed': 5.0}
@@ -152,6 +163,118 @@ class TestMarkAsPurchased:
         ing_response = client.get(f'/api/ingredients/{sample_shopping_item.ingredient_id}')
         ingredient = json.loads(ing_response.data)
         assert ingredient['quantity'] == initial_quantity + 5.0
+    
+    def test_repurchase_does_not_restock(self, client, db_session, sample_shopping_item):
+        """Testar que comprar de novo um item já comprado só atualiza a data"""
+        url = f'/api/shopping-list/{sample_shopping_item.id}/purchase'
+        body = json.dumps({'add_to_stock': True, 'quantity_purchased': 5.0})
+        client.post(url, data=body, content_type='application/json')
+        
+        response = client.post(url, data=body, content_type='application/json')
+        
+        assert response.status_code == 200
+        result = json.loads(response.data)
+        assert result['already_purchased'] is True
+        assert result['quantity_added'] == 0
+        db_session.expire_all()
+        assert db_session.get(Ingredient, sample_shopping_item.ingredient_id).quantity == 10.0
+    
+    def test_invalid_quantity_purchased(self, client, sample_shopping_item):
+        """Testar quantidade comprada inválida"""
+        for quantity in ('5', -1, 0):
+            response = client.post(
+                f'/api/shopping-list/{sample_shopping_item.id}/purchase',
+                data=json.dumps({'add_to_stock': True, 'quantity_purchased': quantity}),
+                content_type='application/json'
+            )
+            
+            assert response.status_code == 400
+    
+    def test_zero_quantity_item_without_body(self, client, db_session, sample_shopping_item):
+        """Testar que item com quantity_needed 0 pode ser comprado sem informar quantidade"""
+        sample_shopping_item.quantity_needed = 0
+        db_session.commit()
+        
+        response = client.post(f'/api/shopping-list/{sample_shopping_item.id}/purchase')
+        
+        assert response.status_code == 200
+        assert json.loads(response.data)['item']['purchased'] is True
+
+
+class TestBulkPurchase:
+    """Testes para POST /api/shopping-list/purchase"""
+    
+    def test_bulk_purchase_adds_to_stock(self, client, db_session, multiple_ingredients):
+        """Testar compra em massa com reposição e registro das movimentações"""
+        acucar, leite = multiple_ingredients[2], multiple_ingredients[3]
+        items = [
+            ShoppingList(ingredient_id=acucar.id, quantity_needed=500.0),
+            ShoppingList(ingredient_id=leite.id, quantity_needed=2.0),
+        ]
+        for item in items:
+            db_session.add(item)
+        db_session.commit()
+        
+        data = {
+            'items': [{'id': items[0].id, 'quantity_purchased': 1000.0}, {'id': items[1].id}],
+            'add_to_stock': True
+        }
+        response = client.post(
+            '/api/shopping-list/purchase',
+            data=json.dumps(data),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 200
+        result = json.loads(response.data)
+        assert sorted(result['purchased_ids']) == sorted(i.id for i in items)
+        assert ShoppingList.query.filter_by(purchased=False).count() == 0
+        assert db_session.get(Ingredient, acucar.id).quantity == 2000.0
+        assert db_session.get(Ingredient, leite.id).quantity == 4.0
+        
+        movements = json.loads(client.get(f'/api/ingredients/{acucar.id}/movements').data)
+        assert len(movements) == 1
+        assert movements[0]['quantity_change'] == 1000.0
+        assert movements[0]['reason'] == 'purchase'
+    
+    def test_bulk_purchase_without_stock(self, client, sample_shopping_item):
+        """Testar compra em massa sem alterar o estoque"""
+        initial_quantity = sample_shopping_item.ingredient.quantity
+        
+        response = client.post(
+            '/api/shopping-list/purchase',
+            data=json.dumps({'items': [sample_shopping_item.id, 99999]}),
+            content_type='application/json'
+        )
+        
+        result = json.loads(response.data)
+        assert result['purchased_ids'] == [sample_shopping_item.id]
+        assert result['skipped_ids'] == [99999]
+        ingredient = json.loads(client.get(f'/api/ingredients/{sample_shopping_item.ingredient_id}').data)
+        assert ingredient['quantity'] == initial_quantity
+    
+    def test_bulk_purchase_requires_items(self, client):
+        """Testar compra em massa sem itens"""
+        response = client.post(
+            '/api/shopping-list/purchase',
+            data=json.dumps({}),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 400
+    
+    def test_bulk_purchase_invalid_ids(self, client, db_session, sample_shopping_item):
+        """Testar ids que não são inteiros, soltos ou em objetos"""
+        for items in (['abc'], [sample_shopping_item.id, 1.5], [{'id': 'abc'}], [True]):
+            response = client.post(
+                '/api/shopping-list/purchase',
+                data=json.dumps({'items': items}),
+                content_type='application/json'
+            )
+            
+            assert response.status_code == 400
+        
+        assert db_session.get(ShoppingList, sample_shopping_item.id).purchased is False
 
 
 class TestDeleteShoppingItem:
@@ -191,6 +314,31 @@ class TestCheckLowStock:
         result = json.loads(response.data)
         assert result['message'] is not None
         assert 'Ingrediente Baixo' in result['added_items']
+    
+    def test_check_low_stock_is_idempotent(self, client, db_session):
+        """Testar que rodar duas vezes não duplica itens pendentes"""
+        db_session.add(Ingredient(
+            name='Ingrediente Baixo',
+            quantity=1.0,
+            unit='unidades',
+            minimum_quantity=5.0
+        ))
+        db_session.add(Ingredient(
+            name='Ingrediente Ok',
+            quantity=10.0,
+            unit='unidades',
+            minimum_quantity=5.0
+        ))
+        db_session.commit()
+        
+        client.post('/api/shopping-list/check-low-stock')
+        response = client.post('/api/shopping-list/check-low-stock')
+        
+        result = json.loads(response.data)
+        assert result['added_items'] == []
+        items = ShoppingList.query.filter_by(purchased=False).all()
+        assert len(items) == 1
+        assert items[0].quantity_needed == 5.0
 
 
 class TestClearPurchasedItems:
@@ -227,3 +375,100 @@ class TestGetShoppingStats:
         assert 'pending' in data
         assert 'purchased' in data
         assert data['total'] >= 1
+    
+    def test_stats_estimated_cost_and_refresh(self, client, db_session, sample_shopping_item):
+        """Testar custo estimado pela embalagem mais barata e atualização após escrita"""
+        ingredient_id = sample_shopping_item.ingredient_id
+        item_id = sample_shopping_item.id
+        quantity = sample_shopping_item.quantity_needed
+        db_session.add(IngredientPack(ingredient_id=ingredient_id, size=1, price=10))
+        db_session.add(IngredientPack(ingredient_id=ingredient_id, size=2, price=16))
+        db_session.commit()
+        
+        data = json.loads(client.get('/api/shopping-list/stats').data)
+        assert data['pending'] == 1
+        assert data['estimated_cost'] == round(quantity * 8, 2)
+        assert data['unpriced'] == 0
+        
+        client.post(f'/api/shopping-list/{item_id}/purchase', data=json.dumps({}), content_type='application/json')
+        
+        data = json.loads(client.get('/api/shopping-list/stats').data)
+        assert data['pending'] == 0
+        assert data['purchased'] == 1
+        assert data['estimated_cost'] == 0
+    
+    def test_new_items_update_cached_counters(self, client, db_session, sample_shopping_item, multiple_ingredients, monkeypatch):
+        """Testar que itens novos são somados aos contadores em cache sem recalcular"""
+        import services.shopping_stats as shopping_stats
+        acucar, leite = multiple_ingredients[2], multiple_ingredients[3]
+        db_session.add(IngredientPack(ingredient_id=acucar.id, size=1000, price=5))
+        db_session.commit()
+        before = json.loads(client.get('/api/shopping-list/stats').data)
+        
+        def fail():
+            raise AssertionError('contadores recalculados')
+        monkeypatch.setattr(shopping_stats, '_compute_counters', fail)
+        for ingredient, quantity in ((acucar, 500), (leite, 1)):
+            client.post(
+                '/api/shopping-list',
+                data=json.dumps({'ingredient_id': ingredient.id, 'quantity_needed': quantity}),
+                content_type='application/json'
+            )
+        
+        data = json.loads(client.get('/api/shopping-list/stats').data)
+        assert data['total'] == before['total'] + 2
+        assert data['pending'] == before['pending'] + 2
+        assert data['estimated_cost'] == round(before['estimated_cost'] + 2.5, 2)
+        assert data['unpriced'] == before['unpriced'] + 1
+
+
+class TestExportShoppingList:
+    """Testes para GET /api/shopping-list/export"""
+    
+    def test_export_formats(self, client, sample_shopping_item):
+        """Testar texto, CSV e JSON compacto"""
+        text = client.get('/api/shopping-list/export').get_data(as_text=True)
+        assert text == '[ ] Tomate - 5 unidades\n'
+        
+        csv_data = client.get('/api/shopping-list/export?format=csv').get_data(as_text=True)
+        assert csv_data.splitlines()[0] == 'id,name,quantity,unit,purchased'
+        assert 'Tomate' in csv_data.splitlines()[1]
+        
+        data = json.loads(client.get('/api/shopping-list/export?format=json').data)
+        assert data['columns'] == ['id', 'name', 'quantity', 'unit', 'purchased']
+        assert data['rows'] == [[sample_shopping_item.id, 'Tomate', 5.0, 'unidades', False]]
+    
+    def test_etag_not_modified(self, client, db_session, sample_shopping_item):
+        """Testar 304 com o ETag atual e novo ETag após mudança"""
+        response = client.get('/api/shopping-list/export?format=csv')
+        etag = response.headers['ETag']
+        
+        response = client.get('/api/shopping-list/export?format=csv', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        
+        sample_shopping_item.quantity_needed = 7
+        db_session.commit()
+        response = client.get('/api/shopping-list/export?format=csv', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+    
+    def test_etag_changes_when_quantities_swap(self, client, db_session, multiple_ingredients):
+        """Testar que trocar quantidades entre dois itens muda o ETag"""
+        first = ShoppingList(ingredient_id=multiple_ingredients[0].id, quantity_needed=1)
+        second = ShoppingList(ingredient_id=multiple_ingredients[1].id, quantity_needed=2)
+        db_session.add_all([first, second])
+        db_session.commit()
+        etag = client.get('/api/shopping-list/export?format=csv').headers['ETag']
+        
+        first.quantity_needed, second.quantity_needed = 2, 1
+        db_session.commit()
+        response = client.get('/api/shopping-list/export?format=csv', headers={'If-None-Match': etag})
+        
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+    
+    def test_invalid_format(self, client):
+        """Testar formato inválido"""
+        response = client.get('/api/shopping-list/export?format=pdf')
+        
+        assert response.status_code == 400
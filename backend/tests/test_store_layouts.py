@@ -0,0 +1,107 @@
+"""
+Testes unitários para layouts de loja e a lista de compras por corredor
+"""
+import pytest
+import json
+from models import Ingredient, ShoppingList
+
+
+@pytest.fixture
+def shopping_items(db_session):
+    """Itens pendentes de categorias diferentes"""
+    ingredients = [
+        Ingredient(name='Alface', quantity=0, unit='unidades', category='Vegetais'),
+        Ingredient(name='Leite', quantity=0, unit='L', category='Laticínios'),
+        Ingredient(name='Sabão', quantity=0, unit='unidades', category='Limpeza'),
+        Ingredient(name='Banana', quantity=0, unit='unidades', category='Frutas'),
+    ]
+    for ing in ingredients:
+        db_session.add(ing)
+    db_session.flush()
+    for ing in ingredients:
+        db_session.add(ShoppingList(ingredient_id=ing.id, quantity_needed=1))
+    db_session.commit()
+    return ingredients
+
+
+@pytest.fixture
+def layout(client, shopping_items):
+    """Layout: laticínios primeiro, depois hortifruti; banana com exceção para o corredor 1"""
+    data = {
+        'name': 'Mercado do Bairro',
+        'aisles': [
+            {'name': 'Laticínios', 'position': 1, 'categories': ['Laticínios'], 'ingredient_ids': [shopping_items[3].id]},
+            {'name': 'Hortifruti', 'position': 2, 'categories': ['Vegetais', 'Frutas']},
+        ]
+    }
+    response = client.post('/api/store-layouts', data=json.dumps(data), content_type='application/json')
+    return json.loads(response.data)
+
+
+class TestStoreLayouts:
+    """Testes para /api/store-layouts"""
+    
+    def test_create_layout(self, layout):
+        """Testar criação; o primeiro layout vira padrão"""
+        assert layout['is_default'] is True
+        assert [a['name'] for a in layout['aisles']] == ['Laticínios', 'Hortifruti']
+        assert layout['aisles'][1]['categories'] == ['Vegetais', 'Frutas']
+    
+    def test_create_layout_requires_name(self, client):
+        """Testar layout sem nome"""
+        response = client.post('/api/store-layouts', data=json.dumps({}), content_type='application/json')
+        
+        assert response.status_code == 400
+
+    
+    def test_duplicate_category_rejected(self, client):
+        """Testar que uma categoria não pode estar em dois corredores"""
+        data = {
+            'name': 'Duplicado',
+            'aisles': [
+                {'name': 'A1', 'categories': ['Vegetais']},
+                {'name': 'A2', 'categories': ['Vegetais']},
+            ]
+        }
+        response = client.post('/api/store-layouts', data=json.dumps(data), content_type='application/json')
+        
+        assert response.status_code == 400
+    
+    def test_update_with_same_rules(self, client, layout):
+        """Testar que regravar os mesmos corredores não esbarra nos índices únicos"""
+        data = {'aisles': [
+            {'name': 'Hortifruti', 'position': 1, 'categories': ['Vegetais', 'Frutas']},
+            {'name': 'Laticínios', 'position': 2, 'categories': ['Laticínios']},
+        ]}
+        response = client.put(f"/api/store-layouts/{layout['id']}", data=json.dumps(data),
+                              content_type='application/json')
+        
+        assert response.status_code == 200
+        assert [a['name'] for a in json.loads(response.data)['aisles']] == ['Hortifruti', 'Laticínios']
+
+
+class TestAisleOrderedShoppingList:
+    """Testes para GET /api/shopping-list com layout"""
+    
+    def test_walking_order(self, client, layout):
+        """Testar ordem do percurso com exceção por ingrediente e itens sem corredor no fim"""
+        response = client.get('/api/shopping-list')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [i['ingredient_name'] for i in data] == ['Banana', 'Leite', 'Alface', 'Sabão']
+        assert data[-1]['aisle'] == 'Outros'
+    
+    def test_grouped(self, client, layout):
+        """Testar agrupamento por corredor"""
+        response = client.get(f"/api/shopping-list?layout_id={layout['id']}&grouped=true")
+        
+        data = json.loads(response.data)
+        assert [g['aisle'] for g in data['aisles']] == ['Laticínios', 'Hortifruti', 'Outros']
+        assert len(data['aisles'][0]['items']) == 2
+    
+    def test_unknown_layout(self, client):
+        """Testar layout inexistente"""
+        response = client.get('/api/shopping-list?layout_id=99999')
+        
+        assert response.status_code == 404
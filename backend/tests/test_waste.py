@@ -0,0 +1,159 @@
+"""
+Testes unitários para o descarte de estoque e o relatório de desperdício
+"""
+import pytest
+import json
+from models import Ingredient, StockMovement, IngredientPack, WasteRecord, ShoppingList
+
+
+class TestDiscardIngredient:
+    """Testes para POST /api/ingredients/<id>/discard"""
+
+    def test_discard_part_of_stock(self, client, db_session, sample_ingredient):
+        """Testar que o descarte baixa o estoque e grava desperdício e movimentação"""
+        db_session.add(IngredientPack(ingredient_id=sample_ingredient.id, size=1, price=0.5))
+        db_session.commit()
+
+        response = client.post(
+            f'/api/ingredients/{sample_ingredient.id}/discard',
+            data=json.dumps({'quantity': 2, 'reason': 'spoiled'}),
+            content_type='application/json'
+        )
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['waste']['quantity'] == 2
+        assert data['waste']['cost'] == 1.0
+        assert data['ingredient']['quantity'] == 3.0
+        movement = StockMovement.query.filter_by(reason='waste').one()
+        assert movement.quantity_change == -2
+        assert movement.reference_id == data['waste']['id']
+
+    def test_discard_all_clears_expiry(self, client, db_session, sample_ingredient):
+        """Testar que sem quantidade todo o estoque é descartado, a validade é limpa e o item é reposto"""
+        from datetime import date
+        sample_ingredient.expiry_date = date(2024, 1, 1)
+        db_session.commit()
+
+        response = client.post(f'/api/ingredients/{sample_ingredient.id}/discard')
+
+        assert response.status_code == 201
+        ingredient = db_session.get(Ingredient, sample_ingredient.id)
+        assert ingredient.quantity == 0
+        assert ingredient.expiry_date is None
+        assert json.loads(response.data)['waste']['cost'] is None
+        assert ShoppingList.query.filter_by(ingredient_id=sample_ingredient.id).count() == 1
+
+    def test_discard_more_than_stock(self, client, sample_ingredient):
+        """Testar que não é possível descartar mais do que há em estoque"""
+        response = client.post(
+            f'/api/ingredients/{sample_ingredient.id}/discard',
+            data=json.dumps({'quantity': 50}),
+            content_type='application/json'
+        )
+
+        assert response.status_code == 400
+        assert WasteRecord.query.count() == 0
+
+    def test_invalid_quantity(self, client, sample_ingredient):
+        """Testar quantidade que não é número"""
+        response = client.post(
+            f'/api/ingredients/{sample_ingredient.id}/discard',
+            data=json.dumps({'quantity': '2'}),
+            content_type='application/json'
+        )
+
+        assert response.status_code == 400
+
+    def test_invalid_reason(self, client, sample_ingredient):
+        """Testar motivo inválido"""
+        response = client.post(
+            f'/api/ingredients/{sample_ingredient.id}/discard',
+            data=json.dumps({'quantity': 1, 'reason': 'boredom'}),
+            content_type='application/json'
+        )
+
+        assert response.status_code == 400
+
+
+class TestDiscardFrozenMeal:
+    """Testes para POST /api/frozen-meals/<id>/discard"""
+
+    def test_discard_portions(self, client, db_session, sample_frozen_meal):
+        """Testar descarte parcial e depois do restante"""
+        response = client.post(
+            f'/api/frozen-meals/{sample_frozen_meal.id}/discard',
+            data=json.dumps({'portions': 1}),
+            content_type='application/json'
+        )
+
+        assert response.status_code == 201
+        meal = json.loads(response.data)['meal']
+        assert meal['discarded_portions'] == 1
+        assert meal['remaining_portions'] == 3
+        assert meal['status'] == 'frozen'
+
+        response = client.post(f'/api/frozen-meals/{sample_frozen_meal.id}/discard')
+
+        meal = json.loads(response.data)['meal']
+        assert meal['remaining_portions'] == 0
+        assert meal['status'] == 'discarded'
+
+    def test_discard_more_than_remaining(self, client, sample_frozen_meal):
+        """Testar que não é possível descartar mais porções do que restam"""
+        response = client.post(
+            f'/api/frozen-meals/{sample_frozen_meal.id}/discard',
+            data=json.dumps({'portions': 10}),
+            content_type='application/json'
+        )
+
+        assert response.status_code == 400
+
+    def test_invalid_portions(self, client, sample_frozen_meal):
+        """Testar porções que não são um número inteiro"""
+        for portions in ('1', 1.5):
+            response = client.post(
+                f'/api/frozen-meals/{sample_frozen_meal.id}/discard',
+                data=json.dumps({'portions': portions}),
+                content_type='application/json'
+            )
+
+            assert response.status_code == 400
+
+
+class TestWasteReport:
+    """Testes para GET /api/analytics/waste"""
+
+    def test_report_groups(self, client, db_session, sample_ingredient, sample_frozen_meal):
+        """Testar totais por ingrediente, categoria e mês"""
+        db_session.add(IngredientPack(ingredient_id=sample_ingredient.id, size=1, price=0.5))
+        db_session.commit()
+        for quantity in (1, 2):
+            client.post(
+                f'/api/ingredients/{sample_ingredient.id}/discard',
+                data=json.dumps({'quantity': quantity}),
+                content_type='application/json'
+            )
+        client.post(f'/api/frozen-meals/{sample_frozen_meal.id}/discard')
+
+        by_ingredient = json.loads(client.get('/api/analytics/waste').data)
+        tomato = next(g for g in by_ingredient['groups'] if g['ingredient_id'] == sample_ingredient.id)
+        assert tomato['quantity'] == 3
+        assert tomato['cost'] == 1.5
+        assert tomato['records'] == 2
+        assert by_ingredient['total_records'] == 3
+
+        by_category = json.loads(client.get('/api/analytics/waste?group_by=category').data)
+        categories = {g['category']: g for g in by_category['groups']}
+        assert categories['Vegetais']['cost'] == 1.5
+        assert categories['Refeições congeladas']['quantity'] == 4
+
+        by_month = json.loads(client.get('/api/analytics/waste?group_by=month').data)
+        assert len(by_month['groups']) == 1
+        assert by_month['groups'][0]['records'] == 3
+
+    def test_invalid_group(self, client):
+        """Testar agrupamento inválido"""
+        response = client.get('/api/analytics/waste?group_by=week')
+
+        assert response.status_code == 400
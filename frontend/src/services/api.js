@@ -26,33 +26,48 @@ export const ingredientsAPI = {
   create: (data) => api.post('/ingredients', data),
   update: (id, data) => api.put(`/ingredients/${id}`, data),
   delete: (id) => api.delete(`/ingredients/${id}`),
-  getExpiring: () => api.get('/ingredients/expiring'),
+  getExpiring: (days) => api.get('/ingredients/expiring', { params: { days } }),
   getCategories: () => api.get('/ingredients/categories'),
   getLocations: () => api.get('/ingredients/locations'),
+  getFacets: () => api.get('/ingredients/facets'),
+  getMovements: (id) => api.get(`/ingredients/${id}/movements`),
+  discard: (id, data = {}) => api.post(`/ingredients/${id}/discard`, data),
+  getPrices: (id) => api.get(`/ingredients/${id}/prices`),
+  getPacks: (id) => api.get(`/ingredients/${id}/packs`),
+  addPack: (id, data) => api.post(`/ingredients/${id}/packs`, data),
+  deletePack: (packId) => api.delete(`/ingredients/packs/${packId}`),
 };
 
 // Receitas
 export const recipesAPI = {
-  getAll: () => api.get('/recipes'),
+  getAll: (sort) => api.get('/recipes', { params: { sort } }),
   getById: (id) => api.get(`/recipes/${id}`),
   create: (data) => api.post('/recipes', data),
   update: (id, data) => api.put(`/recipes/${id}`, data),
   delete: (id) => api.delete(`/recipes/${id}`),
   canMake: (id, servings) => api.get(`/recipes/${id}/can-make`, { params: { servings } }),
   cook: (id, data) => api.post(`/recipes/${id}/cook`, data),
+  cookAndFreeze: (id, data) => api.post(`/recipes/${id}/cook-and-freeze`, data),
   getAvailable: () => api.get('/recipes/can-make-now'),
+  getCosts: (method = 'latest') => api.get('/recipes/costs', { params: { method } }),
+  getCost: (id, method = 'latest') => api.get(`/recipes/${id}/cost`, { params: { method } }),
 };
 
 // Lista de Compras
 export const shoppingAPI = {
   getAll: (purchased) => api.get('/shopping-list', { params: { purchased } }),
+  getByAisle: (layoutId) => api.get('/shopping-list', { params: { purchased: false, layout_id: layoutId, grouped: true } }),
   getById: (id) => api.get(`/shopping-list/${id}`),
   add: (data) => api.post('/shopping-list', data),
   markPurchased: (id, data) => api.post(`/shopping-list/${id}/purchase`, data),
+  purchaseMany: (items, addToStock) => api.post('/shopping-list/purchase', { items, add_to_stock: addToStock }),
   delete: (id) => api.delete(`/shopping-list/${id}`),
   checkLowStock: () => api.post('/shopping-list/check-low-stock'),
   clearPurchased: () => api.delete('/shopping-list/clear-purchased'),
   getStats: () => api.get('/shopping-list/stats'),
+  getArchive: (params = {}) => api.get('/shopping-list/archive', { params }),
+  export: (format = 'text', params = {}) => api.get('/shopping-list/export', { params: { format, ...params }, responseType: 'text' }),
+  getReorderPoints: (needsReorder) => api.get('/shopping-list/reorder-points', { params: { needs_reorder: needsReorder } }),
 };
 
 // Histórico
@@ -61,9 +76,14 @@ export const historyAPI = {
   getById: (id) => api.get(`/history/${id}`),
   update: (id, data) => api.put(`/history/${id}`, data),
   delete: (id) => api.delete(`/history/${id}`),
+  reverse: (id) => api.post(`/history/${id}/reverse`),
+  reverseMany: (ids) => api.post('/history/reverse', { ids }),
   getStats: () => api.get('/history/stats'),
-  getRecent: () => api.get('/history/recent'),
-  getByRecipe: (recipeId) => api.get(`/history/recipe/${recipeId}`),
+  getRangeStats: (start, end) => api.get('/history/stats/range', { params: { start, end } }),
+  getRecent: (params = {}) => api.get('/history/recent', { params }),
+  getByRecipe: (recipeId, params = {}) => api.get(`/history/recipe/${recipeId}`, { params }),
+  getArchive: (params = {}) => api.get('/history/archive', { params }),
+  export: (format = 'ndjson', params = {}) => api.get('/history/export', { params: { format, ...params }, responseType: 'text' }),
 };
 
 // Refeições Congeladas
@@ -74,7 +94,50 @@ export const frozenMealsAPI = {
   update: (id, data) => api.put(`/frozen-meals/${id}`, data),
   delete: (id) => api.delete(`/frozen-meals/${id}`),
   consume: (id, portions) => api.post(`/frozen-meals/${id}/consume`, { portions }),
+  discard: (id, data = {}) => api.post(`/frozen-meals/${id}/discard`, data),
   getStats: () => api.get('/frozen-meals/stats'),
 };
 
+// Validade (todos os estoques)
+export const expiryAPI = {
+  getAll: (days) => api.get('/expiring', { params: { days } }),
+};
+
+// Previsão de consumo
+export const forecastAPI = {
+  getDepletion: (params = {}) => api.get('/forecast/depletion', { params }),
+};
+
+// Plano de Refeições
+export const mealPlanAPI = {
+  getAll: (start, end) => api.get('/meal-plan', { params: { start, end } }),
+  create: (data) => api.post('/meal-plan', data),
+  update: (id, data) => api.put(`/meal-plan/${id}`, data),
+  delete: (id) => api.delete(`/meal-plan/${id}`),
+  getRequirements: (start, end) => api.get('/meal-plan/requirements', { params: { start, end } }),
+  generateShoppingList: (start, end) => api.post('/meal-plan/shopping-list', null, { params: { start, end } }),
+  simulate: (params = {}) => api.get('/meal-plan/simulation', { params }),
+};
+
+// Layouts de loja
+export const storeLayoutsAPI = {
+  getAll: () => api.get('/store-layouts'),
+  getById: (id) => api.get(`/store-layouts/${id}`),
+  create: (data) => api.post('/store-layouts', data),
+  update: (id, data) => api.put(`/store-layouts/${id}`, data),
+  delete: (id) => api.delete(`/store-layouts/${id}`),
+};
+
+// Análises
+export const analyticsAPI = {
+  getConsumption: (params = {}) => api.get('/analytics/consumption', { params }),
+  getWaste: (params = {}) => api.get('/analytics/waste', { params }),
+  getEngine: () => api.get('/analytics/engine'),
+};
+
+// Manutenção
+export const maintenanceAPI = {
+  applyRetention: (data = {}) => api.post('/maintenance/retention', data),
+};
+
 export default api;